@@ -0,0 +1,633 @@
+"""
+Benchmark harness for protdict.Data hot paths.
+
+Every case is timed at each size and at each protected/typed mix. Peak memory is measured
+with tracemalloc in a separate pass so it does not skew the timings. Results are written as
+JSON, and two JSON runs can be compared to flag regressions.
+
+    python benchmarks/bench.py                                  # every case, default sizes
+    python benchmarks/bench.py --sizes 10 1000 --cases set clone --out run.json
+    python benchmarks/bench.py --compare base.json run.json --threshold 0.10
+"""
+import argparse
+import atexit
+import gc
+import io
+import json
+import os
+import pickle
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+from protdict import ConcurrentData, Data, DataSchema, DataTable, MappedData, ShardedData, SharedData, SQLiteData, VersionedData, __version__, binary  # noqa: E402
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+# (fraction of protected keys, fraction of typed keys)
+DEFAULT_MIXES = [(0.0, 0.0), (0.1, 0.1), (0.5, 0.5)]
+# worker threads for the contention cases (--threads)
+THREADS = 4
+
+CASES: dict = {}
+
+
+def case(name: str):
+    """Register `fn(n, protected, typed) -> run` as benchmark `name`; `run()` is the timed call and returns its op count."""
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def make_source(n: int, protected: float = 0.0, typed: float = 0.0, tagged: bool = True) -> dict:
+    """Build a data_dictionary of `n` int values. The first `protected` fraction of keys
+    is protected and the last `typed` fraction is typed (tagged form only)."""
+    p_count, t_start = int(n * protected), n - int(n * typed)
+    out = {}
+    for i in range(n):
+        tags = []
+        if i < p_count:
+            tags.append("protected")
+        if i >= t_start:
+            tags.append("typed")
+        out[f"k{i}"] = {"value": i, "tags": tags} if tagged and tags else i
+    return out
+
+
+@case("init_plain")
+def bench_init_plain(n, protected, typed):
+    src = make_source(n, tagged=False)
+    return lambda: (Data(src), n)[1]
+
+
+@case("init_tagged")
+def bench_init_tagged(n, protected, typed):
+    src = make_source(n, protected, typed)
+    return lambda: (Data(src), n)[1]
+
+
+@case("load_ndjson")
+def bench_load_ndjson(n, protected, typed):
+    """Streaming construction from an NDJSON dump (Data.load)."""
+    buf = io.StringIO()
+    Data(make_source(n, protected, typed)).export_to(buf, format="ndjson")
+
+    def run():
+        buf.seek(0)
+        Data.load(buf, format="ndjson")
+        return n
+    return run
+
+
+def _payload(run, raw):
+    """Attach the serialized size to `run` so it is reported as `payload_bytes`."""
+    run.payload_bytes = len(raw)
+    return run
+
+
+@case("load_binary")
+def bench_load_binary(n, protected, typed):
+    """Load from the binary snapshot format; compare with load_json and load_pickle."""
+    raw = binary.dumps(Data(make_source(n, protected, typed)))
+    return _payload(lambda: (binary.load(raw), n)[1], raw)
+
+
+@case("open_mapped")
+def bench_open_mapped(n, protected, typed):
+    """Open a mapped snapshot and read 100 keys; compare with load_binary, which decodes everything."""
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".pdat")
+    os.close(fd)
+    atexit.register(os.remove, path)
+    Data(make_source(n, protected, typed)).save_binary(path, index=True)
+    keys = [f"k{i}" for i in range(0, n, max(n // 100, 1))]
+
+    def run():
+        with MappedData(path) as m:
+            for k in keys:
+                m[k]
+        return len(keys)
+    return run
+
+
+@case("attach_shared")
+def bench_attach_shared(n, protected, typed):
+    """Attach to a published SharedData and read 100 keys; compare with load_pickle, the per-worker copy it replaces."""
+    pub = SharedData(Data(make_source(n, protected, typed)))
+    atexit.register(pub.close)
+    keys = [f"k{i}" for i in range(0, n, max(n // 100, 1))]
+
+    def run():
+        view = pub.attach()
+        for k in keys:
+            view[k]
+        view.close()
+        return len(keys)
+    return run
+
+
+@case("pickle_data")
+def bench_pickle_data(n, protected, typed):
+    """Round-trip a Data through pickle protocol 5, as a process pool hand-off does."""
+    d = Data(make_source(n, protected, typed))
+    raw = pickle.dumps(d, protocol=5)
+    return _payload(lambda: (pickle.loads(pickle.dumps(d, protocol=5)), n)[1], raw)
+
+
+@case("load_json")
+def bench_load_json(n, protected, typed):
+    raw = json.dumps(Data(make_source(n, protected, typed)).export()).encode()
+    return _payload(lambda: (Data(json.loads(raw)), n)[1], raw)
+
+
+@case("load_pickle")
+def bench_load_pickle(n, protected, typed):
+    raw = pickle.dumps(Data(make_source(n, protected, typed)).export(), protocol=pickle.HIGHEST_PROTOCOL)
+    return _payload(lambda: (Data(pickle.loads(raw)), n)[1], raw)
+
+
+def _record_template(protected, typed) -> dict:
+    """A 10-key record in export() form for the record cases."""
+    return make_source(10, protected, typed)
+
+
+@case("records_plain")
+def bench_records_plain(n, protected, typed):
+    """`n` separate Data records with the same layout; compare peak memory with records_schema."""
+    src = _record_template(protected, typed)
+    return lambda: len([Data(src) for _ in range(n)])
+
+
+@case("records_schema")
+def bench_records_schema(n, protected, typed):
+    """`n` records built from one DataSchema, sharing keys, tags and type locks."""
+    schema = DataSchema.from_export(_record_template(protected, typed))
+    new = schema.new
+    return lambda: len([new() for _ in range(n)])
+
+
+def _retained(n, protected, typed, policy: str):
+    """`n` records, each built from its own freshly parsed input, as from a stream of JSON lines."""
+    line = json.dumps(_record_template(protected, typed))
+    return lambda: len([Data(json.loads(line), retain_input=policy) for _ in range(n)])
+
+
+@case("retain_drop")
+def bench_retain_drop(n, protected, typed):
+    """Default policy: the parsed input is freed once the record is built; compare peak memory with retain_keep."""
+    return _retained(n, protected, typed, "drop")
+
+
+@case("retain_keep")
+def bench_retain_keep(n, protected, typed):
+    """Every record pins its input dict, wrapper dicts included."""
+    return _retained(n, protected, typed, "keep")
+
+
+@case("retain_frozen")
+def bench_retain_frozen(n, protected, typed):
+    """Every record keeps a compact copy of its input."""
+    return _retained(n, protected, typed, "frozen")
+
+
+@case("records_set_loop")
+def bench_records_set_loop(n, protected, typed):
+    """`set` on one key of each of `n` records in a Python loop; compare with table_set_column."""
+    schema = DataSchema.from_export(_record_template(protected, typed))
+    records = [schema.new() for _ in range(n)]
+
+    def run():
+        for rec in records:
+            rec.set("k9", 1)
+        return n
+    return run
+
+
+@case("table_set_column")
+def bench_table_set_column(n, protected, typed):
+    """One batched, type-checked column assignment over `n` rows."""
+    schema = DataSchema.from_export(_record_template(protected, typed))
+    table = DataTable.from_records(schema.new() for _ in range(n))
+    column = [1] * n
+    return lambda: (table.set_column("k9", column), n)[1]
+
+
+@case("table_filter")
+def bench_table_filter(n, protected, typed):
+    schema = DataSchema.from_export(_record_template(protected, typed))
+    table = DataTable.from_records(schema.new([i] * 10) for i in range(n))
+    return lambda: (table.filter("k9", lambda v: v % 2 == 0), n)[1]
+
+
+def _contention(d, n: int, threads: int):
+    """Split `n` ops (90% get, 10% set) across `threads` threads hitting `d`; returns run()."""
+    keys = [f"k{i}" for i in range(100)]
+    per = max(n // threads, 1)
+
+    def worker():
+        get, set_ = d.get, d.set
+        for i in range(per):
+            k = keys[i % 100]
+            if i % 10:
+                get(k)
+            else:
+                set_(k, i)
+
+    def run():
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        return per * threads
+    return run
+
+
+@case("contention_plain")
+def bench_contention_plain(n, protected, typed):
+    """Unsynchronized baseline for contention_locked (unsafe for real use)."""
+    return _contention(Data(make_source(100, protected, typed)), n, THREADS)
+
+
+@case("contention_locked")
+def bench_contention_locked(n, protected, typed):
+    """`THREADS` threads doing 90% get / 10% set on one ConcurrentData."""
+    return _contention(ConcurrentData(make_source(100, protected, typed)), n, THREADS)
+
+
+@case("contention_sharded")
+def bench_contention_sharded(n, protected, typed):
+    """contention_locked spread over a ShardedData with one shard per thread."""
+    return _contention(ShardedData(make_source(100, protected, typed), shards=THREADS), n, THREADS)
+
+
+@case("set")
+def bench_set(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    keys = list(d.unprotected_keys(include_typed=True))
+
+    def run():
+        s = d.set
+        for k in keys:
+            s(k, 1)
+        return len(keys)
+    return run
+
+
+@case("set_journaled")
+def bench_set_journaled(n, protected, typed):
+    """`set` with a change journal enabled; compare with `set` for the journal's overhead."""
+    d = Data(make_source(n, protected, typed))
+    d.enable_journal()
+    keys = list(d.unprotected_keys(include_typed=True))
+
+    def run():
+        s = d.set
+        for k in keys:
+            s(k, 1)
+        return len(keys)
+    return run
+
+
+@case("oset")
+def bench_oset(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    keys = list(d.keys())
+
+    def run():
+        s = d.oset
+        for k in keys:
+            s(k, 1)
+        return len(keys)
+    return run
+
+
+@case("set_protected")
+def bench_set_protected(n, protected, typed):
+    """Writes that are refused by _procheck; measures the protection lookup itself."""
+    d = Data(make_source(n, max(protected, 0.5), typed))
+    keys = d.protected_keys() or list(d.keys())
+
+    def run():
+        s = d.set
+        for k in keys:
+            s(k.upper(), 1)
+        return len(keys)
+    return run
+
+
+@case("set_many")
+def bench_set_many(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    batch = dict.fromkeys(d.keys(), 1)
+    return lambda: (d.set_many(batch), n)[1]
+
+
+@case("merge_dict")
+def bench_merge_dict(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    new = {f"k{i}": i for i in range(n // 2, n + n // 2)}
+    return lambda: (d.merge_dict(new, overwrite_current=True), len(new))[1]
+
+
+@case("transaction_rollback")
+def bench_transaction_rollback(n, protected, typed):
+    """10 writes in a transaction, then a rollback; the cost does not grow with `n`."""
+    d = Data(make_source(n, protected, typed))
+    keys = list(d.unprotected_keys(include_typed=True))[:10]
+
+    def run():
+        with d.transaction() as tx:
+            for k in keys:
+                d.oset(k, None)
+            tx.rollback()
+        return len(keys)
+    return run
+
+
+@case("absorb")
+def bench_absorb(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    other = Data({f"k{i}": i for i in range(n // 2, n + n // 2)})
+    return lambda: (d.absorb(other, overwrite=True), n)[1]
+
+
+@case("export")
+def bench_export(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    return lambda: (d.export(), n)[1]
+
+
+@case("export_delta")
+def bench_export_delta(n, protected, typed):
+    """Sync 10 changed keys to a replica via export_delta/apply_delta; compare with a full `export`."""
+    d = Data(make_source(n, protected, typed))
+    replica = Data(d.export())
+    keys = list(d.unprotected_keys(include_typed=True))[:10]
+    since = d.enable_journal()
+
+    def run():
+        nonlocal since
+        for k in keys:
+            d.set(k, 1)
+        ops = d.export_delta(since)
+        since = d.journal_version()
+        return replica.apply_delta(ops)
+    return run
+
+
+@case("diff")
+def bench_diff(n, protected, typed):
+    """diff after 10 writes to a fingerprinted clone; only the written keys are rehashed."""
+    a = Data(make_source(n, protected, typed))
+    b = a.clone()
+    keys = list(b.unprotected_keys(include_typed=True))[:10]
+    a.fingerprint()
+    b.fingerprint()
+
+    def run():
+        for i, k in enumerate(keys):
+            b.oset(k, i)
+        return len(a.diff(b)["changed"])
+    return run
+
+
+@case("eq_fingerprint")
+def bench_eq_fingerprint(n, protected, typed):
+    """`==` between fingerprinted Data differing in one key; returns without comparing values."""
+    a = Data(make_source(n, protected, typed))
+    b = Data(make_source(n, protected, typed))
+    b.oset("k0", "changed")
+    a.fingerprint()
+    b.fingerprint()
+    return lambda: (a == b, 1)[1]
+
+
+@case("history_export")
+def bench_history_export(n, protected, typed):
+    """Keep 100 past versions as full export() copies; compare peak memory with history_versioned."""
+    d = Data(make_source(n, protected, typed))
+    keys = list(d.keys())
+
+    def run():
+        history = []
+        for i in range(100):
+            history.append(d.export())
+            d.oset(keys[i % len(keys)], i)
+        return len(history)
+    return run
+
+
+@case("history_versioned")
+def bench_history_versioned(n, protected, typed):
+    """Keep 100 past versions in a VersionedData; each costs O(log n) new trie nodes."""
+    d = VersionedData(make_source(n, protected, typed), max_versions=100)
+    keys = list(d.keys())
+
+    def run():
+        for i in range(100):
+            d.oset(keys[i % len(keys)], i)
+        return len(d.versions()) - 1
+    return run
+
+
+@case("sqlite_set")
+def bench_sqlite_set(n, protected, typed):
+    """Single-key sets on a SQLiteData: cached, with write-behind flushes every 1000 changes."""
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    atexit.register(os.remove, path)
+    d = SQLiteData(path, make_source(n, protected, typed))
+    atexit.register(d.close)
+    keys = list(d.unprotected_keys())[:1000]
+
+    def run():
+        for i, k in enumerate(keys):
+            d.set(k, i)
+        return len(keys)
+    return run
+
+
+@case("sqlite_merge")
+def bench_sqlite_merge(n, protected, typed):
+    """merge_dict on a SQLiteData, written as one SQL transaction; compare with merge_dict."""
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    atexit.register(os.remove, path)
+    d = SQLiteData(path, make_source(n, protected, typed))
+    atexit.register(d.close)
+    new = {f"k{i}": i for i in range(n // 2, n + n // 2)}
+    return lambda: (d.merge_dict(new, overwrite_current=True), len(new))[1]
+
+
+@case("sqlite_keys_by_tag")
+def bench_sqlite_keys_by_tag(n, protected, typed):
+    """keys_by_tag on a SQLiteData, served from the tag bits index; compare with keys_by_tag."""
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    atexit.register(os.remove, path)
+    d = SQLiteData(path, make_source(n, protected, typed))
+    atexit.register(d.close)
+    return lambda: (d.keys_by_tag(), n)[1]
+
+
+@case("export_to")
+def bench_export_to(n, protected, typed):
+    """Streaming ndjson export to a null sink; compare peak memory with `export`."""
+    d = Data(make_source(n, protected, typed))
+
+    def run():
+        with open(os.devnull, "w") as fp:
+            return d.export_to(fp, format="ndjson")
+    return run
+
+
+@case("clone")
+def bench_clone(n, protected, typed):
+    """A clone followed by one write, as in clone-per-request use."""
+    d = Data(make_source(n, protected, typed))
+    key = f"k{n - 1}"
+
+    def run():
+        c = d.clone()
+        c.oset(key, n)
+        return 1
+    return run
+
+
+@case("keys_by_tag")
+def bench_keys_by_tag(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+    return lambda: (d.keys_by_tag(), n)[1]
+
+
+@case("len_iter")
+def bench_len_iter(n, protected, typed):
+    d = Data(make_source(n, protected, typed))
+
+    def run():
+        len(d)
+        len(d.keys(include_protected=False))
+        for _ in d:
+            pass
+        return n
+    return run
+
+
+def measure(name: str, n: int, protected: float, typed: float, repeat: int, memory: bool) -> dict:
+    """Run one case and return its result row."""
+    run = CASES[name](n, protected, typed)
+    payload = getattr(run, "payload_bytes", None)
+    best, ops = float("inf"), 1
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        ops = run()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        run = CASES[name](n, protected, typed)
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "case": name, "size": n, "protected": protected, "typed": typed,
+        "seconds": best, "ns_per_op": best * 1e9 / max(ops, 1), "peak_bytes": peak,
+        "payload_bytes": payload,
+    }
+
+
+def run_suite(cases, sizes, mixes, repeat: int, memory: bool) -> dict:
+    """Run every case at every size and mix. Returns the JSON-ready report."""
+    results = []
+    for name in cases:
+        for n in sizes:
+            for protected, typed in mixes:
+                row = measure(name, n, protected, typed, repeat, memory)
+                results.append(row)
+                peak = f"{row['peak_bytes'] / 1024:10.1f} KiB" if row["peak_bytes"] is not None else ""
+                if row["payload_bytes"] is not None:
+                    peak += f" payload {row['payload_bytes'] / 1024:10.1f} KiB"
+                print(f"{name:<16}{n:>10} p={protected:<4} t={typed:<4} "
+                      f"{row['seconds'] * 1e3:12.3f} ms {row['ns_per_op']:12.1f} ns/op {peak}")
+    return {
+        "meta": {
+            "protdict": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    """Print a per-row comparison of two runs. Returns the number of regressions beyond `threshold`."""
+    with open(old_path) as fp:
+        old = {_row_key(r): r for r in json.load(fp)["results"]}
+    with open(new_path) as fp:
+        new = json.load(fp)["results"]
+    regressions = 0
+    for row in new:
+        base = old.get(_row_key(row))
+        if base is None or not base["seconds"]:
+            continue
+        ratio = row["seconds"] / base["seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        mem = ""
+        if base.get("peak_bytes") and row.get("peak_bytes") is not None:
+            mem = f" mem x{row['peak_bytes'] / base['peak_bytes']:.2f}"
+        print(f"{row['case']:<16}{row['size']:>10} p={row['protected']:<4} t={row['typed']:<4} "
+              f"time x{ratio:6.2f}{mem}{flag}")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def _row_key(row: dict) -> tuple:
+    return row["case"], row["size"], row["protected"], row["typed"]
+
+
+def main(argv=None) -> int:
+    global THREADS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--mixes", nargs="+", default=None, metavar="P:T",
+                        help="protected:typed fractions, e.g. 0:0 0.1:0.1 (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=THREADS, help="threads for the contention cases")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two JSON reports and exit")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown flagged by --compare")
+    args = parser.parse_args(argv)
+    THREADS = args.threads
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+    mixes = DEFAULT_MIXES if args.mixes is None else [tuple(float(x) for x in m.split(":")) for m in args.mixes]
+    report = run_suite(args.cases, args.sizes, mixes, args.repeat, not args.no_memory)
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump(report, fp, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,13 @@
 __version__ = "0.0.3"           # Please keep this updated and synced with stupid .cfg
 
-from .data_class import Data
+from .data_class import Data, ReadOnlyError, PROTECTED, TYPED, KWARG
+from .mapped import MappedData
+from .schema import DataSchema
+from .table import DataRow, DataTable
+from .concurrency import ConcurrentData, RWLock
+from .sharded import ShardedData
+from .shared import SharedData, SharedDataView
+from .versioned import PersistentMap, VersionedData
+from .sqlite import SQLiteData
 
-__all__ = ["Data", "__version__"]
+__all__ = ["Data", "MappedData", "DataSchema", "DataTable", "DataRow", "ConcurrentData", "RWLock", "ShardedData", "SharedData", "SharedDataView", "VersionedData", "PersistentMap", "SQLiteData", "ReadOnlyError", "PROTECTED", "TYPED", "KWARG", "__version__"]
@@ -0,0 +1,448 @@
+"""
+Compact binary snapshot format for Data.
+
+A snapshot is a 32-byte header followed by a table of named sections, each an
+8-byte-aligned `array` or raw blob. Keys, tags and values are stored by column:
+  - keys as one UTF-8 blob plus lengths
+  - per-key value kinds, with ints/floats in packed arrays, str/bytes in blobs,
+    and anything else pickled individually; memoryviews are saved as their bytes
+    and load back as `bytes` (or as a flat memoryview with `zero_copy`)
+  - tag bits and type-lock references for tagged keys only; the locks themselves
+    (classes or `typing` constructs) are pickled once per identity and element mode
+so loading never parses tags per key, and every array uses the narrowest typecode
+that fits. Saving with `index=True` adds offsets, per-key slots and a hashed key
+directory so single keys can be decoded in O(1) straight from a mapped buffer
+(see `protdict.mapped`).
+"""
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, repeat
+
+from .functional_utils.types import ELEMENT_MODES, element_mode
+
+MAGIC = b"PDAT"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQI12x")
+_SECTION = struct.Struct("<8s1s7xQQ")
+_LITTLE = sys.byteorder == "little"
+_NO_LOCK = 0
+
+# value kinds
+K_NONE, K_TRUE, K_FALSE, K_INT, K_FLOAT, K_STR, K_BYTES, K_BYTEARRAY, K_ARRAY, K_OBJ = range(10)
+_INT64 = (-(1 << 63), 1 << 63)
+
+
+def _packed(values, signed: bool = False) -> array:
+    """Return `values` as an array with the narrowest integer typecode that holds them."""
+    if not values:
+        return array("B")
+    lo, hi = min(values), max(values)
+    for tc in ("b", "h", "i", "q") if signed else ("B", "H", "I", "Q"):
+        bits = array(tc).itemsize * 8
+        if (signed and -(1 << (bits - 1)) <= lo and hi < 1 << (bits - 1)) or (not signed and hi < 1 << bits):
+            return array(tc, values)
+    raise ValueError("Integer column out of 64-bit range.")
+
+
+def _buffer_of(val) -> memoryview:
+    """Return a flat byte view of a bytes-like value."""
+    mv = memoryview(val)
+    return mv.cast("B") if mv.c_contiguous else memoryview(mv.tobytes())
+
+
+def _hash(key_bytes) -> int:
+    return zlib.crc32(key_bytes)
+
+
+def dump(data, fp, index: bool = False) -> int:
+    """Write `data` to the binary file object `fp`. `index` adds the random-access sections. Returns bytes written."""
+    values, flags, types, checks = data._values, data._flags, data._types, data._checks
+    key_parts: list = []
+    key_lens: list = []
+    kinds = bytearray()
+    slots: list = []
+    ints: list = []
+    floats = array("d")
+    str_parts: list = []
+    str_lens: list = []
+    byte_parts: list = []
+    byte_lens: list = []
+    array_codes = bytearray()
+    obj_parts: list = []
+    obj_lens: list = []
+    tag_idx: list = []
+    tag_bits = bytearray()
+    tag_lock: list = []
+    locks: list = []
+    lock_modes = bytearray()
+    lock_ids: dict = {}
+
+    for i, (key, val) in enumerate(values.items()):
+        kb = key.encode("utf-8", "surrogatepass")
+        key_parts.append(kb)
+        key_lens.append(len(kb))
+        t = type(val)
+        if val is None:
+            kind, slot = K_NONE, 0
+        elif t is bool:
+            kind, slot = (K_TRUE if val else K_FALSE), 0
+        elif t is int and _INT64[0] <= val < _INT64[1]:
+            kind, slot = K_INT, len(ints)
+            ints.append(val)
+        elif t is float:
+            kind, slot = K_FLOAT, len(floats)
+            floats.append(val)
+        elif t is str:
+            kind, slot = K_STR, len(str_lens)
+            sb = val.encode("utf-8", "surrogatepass")
+            str_parts.append(sb)
+            str_lens.append(len(sb))
+        elif t in (bytes, bytearray, memoryview) or t is array:
+            kind = {bytes: K_BYTES, bytearray: K_BYTEARRAY, memoryview: K_BYTES}.get(t, K_ARRAY)
+            slot = len(byte_lens)
+            mv = _buffer_of(val)
+            array_codes.append(ord(val.typecode) if kind == K_ARRAY else 0)
+            if kind == K_ARRAY:
+                if not _LITTLE:
+                    swapped = array(val.typecode, val)
+                    swapped.byteswap()
+                    mv = memoryview(swapped).cast("B")
+            byte_parts.append(mv)
+            byte_lens.append(mv.nbytes)
+        else:
+            kind, slot = K_OBJ, len(obj_lens)
+            ob = pickle.dumps(val, protocol=pickle.HIGHEST_PROTOCOL)
+            obj_parts.append(ob)
+            obj_lens.append(len(ob))
+        kinds.append(kind)
+        slots.append(slot)
+        bits = flags.get(key)
+        if bits:
+            lock = _NO_LOCK
+            if key in types:
+                type_lock, mode = types[key], ELEMENT_MODES.index(element_mode(checks[key]))
+                lock = lock_ids.get((id(type_lock), mode))
+                if lock is None:
+                    lock = lock_ids[(id(type_lock), mode)] = len(locks) + 1
+                    locks.append(type_lock)
+                    lock_modes.append(mode)
+            tag_idx.append(i)
+            tag_bits.append(bits)
+            tag_lock.append(lock)
+
+    sections: list = [
+        (b"keylen", _packed(key_lens)),
+        (b"keys", key_parts),
+        (b"kind", array("B", kinds)),
+        (b"tagidx", _packed(tag_idx)),
+        (b"tagbits", array("B", tag_bits)),
+        (b"taglock", _packed(tag_lock)),
+        (b"locks", [pickle.dumps(locks, protocol=pickle.HIGHEST_PROTOCOL)]),
+        (b"lockmode", array("B", lock_modes)),
+        (b"ints", _packed(ints, signed=True)),
+        (b"floats", floats),
+        (b"strlen", _packed(str_lens)),
+        (b"strs", str_parts),
+        (b"bytelen", _packed(byte_lens)),
+        (b"bytes", byte_parts),
+        (b"arrcode", array("B", array_codes)),
+        (b"objlen", _packed(obj_lens)),
+        (b"objs", obj_parts),
+    ]
+    if index:
+        n = len(key_lens)
+        per_key_bits = bytearray(n)
+        per_key_lock = [0] * n
+        for i, bits, lock in zip(tag_idx, tag_bits, tag_lock):
+            per_key_bits[i] = bits
+            per_key_lock[i] = lock
+        size = 8
+        while size < 2 * n:
+            size <<= 1
+        directory = [0] * size
+        for i, kb in enumerate(key_parts):
+            h = _hash(kb) & (size - 1)
+            while directory[h]:
+                h = (h + 1) & (size - 1)
+            directory[h] = i + 1
+        sections += [
+            (b"keyoff", _packed(list(accumulate(key_lens, initial=0)))),
+            (b"slot", _packed(slots)),
+            (b"flags", array("B", per_key_bits)),
+            (b"lockof", _packed(per_key_lock)),
+            (b"stroff", _packed(list(accumulate(str_lens, initial=0)))),
+            (b"byteoff", _packed(list(accumulate(byte_lens, initial=0)))),
+            (b"objoff", _packed(list(accumulate(obj_lens, initial=0)))),
+            (b"dir", _packed(directory)),
+        ]
+    return _write(fp, len(key_lens), sections)
+
+
+def _write(fp, count: int, sections: list) -> int:
+    """Lay out `sections` after the header and section table and write them. Returns bytes written."""
+    table = []
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    for name, payload in sections:
+        offset = (offset + 7) & ~7
+        if isinstance(payload, array):
+            code = payload.typecode.encode()
+            nbytes = len(payload) * payload.itemsize
+        else:
+            code = b"\0"
+            nbytes = sum(memoryview(p).nbytes for p in payload)
+        table.append((name, code, offset, nbytes))
+        offset += nbytes
+    fp.write(_HEADER.pack(MAGIC, VERSION, 0, count, len(sections)))
+    for entry in table:
+        fp.write(_SECTION.pack(*entry))
+    written = _HEADER.size + _SECTION.size * len(sections)
+    for (name, payload), (_, _, start, nbytes) in zip(sections, table):
+        if start > written:
+            fp.write(b"\0" * (start - written))
+            written = start
+        if isinstance(payload, array):
+            if not _LITTLE and payload.itemsize > 1:
+                payload = array(payload.typecode, payload)
+                payload.byteswap()
+            fp.write(payload.tobytes())
+        else:
+            for part in payload:
+                fp.write(part)
+        written += nbytes
+    return written
+
+
+def dumps(data, index: bool = False) -> bytes:
+    """Return the binary snapshot of `data` as bytes."""
+    import io
+    buf = io.BytesIO()
+    dump(data, buf, index)
+    return buf.getvalue()
+
+
+class SnapshotReader:
+    """Random and bulk access to a binary snapshot held in any buffer (bytes, mmap, shared memory)."""
+
+    __slots__ = ("buffer", "count", "sections", "_arrays", "_locks")
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer).cast("B") if not isinstance(buffer, memoryview) else buffer.cast("B")
+        if self.buffer.nbytes < _HEADER.size:
+            raise ValueError("Not a protdict binary snapshot (too short).")
+        magic, version, _, count, n_sections = _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a protdict binary snapshot (bad magic).")
+        if version != VERSION:
+            raise ValueError(f"Unsupported protdict snapshot version: {version}.")
+        self.count = count
+        self.sections = {}
+        for i in range(n_sections):
+            name, code, offset, nbytes = _SECTION.unpack_from(self.buffer, _HEADER.size + i * _SECTION.size)
+            self.sections[name.rstrip(b"\0").decode()] = (code.decode(), offset, nbytes)
+        self._arrays = {}
+        self._locks = None
+
+    @property
+    def has_index(self) -> bool:
+        """True if the snapshot was saved with `index=True`."""
+        return "dir" in self.sections
+
+    def raw(self, name: str) -> memoryview:
+        """Return section `name` as a byte view without copying."""
+        _, offset, nbytes = self.sections[name]
+        return self.buffer[offset:offset + nbytes]
+
+    def array(self, name: str):
+        """Return section `name` as an indexable view of its typed items (cached, zero-copy on little-endian)."""
+        view = self._arrays.get(name)
+        if view is None:
+            code, offset, nbytes = self.sections[name]
+            mv = self.buffer[offset:offset + nbytes]
+            if _LITTLE or array(code).itemsize == 1:
+                view = mv.cast(code)
+            else:
+                view = array(code, mv.tobytes())
+                view.byteswap()
+            self._arrays[name] = view
+        return view
+
+    def locks(self) -> list:
+        """Return the list of type locks (index 0 of `taglock`/`lockof` means no lock)."""
+        if self._locks is None:
+            self._locks = [None] + pickle.loads(self.raw("locks"))
+        return self._locks
+
+    def mode(self, j: int) -> str:
+        """Return the element mode of lock `j` (`sample` for no lock, or for snapshots saved without modes)."""
+        if not j or "lockmode" not in self.sections:
+            return "sample"
+        return ELEMENT_MODES[self.array("lockmode")[j - 1]]
+
+    def close(self):
+        """Release every view on the underlying buffer. No return."""
+        for view in self._arrays.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self._arrays.clear()
+        self.buffer.release()
+
+    # bulk decoding
+
+    def keys(self) -> list:
+        """Decode every key, in stored order."""
+        blob = bytes(self.raw("keys"))
+        offsets = list(accumulate(self.array("keylen"), initial=0))
+        text = blob.decode("utf-8", "surrogatepass")
+        if len(text) == len(blob):
+            return [text[a:b] for a, b in zip(offsets, offsets[1:])]
+        return [blob[a:b].decode("utf-8", "surrogatepass") for a, b in zip(offsets, offsets[1:])]
+
+    def values(self, zero_copy: bool = False) -> list:
+        """Decode every value, in stored order. With `zero_copy`, bytes/bytearray/array values are memoryviews into the buffer."""
+        str_blob = bytes(self.raw("strs"))
+        str_offsets = list(accumulate(self.array("strlen"), initial=0))
+        str_text = str_blob.decode("utf-8", "surrogatepass")
+        if len(str_text) == len(str_blob):
+            strs = (str_text[a:b] for a, b in zip(str_offsets, str_offsets[1:]))
+        else:
+            strs = (str_blob[a:b].decode("utf-8", "surrogatepass") for a, b in zip(str_offsets, str_offsets[1:]))
+        kinds = bytes(self.raw("kind"))
+        iters = [
+            repeat(None), repeat(True), repeat(False),
+            iter(self.array("ints").tolist()),
+            iter(self.array("floats").tolist()),
+            strs,
+            self._buffers(kinds, zero_copy),
+            None,
+            None,
+            self._objects(),
+        ]
+        iters[K_BYTEARRAY] = iters[K_ARRAY] = iters[K_BYTES]
+        nexts = [it.__next__ for it in iters]
+        return [nexts[k]() for k in kinds]
+
+    def _buffers(self, kinds: bytes, zero_copy: bool):
+        blob = self.raw("bytes")
+        codes = iter(bytes(self.raw("arrcode")))
+        offsets = accumulate(self.array("bytelen"), initial=0)
+        start = next(offsets)
+        for kind in kinds:
+            if kind not in (K_BYTES, K_BYTEARRAY, K_ARRAY):
+                continue
+            end = next(offsets)
+            yield _decode_buffer(kind, blob[start:end], next(codes), zero_copy)
+            start = end
+
+    def _objects(self):
+        blob = self.raw("objs")
+        offsets = accumulate(self.array("objlen"), initial=0)
+        start = next(offsets)
+        for end in offsets:
+            yield pickle.loads(blob[start:end])
+            start = end
+
+    def tags(self):
+        """Yield (index, tag bits, lock or None, element mode) for every tagged key."""
+        locks, refs = self.locks(), self.array("taglock")
+        return zip(
+            self.array("tagidx"), self.array("tagbits"), (locks[j] for j in refs), (self.mode(j) for j in refs)
+        )
+
+    # random access (requires index=True)
+
+    def find(self, key: str) -> int:
+        """Return the position of `key`, or -1 if absent. O(1) expected."""
+        if not isinstance(key, str):
+            return -1
+        directory, offsets = self.array("dir"), self.array("keyoff")
+        blob = self.raw("keys")
+        kb = key.encode("utf-8", "surrogatepass")
+        mask = len(directory) - 1
+        h = _hash(kb) & mask
+        while True:
+            j = directory[h]
+            if not j:
+                return -1
+            if blob[offsets[j - 1]:offsets[j]] == kb:
+                return j - 1
+            h = (h + 1) & mask
+
+    def key(self, i: int) -> str:
+        """Decode the key at position `i`."""
+        offsets = self.array("keyoff")
+        return bytes(self.raw("keys")[offsets[i]:offsets[i + 1]]).decode("utf-8", "surrogatepass")
+
+    def value(self, i: int, zero_copy: bool = False):
+        """Decode only the value at position `i`."""
+        kind = self.array("kind")[i]
+        slot = self.array("slot")[i]
+        if kind == K_NONE:
+            return None
+        if kind in (K_TRUE, K_FALSE):
+            return kind == K_TRUE
+        if kind == K_INT:
+            return self.array("ints")[slot]
+        if kind == K_FLOAT:
+            return self.array("floats")[slot]
+        if kind == K_STR:
+            offsets = self.array("stroff")
+            return bytes(self.raw("strs")[offsets[slot]:offsets[slot + 1]]).decode("utf-8", "surrogatepass")
+        if kind == K_OBJ:
+            offsets = self.array("objoff")
+            return pickle.loads(self.raw("objs")[offsets[slot]:offsets[slot + 1]])
+        offsets = self.array("byteoff")
+        blob = self.raw("bytes")[offsets[slot]:offsets[slot + 1]]
+        return _decode_buffer(kind, blob, self.raw("arrcode")[slot], zero_copy)
+
+    def flags(self, i: int) -> int:
+        """Return the tag bits of the key at position `i`."""
+        return self.array("flags")[i]
+
+    def lock(self, i: int):
+        """Return the type lock of the key at position `i`, or None."""
+        return self.locks()[self.array("lockof")[i]]
+
+    def lock_mode(self, i: int) -> str:
+        """Return the element mode of the type lock of the key at position `i`."""
+        return self.mode(self.array("lockof")[i])
+
+
+def _decode_buffer(kind: int, blob: memoryview, typecode: int, zero_copy: bool):
+    """Rebuild a bytes-like value from its raw bytes."""
+    if kind == K_BYTES:
+        return blob if zero_copy else bytes(blob)
+    if kind == K_BYTEARRAY:
+        return blob if zero_copy else bytearray(blob)
+    code = chr(typecode)
+    if zero_copy and _LITTLE and code not in ("u", "w"):
+        return blob.cast(code)
+    arr = array(code)
+    arr.frombytes(blob)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr
+
+
+def load(source, cls=None, zero_copy: bool = False):
+    """
+    Build a Data from a binary snapshot. `source` is a path or a bytes-like buffer.
+    With `zero_copy`, bytes/bytearray/array values are memoryviews into the loaded buffer.
+    """
+    if cls is None:
+        from .data_class import Data as cls
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = source
+    else:
+        with open(source, "rb") as fp:
+            buffer = fp.read()
+    return build(SnapshotReader(buffer), cls, zero_copy)
+
+
+def build(reader: SnapshotReader, cls, zero_copy: bool = False):
+    """Decode every key, value and tag held by `reader` into a new `cls` instance."""
+    keys = reader.keys()
+    values = dict(zip(keys, reader.values(zero_copy)))
+    return cls._from_tables(values, ((keys[i], bits, lock, mode) for i, bits, lock, mode in reader.tags()))
@@ -0,0 +1,232 @@
+"""
+Opt-in thread safety for Data.
+
+`ConcurrentData` is a Data whose public methods run under a reader/writer lock: reads
+(`get`, `hasprop`, `tags`, `export`...) share the lock and run side by side, writes
+(`set`, `protect`, `merge_dict`...) take it exclusively. Compound operations (`swap`,
+`grab`, `compare_and_set`, `merge_dict(atomic=True)`) hold the write lock for their whole
+run, so no other thread sees them half done.
+"""
+import contextlib
+import functools
+from threading import Condition, Lock, get_ident
+
+from .data_class import Data
+
+
+class RWLock:
+    """
+    Reentrant reader/writer lock preferring writers. Any number of threads may read at once;
+    a writer waits for the readers to leave and blocks new ones. A thread holding the write lock
+    may take it again or read; a reader asking to write raises RuntimeError instead of deadlocking.
+    Use `with lock.read:` / `with lock.write:`.
+    """
+
+    __slots__ = ("_cond", "_readers", "_writer", "_depth", "_waiting", "read", "write")
+
+    def __init__(self):
+        self._cond = Condition(Lock())
+        # thread id -> read depth
+        self._readers = {}
+        self._writer = None
+        self._depth = 0
+        self._waiting = 0
+        self.read = _ReadGuard(self)
+        self.write = _WriteGuard(self)
+
+    def acquire_read(self):
+        """Take the lock for reading. No return."""
+        me = get_ident()
+        # reentrant fast paths: only this thread touches its own entry / the depth it owns
+        if self._writer == me:
+            self._depth += 1
+            return
+        depth = self._readers.get(me)
+        if depth:
+            self._readers[me] = depth + 1
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        """Release one read acquisition. No return."""
+        me = get_ident()
+        if self._writer == me:
+            self._depth -= 1
+            return
+        depth = self._readers[me] - 1
+        if depth:
+            self._readers[me] = depth
+            return
+        with self._cond:
+            del self._readers[me]
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        """Take the lock for writing. Raises RuntimeError if this thread is only reading. No return."""
+        me = get_ident()
+        if self._writer == me:
+            self._depth += 1
+            return
+        with self._cond:
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock.")
+            self._waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            self._writer = me
+            self._depth = 1
+
+    def release_write(self):
+        """Release one write acquisition. No return."""
+        if self._writer != get_ident():
+            raise RuntimeError("Cannot release a write lock not held by this thread.")
+        if self._depth > 1:
+            self._depth -= 1
+            return
+        with self._cond:
+            self._depth = 0
+            self._writer = None
+            self._cond.notify_all()
+
+
+class _ReadGuard:
+    """`with lock.read:` support."""
+
+    __slots__ = ("_lock",)
+
+    def __init__(self, lock: RWLock):
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire_read()
+
+    def __exit__(self, *exc):
+        self._lock.release_read()
+
+
+class _WriteGuard:
+    """`with lock.write:` support."""
+
+    __slots__ = ("_lock",)
+
+    def __init__(self, lock: RWLock):
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire_write()
+
+    def __exit__(self, *exc):
+        self._lock.release_write()
+
+
+_READS = (
+    "hasprop", "get", "tags", "tags_by_key", "keys_by_tag", "keys_with", "bundle_keys", "protected_keys",
+    "typed_keys", "kwarg_keys", "unprotected_keys", "as_dict", "export", "export_to", "save_binary",
+    "violation_counts", "journal_version", "export_delta", "__getitem__", "__contains__", "__eq__", "__repr__",
+    "__str__",
+)
+_WRITES = (
+    "set", "oset", "sets", "osets", "set_many", "erase", "oerase", "protect", "unprotect", "ounprotect",
+    "add_typing", "remove_typing", "set_all_typings", "rem_all_typings", "merge_dict", "swap",
+    "grab", "ograb", "compare_and_set", "clear", "update", "__setitem__", "__delitem__", "set_violation_sink",
+    "clone", "snapshot", "enable_journal", "disable_journal", "apply_delta", "fingerprint", "patch",
+)
+
+
+def _reading(method):
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._rwlock.read:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _writing(method):
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._rwlock.write:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+class ConcurrentData(Data):
+    """
+    Data safe to share between threads. Reads run in parallel, writes one at a time, and
+    every public method is atomic. `clone()`/`snapshot()` return plain Data.
+    Views from `keys()`/`values()`/`items()` and `iter_export()` are not locked while iterated;
+    hold `reading()` around the loop, or iterate `as_dict()`/`export()` instead.
+    """
+
+    __slots__ = ("_rwlock",)
+    _banned_attr = Data._banned_attr | {"_rwlock"}
+
+    def __init__(self, data_dictionary: dict, initial_typing: bool = False, **kwargs):
+        """Same arguments as `Data`."""
+        self._rwlock = RWLock()
+        super().__init__(data_dictionary, initial_typing, **kwargs)
+
+    def reading(self):
+        """Return a context manager holding the read lock, for consistent multi-step reads."""
+        return self._rwlock.read
+
+    def writing(self):
+        """Return a context manager holding the write lock, for compound updates of your own."""
+        return self._rwlock.write
+
+    @contextlib.contextmanager
+    def _locking_pair(self, other):
+        """Hold the write locks of this object and `other` (if it is a ConcurrentData), taken in `id()` order
+        so that two threads locking the same pair from opposite ends cannot deadlock."""
+        if not isinstance(other, ConcurrentData) or other is self:
+            with self._rwlock.write:
+                yield
+            return
+        first, second = (self, other) if id(self) < id(other) else (other, self)
+        with first._rwlock.write, second._rwlock.write:
+            yield
+
+    def diff(self, other: Data) -> dict:
+        """Same as `Data.diff`, holding both objects' locks (fingerprinting updates both)."""
+        with self._locking_pair(other):
+            return Data.diff(self, other)
+
+    def absorb(self, other: Data, include_protected: bool = False, overwrite: bool = False) -> bool:
+        """Same as `Data.absorb`, holding both objects' locks."""
+        with self._locking_pair(other):
+            return Data.absorb(self, other, include_protected, overwrite)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Same as `Data.transaction`, holding the write lock for the whole block."""
+        with self._rwlock.write, Data.transaction(self) as tx:
+            yield tx
+
+    def __setattr__(self, name, value):
+        """Route attribute writes to the value store under the write lock."""
+        if name in self._banned_attr:
+            object.__setattr__(self, name, value)
+        else:
+            with self._rwlock.write:
+                self._put(name, value)
+
+    def __delattr__(self, name):
+        """Route attribute deletes to the value store under the write lock."""
+        if name in self._banned_attr:
+            object.__delattr__(self, name)
+        else:
+            with self._rwlock.write:
+                Data.__delattr__(self, name)
+
+
+for _name in _READS:
+    setattr(ConcurrentData, _name, _reading(getattr(Data, _name)))
+for _name in _WRITES:
+    setattr(ConcurrentData, _name, _writing(getattr(Data, _name)))
+del _name
@@ -1,67 +1,351 @@
-from .functional_utils.lists import in_lower_list, mergel, clean_values
-from .functional_utils.types import multi_isinstance
+import json
+import sys
+import weakref
+from array import array
+from pickle import PickleBuffer
+
+from . import violations
+from .functional_utils.jsonstream import iter_json_object, iter_ndjson
+from .functional_utils.types import compile_type_lock, element_mode
+from .fingerprint import Fingerprints
+from .journal import Journal
+from .transaction import Transaction
+from .views import DataItemsView, DataKeysView, DataValuesView
 from typing import Optional
 
+
+# per-key tag bits, combinable into masks for `Data.keys_with`
+PROTECTED = 1
+TYPED = 2
+KWARG = 4
+_TAG_BITS = {"protected": PROTECTED, "typed": TYPED, "kwarg": KWARG}
+
+
+def _fold(name: str) -> str:
+    """Return the case-folded form of `name` used by the protection index."""
+    return name if name.islower() else name.lower()
+
+# tables that clone() and snapshot() share until one side writes
+_TABLES = frozenset(("_values", "_og_protects", "_types", "_checks", "_protected_attr", "_flags"))
+
+
+class ReadOnlyError(ValueError):
+    """Raised when a read-only Data (e.g. from `Data.snapshot`) is asked to change."""
+
+
+def _tag_names(bits: int) -> list[str]:
+    """Return the tag names set in `bits`, in `protected`, `typed`, `kwarg` order."""
+    return [tag for tag, bit in _TAG_BITS.items() if bits & bit]
+
+
+def _tag_mask(spec) -> int:
+    """Return an int tag mask from an int, a tag name, or an iterable of tag names."""
+    if isinstance(spec, int):
+        return spec
+    if isinstance(spec, str):
+        spec = (spec,)
+    try:
+        return sum({_TAG_BITS[tag] for tag in spec})
+    except (KeyError, TypeError):
+        raise ValueError(f"Invalid tag mask: {spec!r}") from None
+
+# `retain_input` policies for the constructor's data_dictionary
+RETAIN_POLICIES = ("drop", "keep", "weakref", "frozen")
+
+
+def _freeze_input(data_dictionary) -> tuple:
+    """Return a compact copy of `data_dictionary`: (keys, values, {key: tags} or None), without the wrapper dicts."""
+    keys = tuple(data_dictionary)
+    values = []
+    tagged = None
+    for key, raw in data_dictionary.items():
+        if isinstance(raw, dict) and "value" in raw:
+            tags = raw.get("tags")
+            if tagged is None:
+                tagged = {}
+            tagged[key] = tuple(tags) if isinstance(tags, list) else ()
+            raw = raw["value"]
+        values.append(raw)
+    return keys, tuple(values), tagged
+
+
+def _recall_input(og) -> Optional[dict]:
+    """Return the input retained as `og` by `Data._retain`, or None."""
+    if type(og) is tuple:
+        keys, values, tagged = og
+        if not tagged:
+            return dict(zip(keys, values))
+        return {
+            key: {"value": val, "tags": list(tagged[key])} if key in tagged else val for key, val in zip(keys, values)
+        }
+    if type(og) is weakref.ref:
+        return og()
+    return og
+
+
+# bytes-like values at least this large travel as pickle protocol 5 buffers
+_PICKLE_BUFFER_MIN = 1 << 12
+
+
+def _wants_buffer(val, protocol: int) -> bool:
+    """Return True if `val` should be pickled through `_Buffered` (memoryviews always, since they cannot pickle themselves)."""
+    kind = type(val)
+    if kind is memoryview:
+        return True
+    if protocol < 5:
+        return False
+    if kind is bytes or kind is bytearray:
+        return len(val) >= _PICKLE_BUFFER_MIN
+    return kind is array and len(val) * val.itemsize >= _PICKLE_BUFFER_MIN
+
+
+class _Buffered:
+    """Pickle-time stand-in for a bytes-like value; unpickles as a value of the original type."""
+
+    __slots__ = ("val",)
+
+    def __init__(self, val):
+        self.val = val
+
+    def __reduce_ex__(self, protocol):
+        val = self.val
+        if type(val) is memoryview:
+            if protocol < 5 or not val.contiguous:
+                return _from_buffer, (memoryview, val.tobytes(), val.format, val.shape)
+            return _from_buffer, (memoryview, PickleBuffer(val), val.format, val.shape)
+        if type(val) is array:
+            return _from_buffer, (array, PickleBuffer(val), val.typecode, sys.byteorder)
+        return _from_buffer, (type(val), PickleBuffer(val), None, None)
+
+
+def _from_buffer(kind, buf, code, extra):
+    """Rebuild a value sent by `_Buffered`. `buf` is bytes/bytearray in band, or whatever buffer the loader supplied."""
+    if kind is memoryview:
+        view = memoryview(buf).cast("B")
+        return view.cast(code, extra) if code != "B" or len(extra) != 1 else view
+    if kind is array:
+        arr = array(code)
+        arr.frombytes(memoryview(buf).cast("B"))
+        if extra != sys.byteorder:
+            arr.byteswap()
+        return arr
+    # reuse the loaded object when it already has the right type (in band, or a buffer handed to loads)
+    return buf if type(buf) is kind else kind(buf)
+
+
+def _differ(a, b) -> bool:
+    """Return True unless `a` and `b` are equal; values whose `==` fails or is not a bool count as different."""
+    if a is b:
+        return False
+    try:
+        return not bool(a == b)
+    except Exception:
+        return True
+
+
+def _unpickle(cls, values: dict, tags: list, readonly: bool):
+    """Rebuild a pickled Data from its live values and `(key, tag bits, lock, element mode)` entries."""
+    data = cls._from_tables(values, tags)
+    if readonly:
+        data._shared = _TABLES
+        data._readonly = True
+    return data
+
+
 class Data:
     """Flexible key-value store with protection and type locking."""
 
-    def __init__(self, data_dictionary: dict, initial_typing:bool=False, **kwargs):
+    # bookkeeping lives in slots; user values live in `_values` and are reached
+    # through __getattr__/__setattr__, so the two can never collide.
+    __slots__ = (
+        "_values", "_og_list", "_og_protects", "_types", "_checks", "_protected_attr", "_hidden", "_flags",
+        "_shared", "_readonly", "_sink", "_hooks", "__weakref__",
+    )
+    _banned_attr = frozenset((
+        "_values", "_og_list", "_og_protects", "_banned_attr", "_protected_attr", "_types", "_checks", "_hidden", "_flags",
+        "_shared", "_readonly", "_sink", "_hooks",
+    ))
+
+    def __init__(self, data_dictionary: dict, initial_typing:bool=False, retain_input: str = "drop", **kwargs):
         """
         Initialize with:
           - `data_dictionary`: can be { key: val } or { key: {"value": val, "tags": [...]} }
           - `initial_typing`: whether to auto-lock types of kwargs
+          - `retain_input`: what `original_input()` can give back later (see `RETAIN_POLICIES`):
+            `drop` keeps nothing, `keep` holds the dict itself, `weakref` holds a weak reference
+            (a frozen copy if the dict cannot be weakly referenced, as plain dicts cannot),
+            `frozen` holds a compact copy (key and value tuples, without the {"value", "tags"} wrapper dicts)
           - `**kwargs`: treated as protected (and, if initial_typing, type‑locked)
         """
         # 1) store originals
-        self._og_list = data_dictionary
-        self._og_protects = dict(kwargs)
+        self._values = {}
+        self._og_list = self._retain(data_dictionary, retain_input)
+        self._og_protects = {}
         self._types = {}
-        self._banned_attr = [
-            "_og_list", "_og_protects", "_banned_attr", "_protected_attr", "_types"
-        ]
-        self._protected_attr = list(kwargs.keys())
+        # compiled validator per type lock, built once when the lock is added
+        self._checks = {}
+        # tag bitmask per name; the tables above double as the per-tag key sets
+        self._flags = {}
+        # names of tables still shared with a clone/snapshot (copied on first write)
+        self._shared = frozenset()
+        self._readonly = False
+        # violation sink for this instance; None means the process-wide default
+        self._sink = None
+        # change hooks (e.g. a journal), each called with an op tuple before a write is applied
+        self._hooks = ()
+        # protection index: folded name -> first spelling that was protected
+        self._protected_attr = {}
+        # number of stored keys currently hidden by protection
+        self._hidden = 0
+        self._fill(data_dictionary, initial_typing, kwargs)
+
+    def _fill(self, data_dictionary: dict, initial_typing: bool, kwargs: dict):
+        """Internal function loading the constructor's kwargs and `data_dictionary` into the tables. No return."""
+        for k, v in kwargs.items():
+            self._mark_kwarg(k, v)
+            self._add_protection(k)
 
         # 2) set protected kwargs as attributes
         for k, v in kwargs.items():
             if k not in self._banned_attr:
-                setattr(self, k, v)
+                self._put(k, v)
 
         # 3) process each entry in data_dictionary
         for key, raw in data_dictionary.items():
-            if key in mergel(self._banned_attr, self._protected_attr):
-                continue
-
-            # if the value is a dict with a "value" and optional "tags"
-            if isinstance(raw, dict) and "value" in raw:
-                val = raw["value"]
-                tags = raw.get("tags")
-            else:
-                val = raw
-                tags = None
-
-            # 3a) assign the actual value
-            setattr(self, key, val)
-
-            # 3b) if tags provided, apply them
-            if isinstance(tags, list):
-                for tag in tags:
-                    if tag == "protected":
-                        # mark this key protected
-                        if key not in self._protected_attr:
-                            self._protected_attr.append(key)
-                    elif tag == "typed":
-                        # lock its current type
-                        self._types[key] = type(val)
-                    elif tag == "kwarg":
-                        # treat as if passed in via kwargs
-                        self._og_protects[key] = raw
-                        if key not in self._protected_attr:
-                            self._protected_attr.append(key)
+            self._ingest(key, raw)
 
         # 4) optionally lock types of the original kwargs
         if initial_typing:
-            for k, v in self._og_protects.items():
-                self.add_typing(k, type(v))
+            self._lock_kwargs()
+
+    @staticmethod
+    def _retain(data_dictionary, policy: str):
+        """Internal function returning what `_og_list` holds under retention `policy`. Raises ValueError on unknown policies."""
+        if policy == "drop":
+            return None
+        if policy == "keep":
+            return data_dictionary
+        if policy == "weakref":
+            try:
+                return weakref.ref(data_dictionary)
+            except TypeError:
+                return _freeze_input(data_dictionary)
+        if policy == "frozen":
+            return _freeze_input(data_dictionary)
+        raise ValueError(f"Invalid retain_input policy: {policy!r}")
+
+    def original_input(self) -> Optional[dict]:
+        """
+        Return the `data_dictionary` this object was built from, as far as `retain_input` kept it:
+        the dict itself (`keep`, or `weakref` while it is alive), a rebuilt dict (`frozen`), else None.
+        """
+        return _recall_input(self._og_list)
+
+    def _ingest(self, key: str, raw):
+        """Internal function to load one data_dictionary entry (plain or {"value", "tags"} form). No return.
+        Only the exact spelling of a banned or already protected key is skipped, so case variants still load."""
+        if key in self._banned_attr or self._is_protected(key):
+            return
+
+        # if the value is a dict with a "value" and optional "tags"
+        if isinstance(raw, dict) and "value" in raw:
+            val = raw["value"]
+            tags = raw.get("tags")
+        else:
+            val = raw
+            tags = None
+
+        # assign the actual value
+        self._put(key, val)
+
+        # if tags provided, apply them
+        if isinstance(tags, list):
+            for tag in tags:
+                if tag == "protected":
+                    # mark this key protected
+                    self._add_protection(key)
+                elif tag == "typed":
+                    # lock its current type
+                    self._lock(key, type(val))
+                elif tag == "kwarg":
+                    # treat as if passed in via kwargs
+                    self._mark_kwarg(key, raw)
+                    self._add_protection(key)
+
+    def _lock_kwargs(self):
+        """Internal function to lock the types of the original kwargs. No return."""
+        for k, v in list(self._og_protects.items()):
+            self.add_typing(k, type(v))
+
+    @classmethod
+    def from_iter(cls, iterable, initial_typing: bool = False, **kwargs) -> "Data":
+        """
+        Build a Data from an iterable of `(key, raw)` pairs, where `raw` is a plain value or the
+        {"value": ..., "tags": [...]} form, exactly as `__init__` treats `data_dictionary` items.
+        Pairs are consumed one at a time, so the source never has to be materialized. O(n).
+        """
+        data = cls({}, **kwargs)
+        data._og_list = None
+        for key, raw in iterable:
+            data._ingest(key, raw)
+        if initial_typing:
+            data._lock_kwargs()
+        return data
+
+    @classmethod
+    def _from_tables(cls, values: dict, tags) -> "Data":
+        """
+        Internal constructor from a ready value dict and `(key, tag bits, lock or None[, element mode])`
+        entries (see `_tag_entries`). O(n + tagged).
+        """
+        data = cls({})
+        data._og_list = None
+        data._values = values
+        for key, bits, lock, *mode in tags:
+            if bits & KWARG:
+                data._mark_kwarg(key, values.get(key))
+            if bits & PROTECTED:
+                data._add_protection(key)
+            if bits & TYPED:
+                data._lock(key, lock if lock is not None else type(values.get(key)), None, mode[0] if mode else "sample")
+        return data
+
+    def _tag_entries(self, keep=None) -> list[tuple]:
+        """Internal function returning `(key, tag bits, lock or None, element mode)` for every tagged key (in `keep`, if given)."""
+        types, checks = self._types, self._checks
+        return [
+            (key, bits, types.get(key), element_mode(checks[key]) if bits & TYPED else "sample")
+            for key, bits in self._flags.items() if keep is None or key in keep
+        ]
+
+    def save_binary(self, path, index: bool = False) -> int:
+        """Write this Data to `path` in the compact binary snapshot format (see `protdict.binary`).
+        `index` adds the hashed key directory needed by `MappedData`. Returns int bytes written."""
+        from . import binary
+        with open(path, "wb") as fp:
+            return binary.dump(self, fp, index)
+
+    @classmethod
+    def load_binary(cls, path, zero_copy: bool = False) -> "Data":
+        """Load a Data saved with `save_binary`. `zero_copy` returns bytes/bytearray/array values as memoryviews."""
+        from . import binary
+        return binary.load(path, cls, zero_copy)
+
+    @classmethod
+    def load(cls, fp, format: str = "json", initial_typing: bool = False, chunk_size: int = 1 << 16, **kwargs) -> "Data":
+        """
+        Stream a Data from the file object `fp` written by `export_to` (or any tagged JSON dict).
+          - `json`: a single object, parsed incrementally `chunk_size` characters at a time
+          - `ndjson`: one object per line
+        Returns the new Data.
+        """
+        if format == "json":
+            pairs = iter_json_object(fp, chunk_size)
+        elif format == "ndjson":
+            pairs = iter_ndjson(fp)
+        else:
+            raise ValueError(format)
+        return cls.from_iter(pairs, initial_typing, **kwargs)
 
     def hasprop(self, name: str, include_protected: bool = True) -> bool:
         """
@@ -70,20 +354,24 @@ class Data:
         """
         if name in self._banned_attr:
             return False
-        if not include_protected and name in self._protected_attr:
+        if not include_protected and self._is_protected(name):
             return False
-        return hasattr(self, name)
-
-
-    def add_typing(self, property: str, type_lock: type = None) -> bool:
-        """Set a type lock on `property`. `type_lock` (type) if None inferred. Returns True if applied, False otherwise."""
-        if not multi_isinstance([property, type_lock], [str, (None, type)]):
-            raise ValueError
-        if property in self.__dict__.keys() and property not in self._banned_attr:
-            type_lock = type_lock if type_lock else type(getattr(self, property))
-            self._types[property] = type_lock
-            if type(getattr(self, property)) != self._types[property]:
-                setattr(self, property, None)
+        return name in self._values
+
+    def add_typing(self, property: str, type_lock: type = None, elements: str = "sample") -> bool:
+        """Set a type lock on `property`. `type_lock` (type or `typing` construct such as `Optional[int]`, `list[str]`)
+        if None inferred. `elements` (`sample`, `full`, `none`) sets how container elements are checked.
+        A current value that fails the lock is reset to None. Returns True if applied, False otherwise."""
+        if not isinstance(property, str):
+            raise ValueError(property)
+        check = compile_type_lock(type_lock, elements) if type_lock is not None else None
+        if property in self._values:
+            if type_lock is None:
+                type_lock = type(self._values[property])
+                check = compile_type_lock(type_lock, elements)
+            self._lock(property, type_lock, check)
+            if not check(self._values[property]):
+                self._put(property, None)
             return True
         return False
     
@@ -91,8 +379,8 @@ class Data:
         """Remove type lock for `property`. Returns True if removed, False otherwise."""
         if not isinstance(property, str):
             raise ValueError(property)
-        if property in self._types.keys():
-            del self._types[property]
+        if property in self._types:
+            self._unlock(property)
             return True
         return False
     
@@ -101,7 +389,7 @@ class Data:
         if not isinstance(protected_only, bool):
             raise ValueError(protected_only)
         count = 0
-        prop_types = [(k, type(v)) for k, v in self.__dict__.items() if k not in self._banned_attr]
+        prop_types = [(k, type(v)) for k, v in self._values.items()]
         for i in prop_types:
             if protected_only and self._procheck(i[0]):
                 continue
@@ -117,22 +405,20 @@ class Data:
         for key in list(self._types.keys()):
             if keep_protected and self._procheck(key):
                 continue
-            del self._types[key]
+            self._unlock(key)
             count += 1
         return count
 
     def _gather_types(self):
         """Collect current types. No return."""
-        for key, val in self.__dict__.items():
-            if key in self._banned_attr:
-                continue
-            self._types[key] = type(val)
+        for key, val in self._values.items():
+            self._lock(key, type(val))
 
     def oset(self, attr: str, newval) -> bool:
         """Overwrite `attr` with `newval`. Returns True if existed, False otherwise."""
-        if hasattr(self, attr):
+        if attr in self._values:
             if self._check_for_type(attr,newval):
-                setattr(self, attr, newval)
+                self._put(attr, newval)
                 return True
             self._typederr(attr,newval)
         return False
@@ -147,17 +433,17 @@ class Data:
 
     def erase(self,attr:str) -> bool:
         """Deletes `attr`. Returns True if exists, False otherwise."""
-        if hasattr(self,attr) and not self._procheck(attr):
+        if attr in self._values and not self._procheck(attr):
             self._del_attr(attr,False)
-            delattr(self,attr)
+            self._pop(attr)
             return True
         return False
 
     def oerase(self, attr: str) -> bool:
         """Delete any `attr` including protected ones. Returns True if existed, False otherwise."""
-        if hasattr(self, attr):
+        if attr in self._values:
             self._del_attr(attr,True)
-            delattr(self, attr)
+            self._pop(attr)
             return True
         return False
 
@@ -165,18 +451,51 @@ class Data:
         """Set `name` to `val` unless protected. Returns True if set, False otherwise."""
         if not self._procheck(name):
             if self._check_for_type(name,val):
-                setattr(self, name, val)
+                self._put(name, val)
                 return True
             self._typederr(name,val)
         return False
     
     def sets(self, **kwargs) -> int:
         """Set multiple `kwargs`. Returns int count of set."""
-        count = 0
-        for k, v in kwargs.items():
-            if self.set(k, v):
-                count += 1
-        return count
+        return len(self.set_many(kwargs)["applied"])
+
+    def set_many(self, mapping: dict, *, override: bool = False, on_type_error: str = "skip") -> dict:
+        """
+        Validate all of `mapping` against the protection and type tables in one pass, then apply the valid keys together.
+          - `override`: ignore protection (banned names are still refused)
+          - `on_type_error`: `skip` type-rejected keys, `raise` ValueError before anything is applied,
+            or `collect` them with their values under the report's `rejected` key.
+            Every rejected key is also reported to the violation sink, whatever the mode
+        Returns a report dict: `applied`, `protected` and `type_error` lists of keys (plus `rejected` when collecting).
+        """
+        if on_type_error not in ("skip", "raise", "collect"):
+            raise ValueError(on_type_error)
+        protected: list = []
+        rejected: dict = {}
+        batch: dict = {}
+        checks = self._checks
+        banned = self._banned_attr
+        for key, val in mapping.items():
+            if not isinstance(key, str):
+                raise TypeError(f"attribute name must be string, not '{type(key).__name__}'")
+            if self._procheck(key) if not override else _fold(key) in banned:
+                protected.append(key)
+                continue
+            check = checks.get(key)
+            if check is not None and not check(val):
+                rejected[key] = val
+                continue
+            batch[key] = val
+        for key, val in rejected.items():
+            self._typederr(key, val)
+        if rejected and on_type_error == "raise":
+            raise ValueError(f"Type lock rejected {len(rejected)} key(s): {list(rejected)}")
+        self._put_many(batch)
+        report = {"applied": list(batch), "protected": protected, "type_error": list(rejected)}
+        if on_type_error == "collect":
+            report["rejected"] = rejected
+        return report
     
     def osets(self, **kwargs) -> int:
         """Overwrite multiple `kwargs`. Returns int count of set."""
@@ -189,64 +508,257 @@ class Data:
     def protect(self, name: str) -> bool:
         """Protect `name`. Returns True if newly protected, False otherwise."""
         if not self._procheck(name):
-            self._protected_attr.append(name)
+            self._add_protection(name)
             return True
         return False
 
     def unprotect(self, name: str) -> bool:
         """Unprotect `name` if not from original kwargs. Returns True if unprotected, False otherwise."""
-        if self._procheck(name) and not in_lower_list(name, self._og_protects.keys()):
-            self._protected_attr = [
-                attr for attr in self._protected_attr if attr.lower() != name.lower()
-            ]
+        if not isinstance(name, str):
+            return False
+        folded = _fold(name)
+        owner = self._protected_attr.get(folded)
+        if owner is not None and owner not in self._og_protects:
+            self._drop_protection(folded)
             return True
         return False
 
     def ounprotect(self, name: str) -> bool:
         """Force unprotect `name`. Returns True if unprotected, False otherwise."""
-        if self._procheck(name):
-            self._protected_attr = [
-                attr for attr in self._protected_attr if attr.lower() != name.lower()
-            ]
+        if isinstance(name, str) and self._drop_protection(_fold(name)):
             return True
         return False
 
     def grab(self, name: str, full_del: bool = False, default=None):
         """Get `name` then delete or null. `full_del` (bool) if True delete. Returns value or default."""
         if self.hasprop(name, False):
-            val = getattr(self, name)
+            val = self._values[name]
             if full_del:
-                delattr(self, name)
+                self._pop(name)
             else:
-                setattr(self, name, None)
+                self._put(name, None)
             return val
         return default
 
     def ograb(self, name: str, full_del: bool = False, default=None):
         """Get any `name` then delete or null. `full_del` (bool) if True delete. Returns value or default."""
         if self.hasprop(name, True):
-            val = getattr(self, name)
+            val = self._values[name]
             if full_del:
-                delattr(self, name)
+                self._pop(name)
             else:
-                setattr(self, name, None)
+                self._put(name, None)
             return val
         return default
 
     def _procheck(self, name) -> bool:
-        """Return True if `name` is protected or banned."""
-        return in_lower_list(name, mergel(self._protected_attr, self._banned_attr))
+        """Return True if `name` is protected or banned (case-insensitive)."""
+        if not isinstance(name, str):
+            return False
+        folded = _fold(name)
+        return folded in self._protected_attr or folded in self._banned_attr
+
+    def _is_protected(self, name) -> bool:
+        """Return True if `name` is the protected spelling of its key, ignoring banned names.
+        Writes are refused case-insensitively by `_procheck`; visibility follows the spelling that was protected."""
+        return isinstance(name, str) and self._protected_attr.get(_fold(name)) == name
+
+    def _add_protection(self, name: str):
+        """Internal function to record `name` in the protection index. No return."""
+        folded = _fold(name)
+        if folded not in self._protected_attr:
+            if self._shared:
+                self._own("_protected_attr")
+            if self._hooks:
+                self._emit(("protect", name))
+            self._protected_attr[folded] = name
+            self._flag_on(name, PROTECTED)
+            if name in self._values:
+                self._hidden += 1
+
+    def _drop_protection(self, folded: str) -> bool:
+        """Internal function to remove a folded name from the protection index. Returns True if removed."""
+        if self._shared:
+            if folded not in self._protected_attr:
+                return False
+            self._own("_protected_attr")
+        if self._hooks and folded in self._protected_attr:
+            self._emit(("unprotect", self._protected_attr[folded]))
+        owner = self._protected_attr.pop(folded, None)
+        if owner is None:
+            return False
+        self._flag_off(owner, PROTECTED)
+        if owner in self._values:
+            self._hidden -= 1
+        return True
+
+    def _put(self, key: str, val):
+        """Internal function to store `val` under `key` without any checks. No return."""
+        if not isinstance(key, str):
+            raise TypeError(f"attribute name must be string, not '{type(key).__name__}'")
+        if self._shared:
+            self._own("_values")
+        if self._hooks:
+            self._emit(("set", key, val))
+        values = self._values
+        if key not in values and self._protected_attr and self._is_protected(key):
+            self._hidden += 1
+        values[key] = val
+
+    def _put_many(self, batch: dict):
+        """Internal function to store every pair of the already validated `batch`. No return."""
+        if not batch:
+            return
+        if self._shared:
+            self._own("_values")
+        if self._hooks:
+            for key, val in batch.items():
+                self._emit(("set", key, val))
+        values = self._values
+        if self._protected_attr:
+            for key in batch:
+                if key not in values and self._is_protected(key):
+                    self._hidden += 1
+        values.update(batch)
+
+    def _pop(self, key: str):
+        """Internal function to remove `key` from the value store. Returns the removed value."""
+        if self._shared:
+            self._own("_values")
+        if self._hooks and key in self._values:
+            self._emit(("erase", key))
+        val = self._values.pop(key)
+        if self._protected_attr and self._is_protected(key):
+            self._hidden -= 1
+        return val
+
+    def _flag_on(self, name: str, bit: int):
+        """Internal function to set tag `bit` for `name`. No return."""
+        if self._shared:
+            self._own("_flags")
+        self._flags[name] = self._flags.get(name, 0) | bit
+
+    def _flag_off(self, name: str, bit: int):
+        """Internal function to clear tag `bit` for `name`. No return."""
+        if self._shared:
+            self._own("_flags")
+        flags = self._flags.get(name, 0) & ~bit
+        if flags:
+            self._flags[name] = flags
+        else:
+            self._flags.pop(name, None)
+
+    def _lock(self, name: str, type_lock, check=None, elements: str = "sample"):
+        """Internal function to record a type lock (and its compiled `check`, else one compiled in `elements` mode) for `name`. No return."""
+        if check is None:
+            check = compile_type_lock(type_lock, elements)
+        if self._shared:
+            self._own("_types")
+            self._own("_checks")
+        if self._hooks:
+            self._emit(("type", name, type_lock, element_mode(check)))
+        self._types[name] = type_lock
+        self._checks[name] = check
+        self._flag_on(name, TYPED)
+
+    def _unlock(self, name: str):
+        """Internal function to drop the type lock for `name`. No return."""
+        if self._shared:
+            self._own("_types")
+            self._own("_checks")
+        if self._hooks and name in self._types:
+            self._emit(("untype", name))
+        del self._types[name]
+        del self._checks[name]
+        self._flag_off(name, TYPED)
+
+    def _mark_kwarg(self, name: str, raw):
+        """Internal function to record `name` as an original kwarg. No return."""
+        if self._shared:
+            self._own("_og_protects")
+        if self._hooks:
+            self._emit(("kwarg", name))
+        self._og_protects[name] = raw
+        self._flag_on(name, KWARG)
+
+    def _unmark_kwarg(self, name: str):
+        """Internal function dropping the original-kwarg record of `name`. No return."""
+        if self._shared:
+            self._own("_og_protects")
+        if self._hooks:
+            self._emit(("unkwarg", name))
+        del self._og_protects[name]
+        self._flag_off(name, KWARG)
+
+    def _emit(self, op: tuple):
+        """Internal function handing a change `op` to every hook. No return."""
+        for hook in self._hooks:
+            hook(op)
+
+    def _own(self, table: str):
+        """Internal function to take a private copy of a shared `table` before writing to it. No return."""
+        if self._readonly:
+            raise ReadOnlyError("This Data object is a read-only snapshot.")
+        if table in self._shared:
+            object.__setattr__(self, table, getattr(self, table).copy())
+            self._shared = self._shared - {table}
+
+    def _share(self, readonly: bool = False) -> "Data":
+        """Internal function returning a new Data that shares every table with this one. O(1)."""
+        twin = Data.__new__(Data)
+        for table in _TABLES:
+            object.__setattr__(twin, table, getattr(self, table))
+        twin._og_list = self._og_list
+        twin._hidden = self._hidden
+        twin._shared = _TABLES
+        twin._readonly = readonly
+        twin._sink = self._sink
+        twin._hooks = ()
+        self._shared = _TABLES
+        return twin
+
+    def _count(self, include_protected: bool = True) -> int:
+        """Internal function returning the number of visible keys. O(1)."""
+        if include_protected:
+            return len(self._values)
+        return len(self._values) - self._hidden
+
+    def _iter_keys(self, include_protected: bool = True):
+        """Internal function iterating visible keys without copying."""
+        if include_protected or not self._hidden:
+            return iter(self._values)
+        return (k for k in self._values if not self._is_protected(k))
+
+    def __getattr__(self, name):
+        """Route attribute reads to the value store."""
+        if name in self._banned_attr:
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'") from None
+
+    def __setattr__(self, name, value):
+        """Route attribute writes to the value store (bookkeeping names go to their slots)."""
+        if name in self._banned_attr:
+            object.__setattr__(self, name, value)
+        else:
+            self._put(name, value)
+
+    def __delattr__(self, name):
+        """Route attribute deletes to the value store."""
+        if name in self._banned_attr:
+            object.__delattr__(self, name)
+        elif name in self._values:
+            self._pop(name)
+        else:
+            raise AttributeError(name)
 
     def as_dict(self, include_protected: bool = True) -> dict:
         """Return dict of attrs. `include_protected` (bool) to include protected."""
-        result = {}
-        for k, v in self.__dict__.items():
-            if k in self._banned_attr:
-                continue
-            if not include_protected and in_lower_list(k, self._protected_attr):
-                continue
-            result[k] = v
-        return result
+        if include_protected or not self._hidden:
+            return dict(self._values)
+        return {k: v for k, v in self._values.items() if not self._is_protected(k)}
 
     def __repr__(self) -> str:
         """Return repr string."""
@@ -266,24 +778,38 @@ class Data:
         new_data: dict,
         overwrite_current: bool = False,
         protect_current: bool = False,
-        protect_new_added_keys: bool = False
+        protect_new_added_keys: bool = False,
+        atomic: bool = False
     ) -> bool:
-        """Merge `new_data`. `overwrite_current`, `protect_current`, `protect_new_added_keys` (bool). Returns True if changed."""
+        """Merge `new_data`. `overwrite_current`, `protect_current`, `protect_new_added_keys` (bool). Returns True if changed.
+        `atomic` (bool): check every key first and apply nothing if any value fails its type lock.
+        Runs in a transaction: if anything raises midway, no key is left half merged."""
+        if atomic:
+            for key, val in new_data.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"attribute name must be string, not '{type(key).__name__}'")
+                if self._procheck(key) or (not overwrite_current and self.hasprop(key, include_protected=False)):
+                    continue
+                if not self._check_for_type(key, val):
+                    self._typederr(key, val)
+                    return False
         changed = False
-        for key, val in new_data.items():
-            exists = self.hasprop(key, include_protected=False)
-            if self._procheck(key):
-                continue
-            if not overwrite_current and exists:
-                continue
-            if not self._check_for_type(key,val):
-                continue
-            setattr(self, key, val)
-            changed = True
-            if exists and protect_current:
-                self._protected_attr.append(key)
-            if not exists and protect_new_added_keys:
-                self._protected_attr.append(key)
+        with self.transaction():
+            for key, val in new_data.items():
+                exists = self.hasprop(key, include_protected=False)
+                if self._procheck(key):
+                    continue
+                if not overwrite_current and exists:
+                    continue
+                if not self._check_for_type(key,val):
+                    self._typederr(key,val)
+                    continue
+                self._put(key, val)
+                changed = True
+                if exists and protect_current:
+                    self._add_protection(key)
+                if not exists and protect_new_added_keys:
+                    self._add_protection(key)
         return changed
 
     def absorb(
@@ -292,148 +818,181 @@ class Data:
         include_protected: bool = False,
         overwrite: bool = False
     ) -> bool:
-        """Absorb from `other`. `include_protected`, `overwrite` (bool). Returns True if changed."""
+        """Absorb from `other`. `include_protected`, `overwrite` (bool). Returns True if changed.
+        Runs in a transaction, like `merge_dict`."""
         if not isinstance(other, Data):
             raise ValueError("Argument must be a Data object.")
 
         changed = False
-        for key, val in other.as_dict(include_protected).items():
-            if self._procheck(key):
-                continue
-            if not self._check_for_type(key,val):
-                continue
-            exists = self.hasprop(key, include_protected=False)
-            if exists and not overwrite:
-                continue
-            setattr(self, key, val)
-            changed = True
+        with self.transaction():
+            for key, val in other.as_dict(include_protected).items():
+                if self._procheck(key):
+                    continue
+                if not self._check_for_type(key,val):
+                    self._typederr(key,val)
+                    continue
+                exists = self.hasprop(key, include_protected=False)
+                if exists and not overwrite:
+                    continue
+                self._put(key, val)
+                changed = True
         return changed
     
     def get(self,name:str,default=None):
         """Return value of `name` or `default` if not found or protected."""
         if self.hasprop(name,False):
-            return getattr(self,name)
+            return self._values[name]
         return default
     
-    def keys(self,include_protected:bool=True) -> list:
-        """Returns a list of property names."""
-        return list(self.as_dict(include_protected).keys())
-    
     def tags(self, property: str, default) -> list[str]:
         """Returns list of tags (`protected`, `typed`, `kwarg`, `none`) for `property`. If `property` does not exist, returns `default` or `None`."""
-        if not hasattr(self, property):
+        if property not in self._values:
             return default
-        tags = []
-        if property in self._protected_attr: tags.append("protected")
-        if property in self._types: tags.append("typed")
-        if property in self._og_protects: tags.append("kwarg")
-        if not tags: tags.append("none")
-        return tags
+        return _tag_names(self._flags.get(property, 0)) or ["none"]
     
     def tags_by_key(self) -> dict[str, list]:
         """Return a dict where each property is tagged with `protected`, `typed`, `kwarg`, `none`."""
-        return {k:self.tags(k, ["KeyError, Something Went Horribly Wrong."]) for k in self.__dict__.keys() if k not in self._banned_attr}
+        flags = self._flags
+        return {k: _tag_names(flags.get(k, 0)) or ["none"] for k in self._values}
     
     def keys_by_tag(self) -> dict[str,list[str]]:
         """Return a dict where each tag (`protected`, `typed`, `kwarg`, `none`) maps to a list of properties that have that tag."""
-        tags = {
-            "protected":set(self.protected_keys(False,False)),
-            "typed":set(self.typed_keys(False)),
-            "kwarg":set(self.kwarg_keys(False))
+        values, flags = self._values, self._flags
+        return {
+            "protected": [k for k in self._protected_attr.values() if k in values and not flags[k] & KWARG],
+            "typed": [k for k in self._types if k in values],
+            "kwarg": [k for k in self._og_protects if k in values],
+            "none": [k for k in values if k not in flags],
         }
-        ret:dict[str,list[str]] = {"protected":[],"typed":[],"kwarg":[],"none":[]}
-
-        for k in (k for k in self.__dict__.keys() if k not in self._banned_attr):
-            matched = False
-            for tag, keys in tags.items():
-                if k in keys:
-                    ret[tag].append(k)
-                    matched = True
-            if not matched:
-                ret["none"].append(k)
-        
-        return ret
+
+    def keys_with(self, mask, exclude=0) -> list[str]:
+        """Return stored keys carrying every tag in `mask` and none in `exclude`.
+        Masks are ints built from `PROTECTED`, `TYPED`, `KWARG`, or tag names (str or list of str),
+        e.g. `keys_with(TYPED, exclude=KWARG)` for typed keys that are not kwargs."""
+        mask, exclude = _tag_mask(mask), _tag_mask(exclude)
+        values, flags = self._values, self._flags
+        if not mask:
+            return [k for k in values if not flags.get(k, 0) & exclude]
+        # walk the smallest tag table that every match must belong to
+        candidates = min(
+            (table for bit, table in (
+                (PROTECTED, self._protected_attr.values()),
+                (TYPED, self._types),
+                (KWARG, self._og_protects),
+            ) if mask & bit),
+            key=len,
+        )
+        return [
+            k for k in candidates
+            if k in values and flags[k] & mask == mask and not flags[k] & exclude
+        ]
     
     def bundle_keys(self, protected_tag: bool = True, typed_tag: bool = True, kwarg_tag: bool = True, no_tags: bool = True) -> list[str]:
         """Return a list of property names that match the given tag flags: `protected`, `typed`, `kwarg`, or `untagged`."""
         from .functional_utils.bool import all_bool
         if all_bool(True, protected_tag, typed_tag, kwarg_tag, no_tags):
-            return [k for k in self.__dict__.keys() if k not in self._banned_attr]
+            return list(self._values)
+        flags = self._flags
         ret: list[str] = []
         seen: set[str] = set()
-        if protected_tag:
-            for k in self.protected_keys(False, False):
-                if k not in seen:
-                    ret.append(k)
-                    seen.add(k)
-        if typed_tag:
-            for k in self.typed_keys(False):
-                if k not in seen:
-                    ret.append(k)
-                    seen.add(k)
-        if kwarg_tag:
-            for k in self.kwarg_keys(False):
+        for wanted, table in (
+            (protected_tag, (k for k in self._protected_attr.values() if not flags[k] & KWARG)),
+            (typed_tag, self._types),
+            (kwarg_tag, self._og_protects),
+        ):
+            if not wanted:
+                continue
+            for k in table:
                 if k not in seen:
                     ret.append(k)
                     seen.add(k)
         if no_tags:
-            tagged = set(self.protected_keys(False, False)) | set(self.typed_keys(False)) | set(self.kwarg_keys(False))
-            for k in (k for k in self.__dict__.keys() if k not in self._banned_attr and k not in tagged):
-                ret.append(k)
+            ret.extend(k for k in self._values if k not in flags)
         return ret
     
     def protected_keys(self, only_typed: bool=False, include_kwargs: bool=False) -> list[str]:
         """Return protected keys. If only_typed, only those also in `_types`. If include_kwargs, include original kwargs."""
-        keys = list(self._protected_attr)
-        if not include_kwargs:
-            keys = [k for k in keys if k not in self._og_protects]
-        if only_typed:
-            keys = [k for k in keys if k in self._types]
-        return keys
+        if include_kwargs and not only_typed:
+            return list(self._protected_attr.values())
+        flags = self._flags
+        return [
+            k for k in self._protected_attr.values()
+            if (include_kwargs or not flags[k] & KWARG) and (not only_typed or flags[k] & TYPED)
+        ]
     
     def typed_keys(self,only_protected:bool=False) -> list[str]:
         """Return list of type-locked keys. If `only_protected`, only include keys that are also protected."""
-        return list(self._types.keys()) if not only_protected else [k for k in self._types.keys() if self._procheck(k)]
+        return list(self._types) if not only_protected else [k for k in self._types if self._procheck(k)]
 
     def kwarg_keys(self,only_protected:bool=False) -> list[str]:
         """Return list of original kwargs. If `only_protected`, only include kwargs that are also protected."""
-        return list(self._og_protects.keys()) if not only_protected else [k for k in self._og_protects.keys() if self._procheck(k)]
+        return list(self._og_protects) if not only_protected else [k for k in self._og_protects if self._procheck(k)]
     
     def unprotected_keys(self,include_typed:bool=False,include_kwargs:bool=True) -> list[str]:
         """Return list of unprotected keys. Excludes type-locked or kwarg keys unless included via flags."""
-        ret:list = clean_values([k for k in self.__dict__.keys() if not self._procheck(k)],mergel(list(self.typed_keys) if not include_typed else [],
-                                                                                                  list(self._og_protects.keys()) if not include_kwargs else []))
-        return ret
+        return [
+            k for k in self._values
+            if not self._procheck(k)
+            and (include_typed or k not in self._types)
+            and (include_kwargs or k not in self._og_protects)
+        ]
 
 
     def swap(self, property: str, new_val, default=None):
         """Set `property` to `new_val`. Returns old value or `default` if it did not exist."""
-        existed = property in self.__dict__
-        old = self.__dict__.get(property, None)
+        existed = property in self._values
+        old = self._values.get(property, None)
         if self._check_for_type(property,new_val):
-            setattr(self, property, new_val)
+            self._put(property, new_val)
         else:
             self._typederr(property,new_val)
         return old if existed else default
     
+    def compare_and_set(self, property: str, expected, new_val) -> bool:
+        """Set `property` to `new_val` only if it exists, is not protected and currently equals `expected`
+        (and `new_val` passes its type lock). Returns True if set, False otherwise."""
+        if self._procheck(property) or property not in self._values:
+            return False
+        current = self._values[property]
+        if current is not expected and current != expected:
+            return False
+        if not self._check_for_type(property, new_val):
+            self._typederr(property, new_val)
+            return False
+        self._put(property, new_val)
+        return True
+
     def _check_for_type(self,property:str,new_val) -> bool:
         """Internal method to check if `new_val` is the correct type if `property` is locked. returns bool."""
-        proptype = self._types.get(property)
-        if proptype:
-            return isinstance(new_val,proptype)
-        return True
+        check = self._checks.get(property)
+        return check is None or check(new_val)
 
     def _typederr(self,property,new,_raise:bool=False):
-        if property not in self._types:
-            print(f"{property} has no type lock.")
+        """Internal method to report a rejected write to the violation sink (or raise ValueError if `_raise`)."""
+        lock = self._types.get(property)
         if _raise:
-            raise ValueError(f"{property} has locked type as: {self._types[property]} but new value has type: {type(new)}.")
-        else:
-            print(f"{property} has locked type as: {self._types[property]} but new value has type: {type(new)}.")
+            raise ValueError(f"{property} has locked type as: {lock} but new value has type: {type(new)}.")
+        sink = self._sink
+        (sink if sink is not None else violations._default_sink)(property, lock, new)
+
+    def set_violation_sink(self, sink=None):
+        """Send this object's type violations to `sink` (a callable taking key, lock, value; see `protdict.violations`).
+        None restores the process-wide default. No return."""
+        if sink is not None and not callable(sink):
+            raise ValueError(sink)
+        self._sink = sink
+
+    def violation_counts(self) -> dict:
+        """Return {key: count} of type violations from the active sink if it counts them, else an empty dict."""
+        sink = self._sink if self._sink is not None else violations._default_sink
+        return dict(getattr(sink, "counts", {}))
     
     def __getitem__(self, key):
         """Return value for `key` (same as `get`)."""
-        return getattr(self, key)
+        try:
+            return self._values[key]
+        except KeyError:
+            raise AttributeError(key) from None
 
     def __setitem__(self, key, value):
         """Set `key` to `value` (respects protection & typing)."""
@@ -448,36 +1007,45 @@ class Data:
         return self.hasprop(key)
 
     def __len__(self) -> int:
-        """Return count of non‑banned properties."""
-        return len(self.as_dict())
+        """Return count of non‑banned properties. O(1)."""
+        return len(self._values)
 
     def __iter__(self):
         """Iterate over property names."""
-        yield from self.as_dict().keys()
+        return iter(self._values)
 
     def __bool__(self) -> bool:
         """True if there’s at least one property."""
-        return bool(self.as_dict())
+        return bool(self._values)
 
     def __eq__(self, other) -> bool:
-        """Compare two Data objects by their visible contents."""
-        return isinstance(other, Data) and self.as_dict() == other.as_dict()
+        """Compare two Data objects by their visible contents.
+        Returns False at once if both have up-to-date fingerprints (see `fingerprint`) that differ
+        and neither holds containers that can change in place or values of types the fingerprints cannot vouch for."""
+        if not isinstance(other, Data):
+            return False
+        if self._values is other._values:
+            return True
+        mine, theirs = self._settled_print(), other._settled_print()
+        if mine is not None and theirs is not None and mine != theirs:
+            return False
+        return self._values == other._values
 
-    def items(self):
-        """Return (key, value) pairs as a view."""
-        return self.as_dict().items()
+    def items(self, include_protected: bool = True) -> DataItemsView:
+        """Return a live view of (key, value) pairs. `include_protected` (bool) to include protected."""
+        return DataItemsView(self, include_protected)
 
-    def keys(self) -> list[str]:
-        """Return list of property names."""
-        return list(self.as_dict().keys())
+    def keys(self, include_protected: bool = True) -> DataKeysView:
+        """Return a live view of property names. `include_protected` (bool) to include protected."""
+        return DataKeysView(self, include_protected)
 
-    def values(self) -> list:
-        """Return list of property values."""
-        return list(self.as_dict().values())
+    def values(self, include_protected: bool = True) -> DataValuesView:
+        """Return a live view of property values. `include_protected` (bool) to include protected."""
+        return DataValuesView(self, include_protected)
 
     def clear(self):
         """Remove all non‑banned, non‑protected properties."""
-        for k in list(self.as_dict().keys()):
+        for k in list(self._values):
             self.erase(k)
 
     def update(self, other: dict):
@@ -485,13 +1053,34 @@ class Data:
         Update from `other` dict (like dict.update),
         respecting protection & typing. Returns None.
         """
-        for k, v in other.items():
-            self.set(k, v)
+        self.set_many(other)
     
     def clone(self) -> "Data":
         """Returns an exact copy of this Data object,
-        preserving protections, types, kwargs, original kwargs, etc."""
-        return Data(data_dictionary=self.export())
+        preserving protections, types, kwargs, original kwargs, etc.
+        The copy shares storage with this object; each table is copied only when either side first writes to it."""
+        return self._share()
+
+    def snapshot(self) -> "Data":
+        """Returns a read-only copy of this Data object as it is now. O(1);
+        later writes to this object do not show through, and writing to the snapshot raises `ReadOnlyError`."""
+        return self._share(readonly=True)
+
+    def __reduce_ex__(self, protocol):
+        """
+        Pickle only the live values and compact `(key, tag bits, lock, element mode)` entries; never `_og_list`,
+        compiled checks or the violation sink (the copy uses the process-wide default).
+        With protocol 5, memoryviews and bytes/bytearray/array values of 4 KiB or more become `PickleBuffer`s,
+        so `pickle.dumps(d, protocol=5, buffer_callback=...)` can ship them out of band.
+        """
+        values = self._values if type(self._values) is dict else dict(self._values)
+        if any(_wants_buffer(val, protocol) for val in values.values()):
+            values = {key: _Buffered(val) if _wants_buffer(val, protocol) else val for key, val in values.items()}
+        return _unpickle, (type(self), values, self._tag_entries(), self._readonly)
+
+    def __copy__(self) -> "Data":
+        """Same as `clone()`."""
+        return self.clone()
 
     def export(self) -> dict:
         """
@@ -502,18 +1091,241 @@ class Data:
         and it will rebuild the same protection/typing/kwarg setup.
         """
         out: dict = {}
-        # use as_dict(include_protected=True) so we grab everything except internals
-        for key, val in self.as_dict(include_protected=True).items():
-            tags: list[str] = []
-            if key in self._protected_attr:
-                tags.append("protected")
-            if key in self._types:
-                tags.append("typed")
-            if key in self._og_protects:
-                tags.append("kwarg")
-            if tags:
-                out[key] = {"value": val, "tags": tags}
-            else:
-                out[key] = val
+        flags = self._flags
+        for key, val in self._values.items():
+            bits = flags.get(key)
+            out[key] = {"value": val, "tags": _tag_names(bits)} if bits else val
         return out
-    
\ No newline at end of file
+
+    def iter_export(self):
+        """
+        Lazily yield `(key, value, tags)` for every property, where `tags` is the list
+        `export()` would attach (empty for untagged keys). Nothing is copied up front;
+        do not mutate this object while iterating.
+        """
+        flags = self._flags
+        for key, val in self._values.items():
+            bits = flags.get(key)
+            yield key, val, _tag_names(bits) if bits else []
+
+    def export_to(self, fp, format: str = "json", chunk_size: int = 1000) -> int:
+        """
+        Write the `export()` encoding to the text file object `fp` incrementally, `chunk_size` keys per write.
+          - `json`: one object, loadable with `json.load` and passable to Data(...)
+          - `ndjson`: one single-key object per line; each line is itself a valid data_dictionary
+        Values must be JSON serializable. Returns int count of keys written.
+        """
+        if format not in ("json", "ndjson"):
+            raise ValueError(format)
+        dumps = json.dumps
+        parts: list[str] = []
+        count = 0
+        if format == "json":
+            parts.append("{")
+        for key, val, tags in self.iter_export():
+            entry = dumps({"value": val, "tags": tags} if tags else val)
+            if format == "json":
+                parts.append(f"{', ' if count else ''}{dumps(key)}: {entry}")
+            else:
+                parts.append(f"{{{dumps(key)}: {entry}}}\n")
+            count += 1
+            if len(parts) >= chunk_size:
+                fp.write("".join(parts))
+                parts.clear()
+        if format == "json":
+            parts.append("}")
+        if parts:
+            fp.write("".join(parts))
+        return count
+
+    def _journal(self) -> Optional[Journal]:
+        """Internal function returning the attached Journal, or None."""
+        for hook in self._hooks:
+            if type(hook) is Journal:
+                return hook
+        return None
+
+    def enable_journal(self, capacity: int = 4096) -> int:
+        """
+        Start recording every change (set, erase, protect, unprotect, typing) for `export_delta`.
+        Only the newest `capacity` ops are kept; a replica further behind must resync from `export()`.
+        No effect if already enabled. Clones and snapshots start without a journal. Returns int current version.
+        """
+        journal = self._journal()
+        if journal is None:
+            journal = Journal(capacity)
+            self._hooks = self._hooks + (journal,)
+        return journal.version
+
+    def disable_journal(self):
+        """Stop recording changes and drop the journal. No return."""
+        self._hooks = tuple(hook for hook in self._hooks if type(hook) is not Journal)
+
+    def journal_version(self) -> int:
+        """Return the version of the newest recorded change (0 before any). Raises ValueError if no journal is enabled."""
+        journal = self._journal()
+        if journal is None:
+            raise ValueError("No journal enabled; call enable_journal() first.")
+        return journal.version
+
+    def export_delta(self, since: int) -> list[tuple]:
+        """
+        Return the changes made after version `since` as `(version, kind, key[, arg])` ops, oldest first
+        (see `protdict.journal`). Pass the last op's version next time. Raises ValueError if no journal
+        is enabled or ops after `since` were already dropped (resync from `export()`).
+        """
+        journal = self._journal()
+        if journal is None:
+            raise ValueError("No journal enabled; call enable_journal() first.")
+        return journal.since(since)
+
+    def apply_delta(self, ops) -> int:
+        """
+        Replay ops from `export_delta` on this object, e.g. a replica built from `export()`.
+        Ops are applied as recorded, bypassing protection and type checks. Raises ValueError on unknown ops.
+        Returns int count of ops applied.
+        """
+        return self._replay(op[1:] for op in ops)
+
+    def _replay(self, ops) -> int:
+        """Internal function applying `(kind, key[, arg])` ops through the write primitives. Returns int count applied."""
+        count = 0
+        for op in ops:
+            kind, key = op[0], op[1]
+            if kind == "set":
+                self._put(key, op[2])
+            elif kind == "erase":
+                if key in self._values:
+                    self._pop(key)
+            elif kind == "protect":
+                self._add_protection(key)
+            elif kind == "unprotect":
+                self._drop_protection(_fold(key))
+            elif kind == "type":
+                self._lock(key, op[2], None, op[3] if len(op) > 3 else "sample")
+            elif kind == "untype":
+                if key in self._types:
+                    self._unlock(key)
+            elif kind == "kwarg":
+                self._mark_kwarg(key, self._values.get(key))
+            elif kind == "unkwarg":
+                if key in self._og_protects:
+                    self._unmark_kwarg(key)
+            else:
+                raise ValueError(f"Invalid delta op: {op!r}")
+            count += 1
+        return count
+
+    def _prints(self) -> Fingerprints:
+        """Internal function returning this object's up-to-date Fingerprints, starting to track them if needed."""
+        for hook in self._hooks:
+            if type(hook) is Fingerprints:
+                hook.refresh(self._values)
+                return hook
+        prints = Fingerprints(self._values)
+        self._hooks = self._hooks + (prints,)
+        return prints
+
+    def _settled_print(self) -> Optional[int]:
+        """Internal function returning the whole-object fingerprint if it is tracked and current, else None."""
+        for hook in self._hooks:
+            if type(hook) is Fingerprints:
+                return hook.total if hook.current and not hook.unsure else None
+        return None
+
+    def fingerprint(self) -> int:
+        """
+        Return a fingerprint of the values: equal Data holding values of the types `protdict.fingerprint` knows
+        always have equal fingerprints. Strings hash per process, so compare fingerprints within one process only.
+        The first call fingerprints every key (O(n)); after that each write only marks its key,
+        and later calls (and `diff`, `__eq__`) rehash just the keys written since, plus the keys
+        holding lists, dicts, sets or other containers that can change in place.
+        """
+        return self._prints().total
+
+    def diff(self, other: "Data") -> dict:
+        """
+        Return what turns this Data into `other` (a Data), for `patch`:
+          - `added`: {key: value} only in `other`; `removed`: [keys] only here; `changed`: {key: other's value}
+          - `tags`: {key: other's tag list} and `types`: {key: other's lock or None} where they differ
+        Values are compared by fingerprint, so only keys whose fingerprints differ are looked at
+        (plus keys holding values of types the fingerprints cannot vouch for, which are compared by value).
+        """
+        if not isinstance(other, Data):
+            raise ValueError("Argument must be a Data object.")
+        other.fingerprint()
+        my_prints, their_prints = self._prints(), other._prints()
+        mine, theirs = my_prints.prints, their_prints.prints
+        added, removed, changed = {}, [], {}
+        if self._values is not other._values and (mine != theirs or my_prints.unsure or their_prints.unsure):
+            values, theirs_values = self._values, other._values
+            candidates = {key for key, _ in mine.items() ^ theirs.items()}
+            # unsure fingerprints can match for different values or differ for equal ones, so those keys are compared by value
+            unsure = my_prints.unsure | their_prints.unsure
+            candidates.update(key for key in unsure if key in mine and key in theirs)
+            for key in candidates:
+                if key not in theirs:
+                    removed.append(key)
+                elif key not in mine:
+                    added[key] = theirs_values[key]
+                elif key not in unsure or _differ(values[key], theirs_values[key]):
+                    changed[key] = theirs_values[key]
+        tags, types = {}, {}
+        if self._flags is not other._flags:
+            flags, other_flags = self._flags, other._flags
+            for key in flags.keys() | other_flags.keys():
+                bits = other_flags.get(key, 0)
+                if flags.get(key, 0) != bits:
+                    tags[key] = _tag_names(bits)
+        if self._types is not other._types:
+            own_types, other_types = self._types, other._types
+            for key in own_types.keys() | other_types.keys():
+                lock = other_types.get(key)
+                if key not in own_types or key not in other_types or own_types[key] != lock:
+                    types[key] = lock
+        return {"added": added, "removed": removed, "changed": changed, "tags": tags, "types": types}
+
+    def patch(self, diff: dict) -> int:
+        """
+        Apply a `diff` result, bypassing protection and type checks, so `a.patch(a.diff(b))` makes `a` match `b`.
+        Returns int count of keys whose value, tags or type lock changed.
+        """
+        touched = set()
+        for key in diff.get("removed", ()):
+            if key in self._values:
+                self._pop(key)
+                touched.add(key)
+        for part in ("added", "changed"):
+            for key, val in diff.get(part, {}).items():
+                self._put(key, val)
+                touched.add(key)
+        for key, tags in diff.get("tags", {}).items():
+            bits, have = _tag_mask(tags), self._flags.get(key, 0)
+            if bits & PROTECTED and not have & PROTECTED:
+                self._add_protection(key)
+            elif have & PROTECTED and not bits & PROTECTED:
+                self._drop_protection(_fold(key))
+            if bits & KWARG and not have & KWARG:
+                self._mark_kwarg(key, self._values.get(key))
+            elif have & KWARG and not bits & KWARG:
+                self._unmark_kwarg(key)
+            if self._flags.get(key, 0) != have:
+                touched.add(key)
+        for key, lock in diff.get("types", {}).items():
+            if lock is None:
+                if key in self._types:
+                    self._unlock(key)
+                    touched.add(key)
+            elif key not in self._types or self._types[key] != lock:
+                self._lock(key, lock)
+                touched.add(key)
+        return len(touched)
+
+    def transaction(self) -> Transaction:
+        """
+        Return a context manager making the writes in its block all-or-nothing: if the block raises,
+        every set, erase, protection and type-lock change made in it is undone. Nest blocks for
+        savepoints; `rollback()` on the returned object undoes its block so far. Cost follows the
+        number of writes, not the object size (see `protdict.transaction`).
+        """
+        return Transaction(self)
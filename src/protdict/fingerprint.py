@@ -0,0 +1,167 @@
+"""
+Content fingerprints for Data values.
+
+`fingerprint(val)` hashes a value so that `==` values of the types it knows always fingerprint
+the same: str, bytes-likes, None, numbers (int, float, complex, Fraction and Decimal, by their
+numeric `hash()`) and lists, tuples, dicts, sets and arrays of those. Other numeric types, such as
+NumPy scalars, are hashed the same way but count as unsure. Each kind is tagged, so equal fingerprints across kinds ("1" vs 1) are no more
+likely than any other collision. Values of other types fall back to `hash()` (or their type when
+unhashable) and count as unsure: their fingerprints may differ although they are `==`, or match
+although they differ. Strings hash with the per-process randomized `hash()`, so fingerprints are
+only comparable within one process.
+
+`Fingerprints` is a change hook (see `Data._hooks`) keeping one `hash((key, fingerprint(value)))`
+entry per key plus their sum, the whole-object fingerprint, and the keys whose values are unsure.
+Writes only mark keys dirty; entries are recomputed on the next `refresh`, so the cost of keeping
+the fingerprints follows the number of changed keys. Lists, dicts, sets, bytearrays, arrays and
+writable memoryviews can change in place without a write, so keys holding them are rehashed on
+every `refresh`.
+"""
+from array import array
+from decimal import Decimal
+from fractions import Fraction
+from numbers import Number
+
+_MASK = (1 << 64) - 1
+# kind markers keeping values that are never == to each other apart
+_LIST, _TUPLE, _DICT, _SET, _BUFFER, _BYTES, _NUMBER = range(1, 8)
+# number types whose hash() agrees across types for == values
+_EXACT = frozenset((int, bool, float, complex, Fraction, Decimal))
+
+
+def fingerprint(val) -> int:
+    """Return a hash of `val` that is equal for `==` values of the known types, including unhashable containers."""
+    return _print(val, None, None)
+
+
+def _number(val):
+    """Return the fingerprint of a number from its numeric `hash()`, which Python keeps equal for `==`
+    int, float, complex, Fraction and Decimal values. Returns None for numbers that cannot be hashed."""
+    try:
+        h = hash(val)
+    except TypeError:
+        return None
+    # hash() reserves -1, so -1 and -2 share the hash -2; keep them apart
+    return hash((_NUMBER, h, h == -2 and val == -1))
+
+
+def _print(val, unsure, mutable) -> int:
+    """
+    Internal fingerprint. Appends to the `unsure` list (if given) when `val` holds a value of an unknown type,
+    and to the `mutable` list (if given) when it holds a container that can change in place.
+    """
+    kind = type(val)
+    if kind is str:
+        return hash(val)
+    if kind is int:
+        return _number(val)
+    if val is None:
+        return hash(None)
+    if isinstance(val, str):
+        return hash(str(val))
+    if isinstance(val, Number):
+        found = _number(val)
+        if found is not None:
+            # other numeric types are not bound to keep hash() consistent with the built-in numbers
+            if unsure is not None and kind not in _EXACT:
+                unsure.append(val)
+            return found
+    if isinstance(val, (bytes, bytearray)):
+        if mutable is not None and isinstance(val, bytearray):
+            mutable.append(val)
+        return hash((_BYTES, bytes(val)))
+    if isinstance(val, list):
+        if mutable is not None:
+            mutable.append(val)
+        return hash((_LIST, *(_print(v, unsure, mutable) for v in val)))
+    if isinstance(val, tuple):
+        return hash((_TUPLE, *(_print(v, unsure, mutable) for v in val)))
+    if isinstance(val, dict):
+        if mutable is not None:
+            mutable.append(val)
+        return hash((_DICT, frozenset((_print(k, unsure, mutable), _print(v, unsure, mutable)) for k, v in val.items())))
+    if isinstance(val, (set, frozenset)):
+        if mutable is not None and not isinstance(val, frozenset):
+            mutable.append(val)
+        return hash((_SET, frozenset(_print(v, unsure, mutable) for v in val)))
+    if isinstance(val, array):
+        if mutable is not None:
+            mutable.append(val)
+        return hash((_BUFFER, *(_print(v, unsure, mutable) for v in val.tolist())))
+    if isinstance(val, memoryview):
+        # a memoryview is == to bytes and to arrays alike, which are never == to each other
+        if unsure is not None:
+            unsure.append(val)
+        if mutable is not None and not val.readonly:
+            mutable.append(val)
+        if val.format == "B" and val.ndim == 1:
+            return hash((_BYTES, bytes(val)))
+        return hash((_BUFFER, *(_print(v, unsure, mutable) for v in val.tolist())))
+    if unsure is not None and kind.__eq__ is not object.__eq__:
+        # identity-compared objects are safe: hash() follows identity too
+        unsure.append(val)
+    try:
+        return hash(val)
+    except TypeError:
+        return hash(kind)
+
+
+class Fingerprints:
+    """
+    Per-key fingerprint entries of one Data, and `total`, their sum. `unsure` holds the keys whose
+    values contain a type `fingerprint` does not know (see the module docstring), `mutable` the keys
+    whose values can change in place. Call `refresh` before reading them.
+    """
+
+    __slots__ = ("prints", "total", "dirty", "unsure", "mutable")
+
+    def __init__(self, values):
+        self.prints = {}
+        self.unsure = set()
+        self.mutable = set()
+        for key, val in values.items():
+            self.prints[key] = self._entry(key, val)
+        self.total = sum(self.prints.values()) & _MASK
+        self.dirty = set()
+
+    def _entry(self, key, val) -> int:
+        """Internal function returning the entry of `key`, recording whether it is unsure or mutable."""
+        found, mutable = [], []
+        entry = hash((key, _print(val, found, mutable)))
+        if found:
+            self.unsure.add(key)
+        elif self.unsure:
+            self.unsure.discard(key)
+        if mutable:
+            self.mutable.add(key)
+        elif self.mutable:
+            self.mutable.discard(key)
+        return entry
+
+    def __call__(self, op: tuple):
+        if op[0] == "set" or op[0] == "erase":
+            self.dirty.add(op[1])
+
+    @property
+    def current(self) -> bool:
+        """True if `total` is known to match the values without a `refresh`."""
+        return not self.dirty and not self.mutable
+
+    def refresh(self, values):
+        """Recompute the entries of keys written since the last refresh, and of keys holding mutable values. No return."""
+        if not self.dirty and not self.mutable:
+            return
+        prints, total = self.prints, self.total
+        # a mutable value may have changed in place, which no write op reports
+        for key in self.dirty | self.mutable:
+            old = prints.pop(key, None)
+            if old is not None:
+                total -= old
+            if key in values:
+                prints[key] = new = self._entry(key, values[key])
+                total += new
+            else:
+                self.unsure.discard(key)
+                self.mutable.discard(key)
+        self.total = total & _MASK
+        self.dirty.clear()
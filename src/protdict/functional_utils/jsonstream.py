@@ -0,0 +1,103 @@
+import codecs
+import json
+import re
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _Buffer:
+    """Sliding text window over a file object for incremental JSON parsing."""
+
+    __slots__ = ("fp", "size", "buf", "pos", "eof", "decoder")
+
+    def __init__(self, fp, chunk_size: int):
+        self.fp = fp
+        self.size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = None
+
+    def more(self, grow: bool = False) -> bool:
+        """Read the next chunk (larger when `grow`, to keep big values linear). Returns False at end of input."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(max(self.size, len(self.buf) - self.pos) if grow else self.size)
+        if isinstance(chunk, (bytes, bytearray)):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder("utf-8")()
+            chunk = self.decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_ws(self):
+        """Advance past whitespace, reading more input as needed. No return."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.more():
+                return
+
+    def next_char(self) -> str:
+        """Return the next non-whitespace character, or "" at end of input."""
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            return ""
+        self.pos += 1
+        return self.buf[self.pos - 1]
+
+    def expect(self, char: str):
+        """Consume `char` or raise ValueError. No return."""
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON input, found {found or 'end of input'!r}.")
+
+    def value(self):
+        """Decode and return the next complete JSON value."""
+        self.skip_ws()
+        while True:
+            try:
+                val, end = _DECODER.raw_decode(self.buf, self.pos)
+                # a value touching the end of the window (e.g. a number) may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return val
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON input: {e}") from None
+            self.more(grow=True)
+
+
+def iter_json_object(fp, chunk_size: int = 1 << 16):
+    """Yield the `(key, value)` pairs of the top-level JSON object in `fp` without loading it whole."""
+    buf = _Buffer(fp, chunk_size)
+    buf.expect("{")
+    buf.skip_ws()
+    if buf.buf[buf.pos:buf.pos + 1] == "}":
+        buf.pos += 1
+        return
+    while True:
+        key = buf.value()
+        if not isinstance(key, str):
+            raise ValueError(f"JSON object keys must be strings, found {key!r}.")
+        buf.expect(":")
+        yield key, buf.value()
+        sep = buf.next_char()
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"Expected ',' or '}}' in JSON input, found {sep or 'end of input'!r}.")
+
+
+def iter_ndjson(fp):
+    """Yield the `(key, value)` pairs of every object in the newline-delimited JSON file `fp`."""
+    for line in fp:
+        if line.strip():
+            obj = json.loads(line)
+            if not isinstance(obj, dict):
+                raise ValueError(f"Each NDJSON line must be an object, found {type(obj).__name__}.")
+            yield from obj.items()
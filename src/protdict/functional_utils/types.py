@@ -1,10 +1,10 @@
-from _collections_abc import Iterable
-
-from collections.abc import Iterable
-from .nums import clamp
-
+import types
+import typing
+import weakref
+from collections import abc
 from collections.abc import Iterable
-from .nums import clamp
+from functools import lru_cache
+from itertools import islice
 
 def multi_isinstance(items: Iterable, valid_types: Iterable, raise_val_error: bool = False) -> bool:
     """
@@ -28,12 +28,9 @@ def multi_isinstance(items: Iterable, valid_types: Iterable, raise_val_error: bo
             raise ValueError("`valid_types` must contain at least one entry.")
         return False
 
-    # 2) Iterate & check
-    for idx, val in enumerate(items):
-        ti = clamp(idx, 0, len(vt) - 1)
-        expected = vt[ti]
-
-        # Build a tuple of real types for isinstance()
+    # 2) Build each tuple of real types for isinstance() once
+    type_tuples = []
+    for expected in vt:
         raw_types = expected if isinstance(expected, (list, tuple)) else (expected,)
         clean_types = []
         for t in raw_types:
@@ -49,9 +46,12 @@ def multi_isinstance(items: Iterable, valid_types: Iterable, raise_val_error: bo
             if raise_val_error:
                 raise ValueError(f"No valid types derived from: {expected!r}")
             return False
+        type_tuples.append(tuple(clean_types))
 
-        type_tuple = tuple(clean_types)
-        if not isinstance(val, type_tuple):
+    # 3) Iterate & check (the last entry is reused for any extra items)
+    last = len(type_tuples) - 1
+    for idx, val in enumerate(items):
+        if not isinstance(val, type_tuples[idx if idx < last else last]):
             return False
 
     return True
@@ -72,4 +72,153 @@ def is_type_exclude(obj, types: tuple, exclusions: tuple) -> bool:
     """
     if isinstance(obj, types) and not isinstance(obj, exclusions):
         return True
-    return False
\ No newline at end of file
+    return False
+
+
+ELEMENT_MODES = ("sample", "full", "none")
+
+
+def compile_type_lock(type_lock, elements: str = "sample", sample_size: int = 8):
+    """
+    Compile `type_lock` into a validator callable returning True when a value satisfies it.
+
+    Args:
+        type_lock (Any): A class or a `typing` construct such as `Optional[int]`, `list[str]`,
+            `dict[str, float]`, `tuple[int, ...]`, `Union[...]`/`X | Y`, `Literal[...]` or `Any`.
+        elements (str): How container elements are checked: `full` checks every element,
+            `sample` checks at most `sample_size` evenly spaced elements, `none` checks only the container type.
+        sample_size (int): Number of elements inspected per container in `sample` mode.
+
+    Returns:
+        Callable[[Any], bool]: Validator. Compiled validators are cached per (lock, mode, size).
+
+    Raises:
+        ValueError: If `type_lock` or `elements` is not supported.
+    """
+    if elements not in ELEMENT_MODES:
+        raise ValueError(f"Invalid element mode: {elements!r}")
+    if not isinstance(sample_size, int) or sample_size < 1:
+        raise ValueError(f"Invalid sample size: {sample_size!r}")
+    try:
+        hash(type_lock)
+    except TypeError:
+        check = _compile(type_lock, elements, sample_size)
+    else:
+        check = _compile_cached(type_lock, elements, sample_size)
+    try:
+        _MODES[check] = elements
+    except TypeError:  # builtins such as `callable` ignore the mode anyway
+        pass
+    return check
+
+
+# element mode each compiled validator was built with; validators shared between modes ignore it
+_MODES = weakref.WeakKeyDictionary()
+
+
+def element_mode(check) -> str:
+    """Return the `elements` mode `check` was compiled with by `compile_type_lock` (`sample` if unknown)."""
+    try:
+        return _MODES.get(check, "sample")
+    except TypeError:
+        return "sample"
+
+
+def _always(value) -> bool:
+    return True
+
+
+def _is_none(value) -> bool:
+    return value is None
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(type_lock, elements: str, sample_size: int):
+    return _compile(type_lock, elements, sample_size)
+
+
+# `X | Y` unions have their own origin from Python 3.10
+_UnionType = getattr(types, "UnionType", None)
+
+
+def _compile(type_lock, elements: str, sample_size: int):
+    """Build the validator for `type_lock`. See `compile_type_lock`."""
+    if type_lock is typing.Any or type_lock is object:
+        return _always
+    if type_lock is None or type_lock is type(None):
+        return _is_none
+    if isinstance(type_lock, typing.TypeVar):
+        bound = type_lock.__bound__
+        return _compile(bound, elements, sample_size) if bound is not None else _always
+    # NewType is a function before Python 3.10 and a class after; both carry __supertype__
+    if hasattr(type_lock, "__supertype__"):
+        return _compile(type_lock.__supertype__, elements, sample_size)
+
+    origin = typing.get_origin(type_lock)
+    args = typing.get_args(type_lock)
+
+    if origin is None:
+        if isinstance(type_lock, type):
+            return lambda value: isinstance(value, type_lock)
+        raise ValueError(f"Unsupported type lock: {type_lock!r}")
+    if origin is typing.Annotated:
+        return _compile(args[0], elements, sample_size)
+    if origin is typing.Union or origin is _UnionType:
+        if all(isinstance(a, type) for a in args):
+            return lambda value: isinstance(value, args)
+        checks = tuple(_compile(a, elements, sample_size) for a in args)
+        return lambda value: any(check(value) for check in checks)
+    if origin is typing.Literal:
+        return lambda value: any(value == a and type(value) is type(a) for a in args)
+    if not isinstance(origin, type):
+        raise ValueError(f"Unsupported type lock: {type_lock!r}")
+    if origin is type:
+        if not args or not isinstance(args[0], type):
+            return lambda value: isinstance(value, type)
+        return lambda value: isinstance(value, type) and issubclass(value, args[0])
+    if issubclass(origin, abc.Callable) and not issubclass(origin, abc.Iterable):
+        return callable
+
+    if not args or elements == "none":
+        return lambda value: isinstance(value, origin)
+
+    if issubclass(origin, tuple):
+        if len(args) == 2 and args[1] is Ellipsis:
+            each = _compile(args[0], elements, sample_size)
+            return lambda value: isinstance(value, origin) and _each(value, each, elements, sample_size)
+        if args == ((),):
+            return lambda value: isinstance(value, origin) and not value
+        positional = tuple(_compile(a, elements, sample_size) for a in args)
+        return lambda value: (
+            isinstance(value, origin)
+            and len(value) == len(positional)
+            and all(check(v) for check, v in zip(positional, value))
+        )
+    if issubclass(origin, abc.Mapping) and len(args) == 2:
+        key_check = _compile(args[0], elements, sample_size)
+        val_check = _compile(args[1], elements, sample_size)
+        pair = lambda kv: key_check(kv[0]) and val_check(kv[1])
+        return lambda value: isinstance(value, origin) and _each(value.items(), pair, elements, sample_size)
+    if issubclass(origin, abc.Iterable) and len(args) == 1:
+        each = _compile(args[0], elements, sample_size)
+        if issubclass(origin, abc.Iterator):
+            # consuming an iterator to validate it would empty it
+            return lambda value: isinstance(value, origin)
+        return lambda value: isinstance(value, origin) and _each(value, each, elements, sample_size)
+    return lambda value: isinstance(value, origin)
+
+
+def _each(items, check, elements: str, sample_size: int) -> bool:
+    """Return True if `check` holds for the elements of `items` selected by `elements` mode."""
+    if elements == "full":
+        return all(map(check, items))
+    if isinstance(items, abc.Sequence):
+        size = len(items)
+        if size <= sample_size:
+            return all(map(check, items))
+        # exactly `sample_size` evenly spaced indices, first and last included
+        last, span = size - 1, sample_size - 1
+        if not span:
+            return check(items[last])
+        return all(check(items[i * last // span]) for i in range(sample_size))
+    return all(map(check, islice(items, sample_size)))
@@ -0,0 +1,57 @@
+"""
+Change journal for incremental sync of Data.
+
+A `Journal` is a change hook (see `Data._hooks`): the write primitives hand it every change as
+a compact op tuple, and it stamps each op with the next version number and keeps the newest
+`capacity` of them in a ring buffer. `Data.enable_journal` attaches one, `Data.export_delta(since)`
+returns the ops newer than `since`, and `Data.apply_delta(ops)` replays them on a replica.
+
+Ops are `(version, kind, key[, arg])` tuples:
+  - `("set", key, value)` / `("erase", key)`
+  - `("protect", key)` / `("unprotect", key)`
+  - `("type", key, type_lock, elements)` / `("untype", key)`, where `elements` is the lock's
+    element mode (see `Data.add_typing`); ops without it replay in `sample` mode
+  - `("kwarg", key)` / `("unkwarg", key)`
+"""
+from collections import deque
+from itertools import islice
+
+OPS = ("set", "erase", "protect", "unprotect", "type", "untype", "kwarg", "unkwarg")
+
+
+class Journal:
+    """Versioned ring buffer of change ops. `version` is the version of the newest op (0 before any)."""
+
+    __slots__ = ("version", "ops")
+
+    def __init__(self, capacity: int = 4096, version: int = 0):
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError(capacity)
+        self.version = version
+        self.ops = deque(maxlen=capacity)
+
+    def __call__(self, op: tuple):
+        self.version += 1
+        self.ops.append((self.version, *op))
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of ops kept."""
+        return self.ops.maxlen
+
+    @property
+    def oldest(self) -> int:
+        """Return the oldest version a delta can start from."""
+        return self.version - len(self.ops)
+
+    def since(self, version: int) -> list[tuple]:
+        """Return the ops newer than `version`, oldest first. Raises ValueError if some were already dropped."""
+        if not isinstance(version, int) or version > self.version:
+            raise ValueError(f"Unknown journal version: {version!r}")
+        if version < self.oldest:
+            raise ValueError(f"Journal truncated: oldest available version is {self.oldest}, asked for {version}.")
+        return list(islice(self.ops, len(self.ops) - (self.version - version), None))
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<Journal v{self.version}: {len(self.ops)}/{self.capacity} ops>"
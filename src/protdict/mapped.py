@@ -0,0 +1,259 @@
+"""
+Read-only Data over a memory-mapped binary snapshot.
+
+`MappedData` opens a snapshot written with `Data.save_binary(path, index=True)` and
+decodes nothing up front: the key directory in the file finds a key in O(1), and only
+the value asked for is decoded. Because the file is mapped read-only, its pages are
+shared through the OS page cache by every process that opens it.
+"""
+import mmap
+import os
+from collections.abc import ItemsView, Mapping
+
+from . import binary
+from .data_class import PROTECTED, TYPED, KWARG, _TABLES, Data, ReadOnlyError, _fold
+from .functional_utils.types import compile_type_lock
+
+
+class _MappedValues(Mapping):
+    """The value store of a MappedData: key -> value, decoded on access."""
+
+    __slots__ = ("_reader", "_zero_copy")
+
+    def __init__(self, reader: binary.SnapshotReader, zero_copy: bool):
+        self._reader = reader
+        self._zero_copy = zero_copy
+
+    def __getitem__(self, key):
+        i = self._reader.find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._reader.value(i, self._zero_copy)
+
+    def __contains__(self, key) -> bool:
+        return self._reader.find(key) >= 0
+
+    def __len__(self) -> int:
+        return self._reader.count
+
+    def __iter__(self):
+        return iter(self._reader.keys())
+
+    def items(self):
+        return _MappedItems(self)
+
+    def copy(self) -> dict:
+        """Return every key and value decoded into a dict."""
+        return dict(_MappedItems(self))
+
+
+class _MappedItems(ItemsView):
+    """Items of a _MappedValues, decoded column by column instead of key by key."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        values = self._mapping
+        return zip(values._reader.keys(), values._reader.values(values._zero_copy))
+
+
+class _MappedTags(Mapping):
+    """Keys carrying tag `bit` -> their flags (bit 0), type lock (TYPED) or original value (KWARG)."""
+
+    __slots__ = ("_reader", "_bit", "_len")
+
+    def __init__(self, reader: binary.SnapshotReader, bit: int = 0):
+        self._reader = reader
+        self._bit = bit
+        self._len = None
+
+    def _find(self, key) -> int:
+        i = self._reader.find(key)
+        if i < 0:
+            return -1
+        flags = self._reader.flags(i)
+        return i if flags and (not self._bit or flags & self._bit) else -1
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        if self._bit == TYPED:
+            return self._reader.lock(i)
+        if self._bit == KWARG:
+            return self._reader.value(i)
+        return self._reader.flags(i)
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) >= 0
+
+    def _positions(self):
+        bit = self._bit
+        reader = self._reader
+        return (i for i, bits, *_ in reader.tags() if not bit or bits & bit)
+
+    def __iter__(self):
+        reader = self._reader
+        return (reader.key(i) for i in self._positions())
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self._positions())
+        return self._len
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+
+class _MappedChecks(Mapping):
+    """Compiled validators for the type locks of a MappedData, built on first use in their saved element mode."""
+
+    __slots__ = ("_types",)
+
+    def __init__(self, types: _MappedTags):
+        self._types = types
+
+    def __getitem__(self, key):
+        types = self._types
+        i = types._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return compile_type_lock(types._reader.lock(i), types._reader.lock_mode(i))
+
+    def __iter__(self):
+        return iter(self._types)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+
+class MappedData(Data):
+    """
+    Read-only Data backed by a snapshot file (or any buffer) saved with `index=True`.
+    Opening is O(1) in the number of keys; `get`, `[]`, `tags`, `hasprop` and `in` decode
+    only the key asked for. Every mutating method raises `ReadOnlyError`.
+    Use `to_data()` (or `clone()`) for a writable copy, and `close()` or a `with` block to unmap the file.
+    """
+
+    __slots__ = ("_reader", "_mmap", "_protection_index")
+    _banned_attr = Data._banned_attr | {"_reader", "_mmap", "_protection_index"}
+
+    def __init__(self, source, zero_copy: bool = False):
+        """
+        Open `source`: a path to a snapshot file, or a bytes-like buffer holding one.
+          - `zero_copy`: return bytes, bytearray and array values as memoryviews into the mapping
+        Raises ValueError if the snapshot was not saved with `index=True`.
+        """
+        mapping = None
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as fp:
+                mapping = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            source = mapping
+        reader = binary.SnapshotReader(source)
+        if not reader.has_index:
+            reader.close()
+            if mapping is not None:
+                mapping.close()
+            raise ValueError("Snapshot has no key directory; save it with index=True.")
+        self._mmap = mapping
+        self._sink = None
+        self._hooks = ()
+        self._bind(reader, zero_copy)
+
+    def _bind(self, reader: binary.SnapshotReader, zero_copy: bool):
+        """Internal function pointing every table at `reader`. No return."""
+        self._reader = reader
+        self._protection_index = None
+        self._values = _MappedValues(reader, zero_copy)
+        self._og_list = None
+        self._flags = _MappedTags(reader)
+        self._types = _MappedTags(reader, TYPED)
+        self._og_protects = _MappedTags(reader, KWARG)
+        self._checks = _MappedChecks(self._types)
+        self._shared = _TABLES
+        self._readonly = True
+
+    @property
+    def _protected_attr(self) -> dict:
+        """Protection index (folded name -> spelling), built from the tagged keys on first use."""
+        index = self._protection_index
+        if index is None:
+            reader = self._reader
+            index = {}
+            for i, bits, *_ in reader.tags():
+                if bits & PROTECTED:
+                    key = reader.key(i)
+                    index.setdefault(_fold(key), key)
+            self._protection_index = index
+        return index
+
+    @property
+    def _hidden(self) -> int:
+        """Number of stored keys hidden by protection."""
+        return len(self._protected_attr)
+
+    def _is_protected(self, name) -> bool:
+        """Return True if `name` is a protected key. O(1) straight from the snapshot."""
+        if not isinstance(name, str):
+            return False
+        i = self._reader.find(name)
+        return i >= 0 and bool(self._reader.flags(i) & PROTECTED)
+
+    def _refuse(self, *args, **kwargs):
+        raise ReadOnlyError("MappedData is read-only; use to_data() for a writable copy.")
+
+    set = oset = sets = osets = set_many = update = swap = _refuse
+    erase = oerase = grab = ograb = clear = _refuse
+    protect = unprotect = ounprotect = _refuse
+    add_typing = remove_typing = set_all_typings = rem_all_typings = _refuse
+    merge_dict = absorb = compare_and_set = __setitem__ = __delitem__ = _refuse
+
+    @classmethod
+    def _not_from_pairs(cls, *args, **kwargs):
+        raise TypeError(
+            f"A {cls.__name__} reads an indexed snapshot; build a Data instead, "
+            "then save_binary(path, index=True) and open the file with MappedData(path)."
+        )
+
+    from_iter = load = _not_from_pairs
+
+    @classmethod
+    def load_binary(cls, path, zero_copy: bool = False) -> "MappedData":
+        """Same as `MappedData(path, zero_copy)`: map a snapshot saved with `index=True` instead of loading it."""
+        return MappedData(path, zero_copy)
+
+    def to_data(self) -> Data:
+        """Return a regular, writable Data holding every key, value and tag. O(n)."""
+        return binary.build(self._reader, Data)
+
+    def clone(self) -> Data:
+        """Same as `to_data()`; the copy does not depend on the mapping."""
+        return self.to_data()
+
+    def __reduce_ex__(self, protocol):
+        """Pickle as a read-only plain Data; the mapping itself cannot cross processes."""
+        return self.to_data().snapshot().__reduce_ex__(protocol)
+
+    def snapshot(self) -> "MappedData":
+        """Return self; a MappedData never changes."""
+        return self
+
+    def close(self):
+        """Release the snapshot buffer and unmap the file. Values returned with `zero_copy` must be released first. No return."""
+        self._reader.close()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "MappedData":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<MappedData: {len(self)} keys>"
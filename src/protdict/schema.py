@@ -0,0 +1,214 @@
+"""
+Shared schemas for many Data records with the same keys, tags and type locks.
+
+A `DataSchema` holds the key order, protection index, tag bits and type locks once.
+Records made with `DataSchema.new` keep only their values, in a list laid out by the
+schema's key order, and share every other table with the schema until a record
+diverges (protects, locks or tags something), at which point that record copies the
+table it writes to, exactly like `Data.clone`.
+"""
+from collections.abc import Mapping, MutableMapping
+
+from .data_class import _TABLES, Data, _fold
+
+_MISSING = object()
+# records own their values from the start; everything else is shared with the schema
+_RECORD_SHARED = _TABLES - {"_values"}
+
+
+class SlotValues(MutableMapping):
+    """
+    Value store of a schema record: schema keys map to fixed list positions, any other
+    key goes to a small overflow dict created on first use. Iterates in schema order, then overflow order.
+    """
+
+    __slots__ = ("_index", "_slots", "_extra", "_gone")
+
+    def __init__(self, index: dict, slots: list, extra: dict = None, gone: int = 0):
+        self._index = index
+        self._slots = slots
+        self._extra = extra
+        self._gone = gone
+
+    def __getitem__(self, key):
+        i = self._index.get(key)
+        if i is not None:
+            val = self._slots[i]
+            if val is not _MISSING:
+                return val
+        elif self._extra is not None:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        if i is not None:
+            val = self._slots[i]
+            return default if val is _MISSING else val
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key) -> bool:
+        i = self._index.get(key)
+        if i is not None:
+            return self._slots[i] is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key, val):
+        i = self._index.get(key)
+        if i is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = val
+            return
+        if self._slots[i] is _MISSING:
+            self._gone -= 1
+        self._slots[i] = val
+
+    def __delitem__(self, key):
+        i = self._index.get(key)
+        if i is None:
+            if self._extra is None:
+                raise KeyError(key)
+            del self._extra[key]
+        elif self._slots[i] is _MISSING:
+            raise KeyError(key)
+        else:
+            self._slots[i] = _MISSING
+            self._gone += 1
+
+    def __iter__(self):
+        if self._gone:
+            yield from (k for k, v in zip(self._index, self._slots) if v is not _MISSING)
+        else:
+            yield from self._index
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(self._slots) - self._gone + (len(self._extra) if self._extra else 0)
+
+    def copy(self) -> "SlotValues":
+        """Return a SlotValues with the same schema and a copy of the values."""
+        extra = dict(self._extra) if self._extra else None
+        return SlotValues(self._index, self._slots.copy(), extra, self._gone)
+
+    def __repr__(self) -> str:
+        return f"SlotValues({dict(self.items())})"
+
+
+class DataSchema:
+    """Keys, tags and type locks shared by every record built with `new`."""
+
+    __slots__ = (
+        "_index", "_defaults", "_og_protects", "_types", "_checks", "_protected_attr", "_flags", "_hidden",
+    )
+
+    def __init__(self, template: Data):
+        """Take the layout of `template` (a Data). Prefer the `from_data`, `from_export` and `from_tags` constructors."""
+        if not isinstance(template, Data):
+            raise ValueError("Argument must be a Data object.")
+        self._index = {key: i for i, key in enumerate(template._values)}
+        self._defaults = list(template._values.values())
+        self._og_protects = dict(template._og_protects)
+        self._types = dict(template._types)
+        self._checks = dict(template._checks)
+        self._protected_attr = dict(template._protected_attr)
+        self._flags = dict(template._flags)
+        self._hidden = template._hidden
+
+    @classmethod
+    def from_data(cls, data: Data) -> "DataSchema":
+        """Build a schema from an existing Data. Its current values become the defaults."""
+        return cls(data)
+
+    @classmethod
+    def from_export(cls, exported: dict) -> "DataSchema":
+        """Build a schema from the output of `Data.export()`. Tags are parsed once, here."""
+        return cls(Data(exported))
+
+    @classmethod
+    def from_tags(cls, tags_by_key: dict, types: dict = None) -> "DataSchema":
+        """
+        Build a schema from the output of `Data.tags_by_key()`. Defaults are None.
+          - `types`: {key: type lock} for every key tagged `typed` (any lock `add_typing` accepts)
+        Raises ValueError on unknown tags or typed keys without a lock.
+        """
+        types = types or {}
+        data = Data({})
+        data._og_list = None
+        for key, tags in tags_by_key.items():
+            data._put(key, None)
+            for tag in tags:
+                if tag == "protected":
+                    data._add_protection(key)
+                elif tag == "typed":
+                    if key not in types:
+                        raise ValueError(f"No type lock given for typed key: {key}")
+                    data._lock(key, types[key])
+                elif tag == "kwarg":
+                    data._mark_kwarg(key, None)
+                    data._add_protection(key)
+                elif tag != "none":
+                    raise ValueError(f"Invalid tag: {tag!r}")
+        return cls(data)
+
+    def keys(self) -> list[str]:
+        """Return the schema keys in order."""
+        return list(self._index)
+
+    def __len__(self) -> int:
+        """Return number of schema keys."""
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<DataSchema: {self.keys()}>"
+
+    def new(self, values=None) -> Data:
+        """
+        Build a Data record without parsing tags. `values` is one of:
+          - None: the schema defaults
+          - a sequence with one value per schema key, in schema order
+          - a mapping; schema keys it lacks keep their defaults, other keys are added unprotected
+            (skipped if they clash with a protected or banned name)
+        Values are not checked against the type locks, as in `Data.__init__`. O(len(values)).
+        """
+        extra = None
+        if values is None:
+            slots = self._defaults.copy()
+        elif isinstance(values, Mapping):
+            slots = self._defaults.copy()
+            index = self._index
+            for key, val in values.items():
+                i = index.get(key)
+                if i is None:
+                    if not isinstance(key, str):
+                        raise TypeError(f"attribute name must be string, not '{type(key).__name__}'")
+                    folded = _fold(key)
+                    if folded in self._protected_attr or folded in Data._banned_attr:
+                        continue
+                    if extra is None:
+                        extra = {}
+                    extra[key] = val
+                else:
+                    slots[i] = val
+        else:
+            slots = list(values)
+            if len(slots) != len(self._defaults):
+                raise ValueError(f"Expected {len(self._defaults)} values, got {len(slots)}.")
+        record = Data.__new__(Data)
+        record._values = SlotValues(self._index, slots, extra)
+        record._og_list = None
+        record._og_protects = self._og_protects
+        record._types = self._types
+        record._checks = self._checks
+        record._protected_attr = self._protected_attr
+        record._flags = self._flags
+        record._hidden = self._hidden
+        record._shared = _RECORD_SHARED
+        record._readonly = False
+        record._sink = None
+        record._hooks = ()
+        return record
@@ -0,0 +1,455 @@
+"""
+Hash-partitioned Data for write-heavy, multi-threaded use.
+
+`ShardedData` spreads keys over N `ConcurrentData` shards by the hash of the case-folded
+key, so a key and every other spelling of it (which protection treats as the same name)
+always land on the same shard. Each shard has its own lock and its own protection and
+type tables, so writes to different shards never wait for each other. Single-key methods
+go straight to one shard; whole-object methods fan out and combine the shard results.
+"""
+from contextlib import ExitStack, contextmanager
+from itertools import chain
+
+from .concurrency import ConcurrentData, RWLock
+from .data_class import Data, _fold, _recall_input
+
+
+def _adopt(data: Data) -> ConcurrentData:
+    """Wrap the tables of `data` (e.g. a clone) in a ConcurrentData with a fresh lock."""
+    twin = ConcurrentData.__new__(ConcurrentData)
+    twin._rwlock = RWLock()
+    for name in Data.__slots__:
+        if name != "__weakref__":
+            object.__setattr__(twin, name, getattr(data, name))
+    return twin
+
+
+def _routed(name: str):
+    """Build a method forwarding `name` to the shard owning its first argument."""
+    method = getattr(ConcurrentData, name)
+
+    def forward(self, key, *args, **kwargs):
+        return method(self._shard(key), key, *args, **kwargs)
+
+    forward.__name__ = name
+    forward.__doc__ = method.__doc__
+    return forward
+
+
+def _gathered(name: str):
+    """Build a method concatenating the list results of `name` across shards."""
+    method = getattr(ConcurrentData, name)
+
+    def gather(self, *args, **kwargs):
+        return list(chain.from_iterable(method(shard, *args, **kwargs) for shard in self._shards))
+
+    gather.__name__ = name
+    gather.__doc__ = method.__doc__
+    return gather
+
+
+class _Transactions:
+    """What `ShardedData.transaction()` yields: `rollback()` undoes the block's writes on every shard."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, parts: list):
+        self._parts = parts
+
+    def rollback(self):
+        """Undo the writes made since the block started, on every shard. No return."""
+        for tx in self._parts:
+            tx.rollback()
+
+
+def _unpickle(count: int, parts: list) -> "ShardedData":
+    """Rebuild a pickled ShardedData. Keys are routed again: str hashes differ between processes."""
+    values = [{} for _ in range(count)]
+    tags = [[] for _ in range(count)]
+    for part in parts:
+        for key, val in part._values.items():
+            values[ShardedData._index(key, count)][key] = val
+        for entry in part._tag_entries():
+            tags[ShardedData._index(entry[0], count)].append(entry)
+    twin = ShardedData.__new__(ShardedData)
+    twin._shards = [_adopt(Data._from_tables(vals, tagged)) for vals, tagged in zip(values, tags)]
+    twin._input = None
+    return twin
+
+
+class ShardedData:
+    """
+    Data-compatible store partitioned over `shards` ConcurrentData instances.
+    Key order follows the shards, not insertion. `keys`/`values`/`items` return lists, not live views.
+    """
+
+    __slots__ = ("_shards", "_input", "__weakref__")
+
+    def __init__(
+        self, data_dictionary: dict = None, initial_typing: bool = False, shards: int = 8, retain_input: str = "drop",
+        **kwargs
+    ):
+        """
+        Initialize like `Data`, plus:
+          - `shards`: number of partitions (each with its own lock and tag tables)
+        `retain_input` applies to `data_dictionary` as a whole; the shards keep nothing.
+        """
+        if not isinstance(shards, int) or shards < 1:
+            raise ValueError(shards)
+        self._input = Data._retain(data_dictionary, retain_input) if data_dictionary is not None else None
+        parts = [{} for _ in range(shards)]
+        kw_parts = [{} for _ in range(shards)]
+        for key, raw in (data_dictionary or {}).items():
+            parts[self._index(key, shards)][key] = raw
+        for key, raw in kwargs.items():
+            kw_parts[self._index(key, shards)][key] = raw
+        self._shards = [
+            ConcurrentData(part, initial_typing, **kw_part) for part, kw_part in zip(parts, kw_parts)
+        ]
+
+    @staticmethod
+    def _index(key, n: int) -> int:
+        return hash(_fold(key) if isinstance(key, str) else key) % n
+
+    def _shard(self, key) -> ConcurrentData:
+        """Internal function returning the shard that owns `key`."""
+        shards = self._shards
+        return shards[hash(_fold(key) if isinstance(key, str) else key) % len(shards)]
+
+    def _partition(self, mapping: dict) -> dict:
+        """Internal function splitting `mapping` into {shard index: sub-dict}. Raises TypeError on non-str keys."""
+        n = len(self._shards)
+        parts: dict = {}
+        for key, val in mapping.items():
+            if not isinstance(key, str):
+                raise TypeError(f"attribute name must be string, not '{type(key).__name__}'")
+            parts.setdefault(self._index(key, n), {})[key] = val
+        return parts
+
+    def _writing(self, indices) -> ExitStack:
+        """Internal function holding the write locks of the shards in `indices`, always taken in index order."""
+        stack = ExitStack()
+        for i in sorted(indices):
+            stack.enter_context(self._shards[i].writing())
+        return stack
+
+    def _combined(self) -> Data:
+        """Internal function merging the shards' values and tags into one plain Data, reading each shard under its lock."""
+        values: dict = {}
+        tags: list = []
+        for shard in self._shards:
+            with shard.reading():
+                values.update(shard._values)
+                tags.extend(shard._tag_entries())
+        return Data._from_tables(values, tags)
+
+    def __getattr__(self, name):
+        """Route value reads to the owning shard. Data attributes ShardedData does not define are not forwarded:
+        on one shard they would see only part of the keys (and journal versions are per shard)."""
+        if name.startswith("__") or hasattr(Data, name):
+            raise AttributeError(f"'ShardedData' object has no attribute '{name}'")
+        return getattr(self._shard(name), name)
+
+    def __setattr__(self, name, value):
+        """Route attribute writes to the owning shard (`_shards` and `_input` go to their slots)."""
+        if name in ("_shards", "_input"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._shard(name), name, value)
+
+    def __delattr__(self, name):
+        """Route attribute deletes to the owning shard."""
+        delattr(self._shard(name), name)
+
+    def original_input(self) -> dict:
+        """Return the `data_dictionary` as far as `retain_input` kept it (see `Data.original_input`), else None."""
+        return _recall_input(self._input)
+
+    @property
+    def shards(self) -> int:
+        """Return number of shards."""
+        return len(self._shards)
+
+    def shard(self, key: str) -> ConcurrentData:
+        """Return the shard that owns `key`, e.g. to hold its lock around several calls."""
+        return self._shard(key)
+
+    # single-key methods go to one shard
+
+    hasprop = _routed("hasprop")
+    get = _routed("get")
+    set = _routed("set")
+    oset = _routed("oset")
+    erase = _routed("erase")
+    oerase = _routed("oerase")
+    protect = _routed("protect")
+    unprotect = _routed("unprotect")
+    ounprotect = _routed("ounprotect")
+    add_typing = _routed("add_typing")
+    remove_typing = _routed("remove_typing")
+    tags = _routed("tags")
+    swap = _routed("swap")
+    grab = _routed("grab")
+    ograb = _routed("ograb")
+    compare_and_set = _routed("compare_and_set")
+    __getitem__ = _routed("__getitem__")
+    __setitem__ = _routed("__setitem__")
+    __delitem__ = _routed("__delitem__")
+    __contains__ = _routed("__contains__")
+
+    # whole-object methods fan out
+
+    keys_with = _gathered("keys_with")
+    bundle_keys = _gathered("bundle_keys")
+    protected_keys = _gathered("protected_keys")
+    typed_keys = _gathered("typed_keys")
+    kwarg_keys = _gathered("kwarg_keys")
+    unprotected_keys = _gathered("unprotected_keys")
+
+    def keys(self, include_protected: bool = True) -> list[str]:
+        """Return list of property names. `include_protected` (bool) to include protected."""
+        return [k for shard in self._shards for k in shard.keys(include_protected)]
+
+    def values(self, include_protected: bool = True) -> list:
+        """Return list of property values. `include_protected` (bool) to include protected."""
+        return list(self.as_dict(include_protected).values())
+
+    def items(self, include_protected: bool = True) -> list[tuple]:
+        """Return list of (key, value) pairs. `include_protected` (bool) to include protected."""
+        return list(self.as_dict(include_protected).items())
+
+    def as_dict(self, include_protected: bool = True) -> dict:
+        """Return dict of attrs. `include_protected` (bool) to include protected."""
+        out: dict = {}
+        for shard in self._shards:
+            out.update(shard.as_dict(include_protected))
+        return out
+
+    def export(self) -> dict:
+        """Return the combined `Data.export()` of every shard; `ShardedData(...)` and `Data(...)` accept it."""
+        out: dict = {}
+        for shard in self._shards:
+            out.update(shard.export())
+        return out
+
+    def iter_export(self):
+        """Lazily yield `(key, value, tags)` shard by shard (see `Data.iter_export`)."""
+        for shard in self._shards:
+            with shard.reading():
+                yield from shard.iter_export()
+
+    export_to = Data.export_to
+
+    def tags_by_key(self) -> dict[str, list]:
+        """Return a dict where each property is tagged with `protected`, `typed`, `kwarg`, `none`."""
+        out: dict = {}
+        for shard in self._shards:
+            out.update(shard.tags_by_key())
+        return out
+
+    def keys_by_tag(self) -> dict[str, list[str]]:
+        """Return a dict where each tag (`protected`, `typed`, `kwarg`, `none`) maps to a list of properties that have that tag."""
+        out: dict = {"protected": [], "typed": [], "kwarg": [], "none": []}
+        for shard in self._shards:
+            for tag, keys in shard.keys_by_tag().items():
+                out[tag].extend(keys)
+        return out
+
+    def set_many(self, mapping: dict, *, override: bool = False, on_type_error: str = "skip") -> dict:
+        """
+        `Data.set_many` across shards. Every shard touched is locked for the whole call, so with
+        `on_type_error="raise"` nothing is applied anywhere if any value is rejected. Returns the combined report.
+        """
+        if on_type_error not in ("skip", "raise", "collect"):
+            raise ValueError(on_type_error)
+        parts = self._partition(mapping)
+        shards = self._shards
+        report: dict = {"applied": [], "protected": [], "type_error": []}
+        if on_type_error == "collect":
+            report["rejected"] = {}
+        with self._writing(parts):
+            if on_type_error == "raise":
+                rejected = [
+                    (i, k, v) for i, part in parts.items() for k, v in part.items()
+                    if (override or not shards[i]._procheck(k)) and not shards[i]._check_for_type(k, v)
+                ]
+                if rejected:
+                    for i, k, v in rejected:
+                        shards[i]._typederr(k, v)
+                    raise ValueError(f"Type lock rejected {len(rejected)} key(s): {[k for _, k, _ in rejected]}")
+            for i, part in parts.items():
+                sub = shards[i].set_many(part, override=override, on_type_error=on_type_error)
+                for name, found in sub.items():
+                    if name == "rejected":
+                        report[name].update(found)
+                    else:
+                        report[name].extend(found)
+        return report
+
+    def sets(self, **kwargs) -> int:
+        """Set multiple `kwargs`. Returns int count of set."""
+        return len(self.set_many(kwargs)["applied"])
+
+    def osets(self, **kwargs) -> int:
+        """Overwrite multiple `kwargs`. Returns int count of set."""
+        return sum(1 for k, v in kwargs.items() if self.oset(k, v))
+
+    def update(self, other: dict):
+        """Update from `other` dict (like dict.update), respecting protection & typing. Returns None."""
+        self.set_many(other)
+
+    def merge_dict(
+        self,
+        new_data: dict,
+        overwrite_current: bool = False,
+        protect_current: bool = False,
+        protect_new_added_keys: bool = False,
+        atomic: bool = False
+    ) -> bool:
+        """`Data.merge_dict` across shards. With `atomic`, every shard touched is checked before any is changed.
+        Returns True if changed."""
+        parts = self._partition(new_data)
+        shards = self._shards
+        with self._writing(parts):
+            if atomic:
+                for i, part in parts.items():
+                    shard = shards[i]
+                    for key, val in part.items():
+                        if shard._procheck(key) or (not overwrite_current and shard.hasprop(key, False)):
+                            continue
+                        if not shard._check_for_type(key, val):
+                            shard._typederr(key, val)
+                            return False
+            changed = False
+            for i, part in parts.items():
+                if shards[i].merge_dict(part, overwrite_current, protect_current, protect_new_added_keys):
+                    changed = True
+        return changed
+
+    def absorb(self, other, include_protected: bool = False, overwrite: bool = False) -> bool:
+        """Absorb from `other` (a Data or ShardedData). `include_protected`, `overwrite` (bool). Returns True if changed."""
+        if not isinstance(other, (Data, ShardedData)):
+            raise ValueError("Argument must be a Data object.")
+        changed = False
+        for i, part in self._partition(other.as_dict(include_protected)).items():
+            # _from_tables takes the values as-is, without reading {"value", "tags"} dicts
+            if self._shards[i].absorb(Data._from_tables(part, ()), True, overwrite):
+                changed = True
+        return changed
+
+    def clear(self):
+        """Remove all non-banned, non-protected properties."""
+        for shard in self._shards:
+            shard.clear()
+
+    def set_all_typings(self, protected_only: bool = False) -> int:
+        """Lock types for all properties. `protected_only` (bool) if True only protected. Returns int count."""
+        return sum(shard.set_all_typings(protected_only) for shard in self._shards)
+
+    def rem_all_typings(self, keep_protected: bool = True) -> int:
+        """Unlock types for all. `keep_protected` (bool) if True keep protected. Returns int count."""
+        return sum(shard.rem_all_typings(keep_protected) for shard in self._shards)
+
+    def set_violation_sink(self, sink=None):
+        """Send every shard's type violations to `sink` (see `Data.set_violation_sink`). No return."""
+        for shard in self._shards:
+            shard.set_violation_sink(sink)
+
+    def violation_counts(self) -> dict:
+        """Return {key: count} of type violations, combined across shards."""
+        out: dict = {}
+        for shard in self._shards:
+            for key, count in shard.violation_counts().items():
+                out[key] = max(out.get(key, 0), count)
+        return out
+
+    def save_binary(self, path, index: bool = False) -> int:
+        """Write every shard to `path` as one binary snapshot (see `Data.save_binary`); `Data.load_binary` reads it.
+        Returns int bytes written."""
+        return self._combined().save_binary(path, index)
+
+    def fingerprint(self) -> int:
+        """Return the fingerprint of the values across shards; equal to `Data.fingerprint()` of a Data with the same values."""
+        return sum(shard.fingerprint() for shard in self._shards) & ((1 << 64) - 1)
+
+    def diff(self, other) -> dict:
+        """
+        Return what turns this object into `other` (a Data or ShardedData), in the form of `Data.diff`.
+        Against a ShardedData with the same number of shards the shards are compared pairwise,
+        keeping their cached fingerprints; anything else is compared with the shards merged (O(n)).
+        """
+        if not isinstance(other, (Data, ShardedData)):
+            raise ValueError("Argument must be a Data object.")
+        if isinstance(other, ShardedData) and len(other._shards) == len(self._shards):
+            out: dict = {"added": {}, "removed": [], "changed": {}, "tags": {}, "types": {}}
+            for mine, theirs in zip(self._shards, other._shards):
+                for part, found in mine.diff(theirs).items():
+                    if part == "removed":
+                        out[part].extend(found)
+                    else:
+                        out[part].update(found)
+            return out
+        theirs = other._combined() if isinstance(other, ShardedData) else other.snapshot()
+        return self._combined().diff(theirs)
+
+    def patch(self, diff: dict) -> int:
+        """Apply a `diff` result on the owning shards, with every shard touched locked for the whole call
+        (see `Data.patch`). Returns int count of keys whose value, tags or type lock changed."""
+        n = len(self._shards)
+        parts: dict = {}
+        for part, found in diff.items():
+            for key in found:
+                sub = parts.setdefault(self._index(key, n), {})
+                if part == "removed":
+                    sub.setdefault(part, []).append(key)
+                else:
+                    sub.setdefault(part, {})[key] = found[key]
+        with self._writing(parts):
+            return sum(self._shards[i].patch(sub) for i, sub in parts.items())
+
+    @contextmanager
+    def transaction(self):
+        """
+        `Data.transaction` across shards: every shard's write lock is held for the whole block, and if
+        the block raises, every shard is rolled back. Other threads wait on the block, so keep it short.
+        """
+        with self._writing(range(len(self._shards))) as stack:
+            yield _Transactions([stack.enter_context(shard.transaction()) for shard in self._shards])
+
+    def _copy(self, readonly: bool) -> "ShardedData":
+        twin = ShardedData.__new__(ShardedData)
+        twin._shards = [_adopt(shard.snapshot() if readonly else shard.clone()) for shard in self._shards]
+        twin._input = self._input
+        return twin
+
+    def __reduce_ex__(self, protocol):
+        """Pickle the shards as plain Data (see `Data.__reduce_ex__`); keys are re-partitioned on load."""
+        return _unpickle, (len(self._shards), [shard.snapshot() for shard in self._shards])
+
+    def clone(self) -> "ShardedData":
+        """Returns a copy with the same sharding; each shard shares storage with its original until either side writes."""
+        return self._copy(False)
+
+    def snapshot(self) -> "ShardedData":
+        """Returns a read-only copy; writing to it raises `ReadOnlyError`."""
+        return self._copy(True)
+
+    def __len__(self) -> int:
+        """Return count of properties across shards."""
+        return sum(len(shard) for shard in self._shards)
+
+    def __iter__(self):
+        """Iterate over property names, shard by shard."""
+        return chain.from_iterable(list(shard) for shard in self._shards)
+
+    def __bool__(self) -> bool:
+        """True if there's at least one property."""
+        return any(self._shards)
+
+    def __eq__(self, other) -> bool:
+        """Compare by visible contents with another ShardedData or Data."""
+        return isinstance(other, (Data, ShardedData)) and self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<ShardedData: {self.as_dict()}>"
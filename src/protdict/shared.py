@@ -0,0 +1,251 @@
+"""
+Share a Data between processes through `multiprocessing.shared_memory`.
+
+`SharedData(data)` publishes an indexed binary snapshot (see `protdict.binary`) into a
+shared memory segment, plus a small control segment that names the current snapshot and
+carries a version counter. Any process can `attach(name)` to get a `SharedDataView`: a
+read-only `MappedData` over the segment, so nothing is unpickled or copied up front.
+
+`update(data)` publishes a new snapshot into a fresh segment and then bumps the version.
+The control block is written as a seqlock: the counter is odd while the block is being
+changed, so readers never see a torn name. Views keep reading the snapshot they attached
+to until `refresh()`; `stale` tells whether a newer version exists. Pass a
+`multiprocessing.Lock` to serialize writers when more than one process publishes.
+"""
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from . import binary
+from .data_class import Data
+from .mapped import MappedData
+
+_MAGIC = b"PDSH"
+# magic, sequence (odd while writing), snapshot length, snapshot segment name
+_CONTROL = struct.Struct("<4s4xQQ64s")
+_SEQ_OFFSET = 8
+
+
+# Python 3.13 added `track=False`; before that every segment opened in a process is registered with
+# the resource tracker. Spawned children share their parent's tracker, so a child unregistering a
+# segment it only attached to would drop the parent's registration as well.
+_HAS_TRACK = sys.version_info >= (3, 13)
+_TRACKED = os.name == "posix" and not _HAS_TRACK
+
+
+def _untrack(segment: shared_memory.SharedMemory) -> shared_memory.SharedMemory:
+    """Undo the resource tracker registration the SharedMemory constructor made. Returns `segment`."""
+    if _TRACKED:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    """Attach to segment `name` without leaving it with the resource tracker."""
+    if _HAS_TRACK:
+        return shared_memory.SharedMemory(name=name, track=False)
+    return _untrack(shared_memory.SharedMemory(name=name))
+
+
+def _create_segment(size: int, name: str = None) -> shared_memory.SharedMemory:
+    """Create a segment whose lifetime is managed by SharedData, not the resource tracker."""
+    if _HAS_TRACK:
+        return shared_memory.SharedMemory(name=name, create=True, size=size, track=False)
+    return _untrack(shared_memory.SharedMemory(name=name, create=True, size=size))
+
+
+def _unlink(name: str):
+    """Remove segment `name` if it still exists. No return."""
+    if not name:
+        return
+    try:
+        segment = _open_segment(name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    _unlink_segment(segment)
+
+
+def _unlink_segment(segment: shared_memory.SharedMemory):
+    """Remove an untracked `segment`. No return."""
+    if _TRACKED:
+        # unlink() unregisters the segment before 3.13; register it first so the tracker stays balanced
+        resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+def _read_control(control: shared_memory.SharedMemory) -> tuple:
+    """Return a consistent (version, length, segment name) from a control block."""
+    buf = control.buf
+    while True:
+        magic, seq, length, raw_name = _CONTROL.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a protdict shared control block.")
+        if seq & 1 or struct.unpack_from("<Q", buf, _SEQ_OFFSET)[0] != seq:
+            time.sleep(0)
+            continue
+        return seq >> 1, length, raw_name.rstrip(b"\0").decode()
+
+
+class SharedData:
+    """
+    Publisher handle for a Data in shared memory. `name` is what other processes pass to `attach`.
+    The creating handle owns the segments: `close()` unlinks them unless `unlink=False`.
+    """
+
+    __slots__ = ("_control", "_segment", "_lock", "_owner")
+
+    def __init__(self, data, name: str = None, lock=None):
+        """
+        Publish `data` (a Data, or a dict in `export()` form) as version 1.
+          - `name`: control segment name (random if None)
+          - `lock`: optional `multiprocessing.Lock` shared with other writers
+        """
+        self._control = _create_segment(_CONTROL.size, name)
+        _CONTROL.pack_into(self._control.buf, 0, _MAGIC, 0, 0, b"")
+        self._segment = None
+        self._lock = lock
+        self._owner = True
+        self.update(data)
+
+    @classmethod
+    def connect(cls, name: str, lock=None) -> "SharedData":
+        """Return a writer handle for an existing control segment `name` (it does not own the segments)."""
+        handle = cls.__new__(cls)
+        handle._control = _open_segment(name)
+        _read_control(handle._control)
+        handle._segment = None
+        handle._lock = lock
+        handle._owner = False
+        return handle
+
+    @property
+    def name(self) -> str:
+        """Return the control segment name to pass to `attach`."""
+        return self._control.name
+
+    @property
+    def version(self) -> int:
+        """Return the currently published version."""
+        return _read_control(self._control)[0]
+
+    def update(self, data) -> int:
+        """Publish `data` as a new version. Views see it after `refresh()`. Returns int new version."""
+        if not isinstance(data, Data):
+            data = Data(data)
+        raw = binary.dumps(data, index=True)
+        segment = _create_segment(len(raw))
+        segment.buf[:len(raw)] = raw
+        if self._lock is not None:
+            self._lock.acquire()
+        try:
+            buf = self._control.buf
+            seq, _, old_name = _CONTROL.unpack_from(buf, 0)[1:]
+            struct.pack_into("<Q", buf, _SEQ_OFFSET, seq + 1)
+            _CONTROL.pack_into(buf, 0, _MAGIC, seq + 1, len(raw), segment.name.encode())
+            struct.pack_into("<Q", buf, _SEQ_OFFSET, seq + 2)
+        finally:
+            if self._lock is not None:
+                self._lock.release()
+        # views still attached to the old segment keep their mapping after the unlink
+        _unlink(old_name.rstrip(b"\0").decode())
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = segment
+        return (seq + 2) >> 1
+
+    def attach(self, zero_copy: bool = False) -> "SharedDataView":
+        """Return a view of the current version in this process."""
+        return SharedDataView(self.name, zero_copy)
+
+    def close(self, unlink: bool = None):
+        """Detach from the segments and, for the creating handle (or if `unlink`), remove them. No return."""
+        unlink = self._owner if unlink is None else unlink
+        if unlink:
+            _unlink(_read_control(self._control)[2])
+            _unlink_segment(self._control)
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self._control.close()
+
+    def __enter__(self) -> "SharedData":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedDataView(MappedData):
+    """
+    Read-only Data over the snapshot published under control segment `name`.
+    Reads decode single keys straight from shared memory. `stale` reports whether a newer
+    version was published; `refresh()` moves the view to it.
+    """
+
+    __slots__ = ("_control", "_segment", "_view", "_version", "_zero_copy")
+    _banned_attr = MappedData._banned_attr | {"_control", "_segment", "_view", "_version", "_zero_copy"}
+
+    def __init__(self, name: str, zero_copy: bool = False):
+        """Attach to the control segment `name` (from `SharedData.name`). Readers need no lock."""
+        self._control = _open_segment(name)
+        self._mmap = None
+        self._segment = None
+        self._view = None
+        self._zero_copy = zero_copy
+        self._sink = None
+        self._hooks = ()
+        self._attach()
+
+    def _attach(self):
+        """Internal function binding the view to the newest published snapshot. No return."""
+        while True:
+            version, length, name = _read_control(self._control)
+            try:
+                segment = _open_segment(name)
+            except FileNotFoundError:
+                # replaced and unlinked between reading the block and attaching; read it again
+                continue
+            break
+        view = segment.buf[:length]
+        self._bind(binary.SnapshotReader(view), self._zero_copy)
+        self._segment, self._view, self._version = segment, view, version
+
+    def _detach(self):
+        self._reader.close()
+        self._view.release()
+        self._segment.close()
+
+    @property
+    def version(self) -> int:
+        """Return the version this view reads."""
+        return self._version
+
+    @property
+    def stale(self) -> bool:
+        """True if a newer version has been published since this view attached."""
+        return _read_control(self._control)[0] != self._version
+
+    def refresh(self) -> bool:
+        """Move to the newest version if stale. Values read earlier with `zero_copy` must be released first.
+        Returns True if the view changed."""
+        if not self.stale:
+            return False
+        self._detach()
+        self._attach()
+        return True
+
+    def __reduce_ex__(self, protocol):
+        """Pickle as the segment name only: the unpickled view attaches to the newest version."""
+        return SharedDataView, (self._control.name, self._zero_copy)
+
+    def close(self):
+        """Detach from shared memory (nothing is unlinked). No return."""
+        self._detach()
+        self._control.close()
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<SharedDataView v{self._version}: {len(self)} keys>"
@@ -0,0 +1,442 @@
+"""
+SQLite-backed Data.
+
+`SQLiteData` keeps its values, protections, type locks and kwarg records in a local SQLite file,
+so a store can hold more keys than fit in RAM and survive restarts. Values are pickled into a
+`data_values` table; tags live in `data_tags` (one row per tagged key, indexed by tag bits, with
+the type lock and its element mode), and the small protection/type tables are also kept in memory
+so every check stays a dict lookup.
+
+Reads go through a bounded LRU cache. Writes are write-behind: they land in a pending buffer and
+reach the file in one SQL transaction once `flush_size` changes are pending or `flush_interval`
+seconds have passed since the last flush (checked on each write), and on `flush()`/`close()`.
+Bulk methods (`merge_dict`, `update`, `set_many`, `absorb`, `patch`...) and `transaction()` blocks
+defer flushing and commit everything they wrote as a single SQL transaction.
+
+Values are pickled when flushed, so changing a mutable value in place after that is not persisted;
+set it again instead. Keys iterate in insertion order.
+"""
+import contextlib
+import functools
+import pickle
+import sqlite3
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from time import monotonic
+
+from .data_class import KWARG, PROTECTED, TYPED, Data, _tag_mask
+from .functional_utils.types import element_mode
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS data_values (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, value BLOB)",
+    "CREATE TABLE IF NOT EXISTS data_tags (key TEXT PRIMARY KEY, flags INTEGER NOT NULL, lock BLOB, kwarg BLOB, mode TEXT)",
+    "CREATE INDEX IF NOT EXISTS data_tags_flags ON data_tags (flags)",
+)
+# keys read per query while iterating
+_PAGE = 1000
+_ALL_BITS = PROTECTED | TYPED | KWARG
+
+
+def _dumps(val) -> bytes:
+    return pickle.dumps(val, pickle.HIGHEST_PROTOCOL)
+
+
+def _flag_values(mask: int, exclude: int = 0) -> list[int]:
+    """Return every tag bit combination carrying all of `mask` and none of `exclude`."""
+    return [bits for bits in range(_ALL_BITS + 1) if bits & mask == mask and not bits & exclude]
+
+
+class _Store(MutableMapping):
+    """
+    The value store of a SQLiteData: reads through the LRU cache, writes into the pending
+    buffer. Also flushes the tag rows of keys whose tag bits changed (see `_TrackedFlags`).
+    """
+
+    __slots__ = (
+        "db", "_cache", "_cache_size", "_pending", "_erased", "dirty_tags", "_tables", "_len",
+        "flush_size", "flush_interval", "_last_flush", "_batching",
+    )
+
+    def __init__(self, db: sqlite3.Connection, cache_size: int, flush_size: int, flush_interval: float):
+        self.db = db
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        # key -> value written since the last flush; `_erased` keys were deleted since then
+        self._pending = {}
+        self._erased = set()
+        self.dirty_tags = set()
+        # (flags, types, checks, og_protects) of the owning SQLiteData, read when tag rows are flushed
+        self._tables = None
+        self._len = db.execute("SELECT COUNT(*) FROM data_values").fetchone()[0]
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._last_flush = monotonic()
+        self._batching = 0
+
+    def _remember(self, key, val):
+        """Internal function putting `key` in the LRU cache, evicting the oldest entry if full. No return."""
+        if not self._cache_size:
+            return
+        cache = self._cache
+        cache[key] = val
+        cache.move_to_end(key)
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+    def __getitem__(self, key):
+        pending = self._pending
+        if key in pending:
+            return pending[key]
+        if key in self._erased:
+            raise KeyError(key)
+        cache = self._cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        row = self.db.execute("SELECT value FROM data_values WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        val = pickle.loads(row[0])
+        self._remember(key, val)
+        return val
+
+    def __contains__(self, key) -> bool:
+        if key in self._pending or key in self._cache:
+            return True
+        if key in self._erased:
+            return False
+        return self.db.execute("SELECT 1 FROM data_values WHERE key = ?", (key,)).fetchone() is not None
+
+    def __setitem__(self, key, val):
+        if key not in self:
+            self._len += 1
+        self._pending[key] = val
+        self._remember(key, val)
+        self.wrote()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._len -= 1
+        self._pending.pop(key, None)
+        self._erased.add(key)
+        self._cache.pop(key, None)
+        self.wrote()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rows(self, columns: str):
+        """Internal function yielding `(id, *columns)` rows of every stored key in insertion order, a page at a time."""
+        self.flush()
+        last = 0
+        while True:
+            rows = self.db.execute(
+                f"SELECT id, {columns} FROM data_values WHERE id > ? ORDER BY id LIMIT ?", (last, _PAGE)
+            ).fetchall()
+            yield from rows
+            if len(rows) < _PAGE:
+                return
+            last = rows[-1][0]
+
+    def __iter__(self):
+        return (row[1] for row in self._rows("key"))
+
+    def items(self):
+        cache = self._cache
+        return (
+            (key, cache[key] if key in cache else pickle.loads(blob)) for _, key, blob in self._rows("key, value")
+        )
+
+    def values(self):
+        return (val for _, val in self.items())
+
+    def copy(self) -> dict:
+        """Return every key and value loaded into a dict. O(n)."""
+        return dict(self.items())
+
+    def wrote(self):
+        """Internal function flushing if enough changes are pending or the interval passed. No return."""
+        if self._batching:
+            return
+        if (
+            len(self._pending) + len(self._erased) + len(self.dirty_tags) >= self.flush_size
+            or monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager deferring flushes until the outermost block ends, then flushing once."""
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+            if not self._batching:
+                self.flush()
+
+    def flush(self) -> int:
+        """Write every pending change to the file in one SQL transaction. Returns int count of rows written."""
+        pending, erased, dirty = self._pending, self._erased, self.dirty_tags
+        if not (pending or erased or dirty):
+            return 0
+        rows = [(_dumps(val), key) for key, val in pending.items()]
+        tag_rows, untagged = [], []
+        if dirty:
+            flags, types, checks, og_protects = self._tables
+            for key in dirty:
+                bits = flags.get(key, 0)
+                if not bits:
+                    untagged.append((key,))
+                    continue
+                lock, mode = (_dumps(types[key]), element_mode(checks[key])) if bits & TYPED else (None, None)
+                raw = _dumps(og_protects[key]) if bits & KWARG else None
+                tag_rows.append((key, bits, lock, raw, mode))
+        db = self.db
+        with db:
+            # deleted keys go first, so a key erased then set again moves to the end like in a dict
+            db.executemany("DELETE FROM data_values WHERE key = ?", ((key,) for key in erased))
+            db.executemany("UPDATE data_values SET value = ? WHERE key = ?", rows)
+            db.executemany("INSERT OR IGNORE INTO data_values (value, key) VALUES (?, ?)", rows)
+            db.executemany("DELETE FROM data_tags WHERE key = ?", untagged)
+            db.executemany(
+                "INSERT OR REPLACE INTO data_tags (key, flags, lock, kwarg, mode) VALUES (?, ?, ?, ?, ?)", tag_rows
+            )
+        count = len(erased) + len(rows) + len(untagged) + len(tag_rows)
+        pending.clear()
+        erased.clear()
+        dirty.clear()
+        self._last_flush = monotonic()
+        return count
+
+    def keys_flagged(self, flag_values: list[int], untagged: bool = False) -> list[str]:
+        """Return stored keys, in insertion order, whose tag bits are one of `flag_values` (through the flags index),
+        plus untagged keys if `untagged`."""
+        self.flush()
+        marks = ", ".join("?" * len(flag_values))
+        if untagged:
+            sql = (
+                "SELECT v.key FROM data_values v LEFT JOIN data_tags t ON t.key = v.key "
+                f"WHERE t.key IS NULL OR t.flags IN ({marks}) ORDER BY v.id"
+            )
+        else:
+            sql = (
+                "SELECT v.key FROM data_tags t JOIN data_values v ON v.key = t.key "
+                f"WHERE t.flags IN ({marks}) ORDER BY v.id"
+            )
+        return [row[0] for row in self.db.execute(sql, flag_values)]
+
+    def close(self):
+        """Flush and close the connection. Safe to call twice. No return."""
+        if self.db is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+            self.db = None
+
+    def __repr__(self) -> str:
+        return f"<_Store: {self._len} keys, {len(self._pending)} pending>"
+
+
+class _TrackedFlags(dict):
+    """Tag bits table recording each key whose bits change, so the store flushes its tag row."""
+
+    __slots__ = ("_store",)
+
+    def __setitem__(self, key, bits):
+        dict.__setitem__(self, key, bits)
+        self._store.dirty_tags.add(key)
+        self._store.wrote()
+
+    def pop(self, key, *default):
+        val = dict.pop(self, key, *default)
+        self._store.dirty_tags.add(key)
+        self._store.wrote()
+        return val
+
+
+# methods whose writes are flushed together as one SQL transaction
+_BULK = (
+    "set_many", "sets", "osets", "merge_dict", "absorb", "update", "clear", "set_all_typings", "rem_all_typings",
+    "apply_delta", "patch",
+)
+
+
+def _batched(method):
+    @functools.wraps(method)
+    def batched(self, *args, **kwargs):
+        with self._values.batch():
+            return method(self, *args, **kwargs)
+    return batched
+
+
+def _needs_path(name: str) -> classmethod:
+    """Build a classmethod refusing the `Data` constructor `name`, which has no file path to open."""
+    def refuse(cls, *args, **kwargs):
+        raise TypeError(
+            f"{cls.__name__}.{name}() has no file to open; build a Data with Data.{name}(...) "
+            f"and pass its export() to {cls.__name__}(path, ...)."
+        )
+
+    refuse.__name__ = name
+    refuse.__doc__ = f"Not available on a SQLiteData, which needs a path; raises TypeError. See `Data.{name}`."
+    return classmethod(refuse)
+
+
+class SQLiteData(Data):
+    """
+    Data persisted to a SQLite file, with the same protection, typing and tag semantics.
+    Values are read through a bounded LRU cache and written behind in batches; tag queries
+    (`keys_by_tag`, `keys_with`, `bundle_keys`) run as indexed SQL queries.
+    `clone()`, `snapshot()` and pickling give in-memory Data. Use `close()` or a `with` block.
+    """
+
+    __slots__ = ("_finalizer",)
+    _banned_attr = Data._banned_attr | {"_finalizer"}
+
+    def __init__(
+        self,
+        path,
+        data_dictionary: dict = None,
+        initial_typing: bool = False,
+        retain_input: str = "drop",
+        cache_size: int = 4096,
+        flush_size: int = 1000,
+        flush_interval: float = 1.0,
+        **kwargs
+    ):
+        """
+        Open (or create) the store at `path` (a file path, or ":memory:"), then load like `Data`:
+          - `data_dictionary`, `initial_typing`, `**kwargs`: applied on top of what the file holds
+          - `retain_input`: as for `Data`; the retained input is kept in memory only, never in the file
+          - `cache_size`: number of values kept in the LRU read cache (0 disables it)
+          - `flush_size`: pending changes that trigger a flush
+          - `flush_interval`: seconds after which the next write flushes
+        """
+        if not isinstance(cache_size, int) or cache_size < 0:
+            raise ValueError(cache_size)
+        if not isinstance(flush_size, int) or flush_size < 1:
+            raise ValueError(flush_size)
+        if not isinstance(flush_interval, (int, float)) or flush_interval < 0:
+            raise ValueError(flush_interval)
+        super().__init__({})
+        self._og_list = self._retain(data_dictionary, retain_input) if data_dictionary is not None else None
+        db = sqlite3.connect(path)
+        if path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            db.execute(statement)
+        if "mode" not in (row[1] for row in db.execute("PRAGMA table_info(data_tags)")):
+            # files written before element modes were stored; their locks load in `sample` mode
+            db.execute("ALTER TABLE data_tags ADD COLUMN mode TEXT")
+        db.commit()
+        store = _Store(db, cache_size, flush_size, flush_interval)
+        flags = _TrackedFlags()
+        flags._store = store
+        self._values = store
+        self._flags = flags
+        store._tables = (flags, self._types, self._checks, self._og_protects)
+        self._finalizer = weakref.finalize(self, store.close)
+        with store.batch():
+            self._load_tags()
+            self._fill(data_dictionary or {}, initial_typing, kwargs)
+
+    def _load_tags(self):
+        """Internal function rebuilding the in-memory tag tables from the `data_tags` rows. No return."""
+        store = self._values
+        for key, bits, lock, raw, mode in store.db.execute("SELECT key, flags, lock, kwarg, mode FROM data_tags"):
+            if bits & KWARG:
+                self._mark_kwarg(key, pickle.loads(raw))
+            if bits & PROTECTED:
+                self._add_protection(key)
+            if bits & TYPED:
+                self._lock(key, pickle.loads(lock), None, mode or "sample")
+        # the rows already match
+        store.dirty_tags.clear()
+
+    from_iter = _needs_path("from_iter")
+    load = _needs_path("load")
+    load_binary = _needs_path("load_binary")
+
+    def flush(self) -> int:
+        """Write every pending change to the file now. Returns int count of rows written."""
+        return self._values.flush()
+
+    def close(self):
+        """Flush pending changes and close the file. No return."""
+        self._finalizer()
+
+    def __enter__(self) -> "SQLiteData":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Same as `Data.transaction`; the block's writes reach the file as one SQL transaction when it ends."""
+        with self._values.batch(), Data.transaction(self) as tx:
+            yield tx
+
+    def keys_by_tag(self) -> dict[str, list[str]]:
+        """Same as `Data.keys_by_tag`, served from the flags index. Keys come in insertion order."""
+        store = self._values
+        return {
+            "protected": store.keys_flagged(_flag_values(PROTECTED, KWARG)),
+            "typed": store.keys_flagged(_flag_values(TYPED)),
+            "kwarg": store.keys_flagged(_flag_values(KWARG)),
+            "none": store.keys_flagged([], untagged=True),
+        }
+
+    def keys_with(self, mask, exclude=0) -> list[str]:
+        """Same as `Data.keys_with`, served from the flags index. Keys come in insertion order."""
+        mask, exclude = _tag_mask(mask), _tag_mask(exclude)
+        if not mask and not exclude:
+            return list(self._values)
+        wanted = _flag_values(mask, exclude)
+        return self._values.keys_flagged([bits for bits in wanted if bits], untagged=0 in wanted)
+
+    def bundle_keys(self, protected_tag: bool = True, typed_tag: bool = True, kwarg_tag: bool = True, no_tags: bool = True) -> list[str]:
+        """Same as `Data.bundle_keys`, served from the flags index in one query. Keys come in insertion order."""
+        if protected_tag and typed_tag and kwarg_tag and no_tags:
+            return list(self._values)
+        wanted = set()
+        for on, bits in ((protected_tag, _flag_values(PROTECTED, KWARG)), (typed_tag, _flag_values(TYPED)), (kwarg_tag, _flag_values(KWARG))):
+            if on:
+                wanted.update(bits)
+        return self._values.keys_flagged(sorted(wanted), untagged=no_tags)
+
+    def as_dict(self, include_protected: bool = True) -> dict:
+        """Same as `Data.as_dict`, read page by page rather than key by key."""
+        if include_protected or not self._hidden:
+            return self._values.copy()
+        return {k: v for k, v in self._values.items() if not self._is_protected(k)}
+
+    def to_data(self) -> Data:
+        """Return an in-memory Data holding every key, value and tag. O(n)."""
+        return Data._from_tables(self._values.copy(), self._tag_entries())
+
+    def clone(self) -> Data:
+        """Same as `to_data()`; the copy does not depend on the file."""
+        return self.to_data()
+
+    def snapshot(self) -> Data:
+        """Return a read-only in-memory copy. O(n)."""
+        return self.to_data().snapshot()
+
+    def __reduce_ex__(self, protocol):
+        """Pickle as a plain Data; the connection itself cannot be pickled."""
+        return self.to_data().__reduce_ex__(protocol)
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<SQLiteData: {len(self)} keys>"
+
+
+for _name in _BULK:
+    setattr(SQLiteData, _name, _batched(getattr(Data, _name)))
+del _name
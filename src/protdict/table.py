@@ -0,0 +1,452 @@
+"""
+Columnar storage for batches of Data records that share one layout.
+
+A `DataTable` keeps one column per key. Columns of plain ints or floats are stored as
+`array.array` (or NumPy arrays with `backend="numpy"`, if NumPy is installed); anything else
+is a list. Protection and type locks apply per column and are enforced by column-wide
+operations (`set_column`, `set_columns`, `validate`) in one pass over the column. Rows are
+`DataRow` objects: ordinary `Data` instances whose values read and write the table's cells.
+"""
+from array import array
+from collections.abc import MutableMapping
+from itertools import compress
+
+from . import violations
+from .data_class import _TABLES, KWARG, PROTECTED, TYPED, Data, _fold, _tag_mask, _tag_names
+from .functional_utils.types import compile_type_lock
+
+try:
+    import numpy
+except ImportError:  # optional
+    numpy = None
+
+BACKENDS = ("list", "array", "numpy")
+# element type stored without conversion by each array typecode / numpy dtype kind
+_ARRAY_TYPES = {"q": int, "d": float}
+_NUMPY_TYPES = {"i": int, "f": float}
+_ROW_SHARED = _TABLES - {"_values"}
+
+
+def _as_list(col) -> list:
+    """Return a column as a list of Python values."""
+    return col if isinstance(col, list) else col.tolist()
+
+
+def _cell_type(col):
+    """Return the single Python type every cell of a typed column has, or None for list columns."""
+    if isinstance(col, list):
+        return None
+    if isinstance(col, array):
+        return _ARRAY_TYPES[col.typecode]
+    return _NUMPY_TYPES[col.dtype.kind]
+
+
+class _RowValues(MutableMapping):
+    """Value store of a DataRow: column name -> the cell at this row."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "DataTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        col = self._table._columns[key]
+        val = col[self._row]
+        return val if isinstance(col, (list, array)) else val.item()
+
+    def __contains__(self, key) -> bool:
+        return key in self._table._columns
+
+    def __setitem__(self, key, val):
+        self._table._store(key, self._row, val)
+
+    def __delitem__(self, key):
+        raise ValueError("A DataTable row cannot drop a single cell; use DataTable.drop_column.")
+
+    def __iter__(self):
+        return iter(self._table._columns)
+
+    def __len__(self) -> int:
+        return len(self._table._columns)
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+
+class DataRow(Data):
+    """
+    One row of a DataTable as a Data. Reads and writes go straight to the table's cells and
+    follow the table's column protections and type locks. Protecting or locking through a row
+    only changes that row's view; use the DataTable methods to change a column.
+    """
+
+    __slots__ = ()
+
+    @property
+    def _hidden(self) -> int:
+        """Number of protected columns, derived from the live tag tables."""
+        values = self._values
+        return sum(1 for k in self._protected_attr.values() if k in values)
+
+    @_hidden.setter
+    def _hidden(self, _):
+        pass
+
+    def erase(self, attr: str) -> bool:
+        """Rows cannot drop a cell; raises ValueError. Use `DataTable.drop_column`."""
+        raise ValueError("A DataTable row cannot drop a single cell; use DataTable.drop_column.")
+
+    oerase = erase
+
+    def to_data(self) -> Data:
+        """Return a standalone Data copy of this row with its tags."""
+        values = dict(self._values.items())
+        return Data._from_tables(values, self._tag_entries(values))
+
+    def __reduce_ex__(self, protocol):
+        """Pickle as a plain Data copy of the row."""
+        return self.to_data().__reduce_ex__(protocol)
+
+    def clone(self) -> Data:
+        """Same as `to_data()`; the copy is detached from the table."""
+        return self.to_data()
+
+    def snapshot(self) -> Data:
+        """Returns a read-only, detached copy of this row."""
+        return self.to_data()._share(readonly=True)
+
+
+class DataTable:
+    """Columnar container of Data records with per-column protection and type locks."""
+
+    __slots__ = ("_columns", "_len", "_meta", "_backend", "_sink")
+
+    def __init__(self, columns: dict = None, backend: str = "array"):
+        """
+        Initialize with:
+          - `columns`: { key: [values...] } or { key: {"value": [values...], "tags": [...]} }; all of equal length
+          - `backend`: `list` keeps every column a list, `array` stores int/float columns as `array.array`,
+            `numpy` stores them as NumPy arrays (requires NumPy)
+        A `typed` tag locks the column to the type shared by all of its values.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(backend)
+        if backend == "numpy" and numpy is None:
+            raise ValueError("The numpy backend requires NumPy to be installed.")
+        self._columns = {}
+        self._len = None
+        # tag tables live in a Data whose values are placeholders for the columns
+        self._meta = Data({})
+        self._meta._og_list = None
+        self._backend = backend
+        self._sink = None
+        for key, raw in (columns or {}).items():
+            if isinstance(raw, dict) and "value" in raw:
+                values, tags = raw["value"], raw.get("tags") or []
+            else:
+                values, tags = raw, []
+            if not self.set_column(key, values):
+                raise ValueError(f"Cannot add column: {key}")
+            bits = _tag_mask([t for t in tags if t != "none"])
+            self._apply_tags(key, bits, None)
+
+    def _apply_tags(self, key: str, bits: int, type_lock):
+        """Internal function to give column `key` the tags in `bits`. Raises ValueError if a type lock cannot be applied."""
+        meta = self._meta
+        if bits & KWARG:
+            meta._mark_kwarg(key, None)
+        if bits & (PROTECTED | KWARG):
+            meta._add_protection(key)
+        if bits & TYPED and not self.add_typing(key, type_lock):
+            raise ValueError(f"Column {key} does not fit a single type lock.")
+
+    @classmethod
+    def from_records(cls, records, backend: str = "array") -> "DataTable":
+        """
+        Build a table from an iterable of Data. Columns follow the keys of the records in first-seen order;
+        a record missing a key gets None in that column. Tags and type locks come from the first record holding each key.
+        """
+        records = list(records)
+        columns: dict = {}
+        tags: dict = {}
+        for rec in records:
+            if not isinstance(rec, Data):
+                raise ValueError("Argument must be a Data object.")
+            for key in rec._values:
+                if key not in columns:
+                    columns[key] = None
+                    tags[key] = (rec._flags.get(key, 0), rec._types.get(key))
+        table = cls(backend=backend)
+        for key in columns:
+            table.set_column(key, [rec._values.get(key) for rec in records])
+        for key, (bits, lock) in tags.items():
+            if bits:
+                table._apply_tags(key, bits, lock)
+        return table
+
+    def to_records(self) -> list[Data]:
+        """Return the rows as a list of independent Data records sharing one DataSchema."""
+        from .schema import DataSchema
+        meta = self._meta
+        template = Data._from_tables(dict.fromkeys(self._columns), meta._tag_entries(self._columns))
+        new = DataSchema(template).new
+        columns = [_as_list(col) for col in self._columns.values()]
+        return [new(list(row)) for row in zip(*columns)]
+
+    def export(self) -> dict:
+        """Return { key: [values...] } with {"value": [...], "tags": [...]} for tagged columns; `DataTable(...)` accepts it."""
+        flags = self._meta._flags
+        out: dict = {}
+        for key, col in self._columns.items():
+            values = list(_as_list(col))
+            bits = flags.get(key)
+            out[key] = {"value": values, "tags": _tag_names(bits)} if bits else values
+        return out
+
+    # storage
+
+    def _column(self, values):
+        """Internal function to store `values` in the layout of this table's backend."""
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            if self._backend == "numpy" and values.dtype.kind in _NUMPY_TYPES:
+                return values.astype(numpy.int64 if values.dtype.kind == "i" else numpy.float64)
+            values = values.tolist()
+        values = values.tolist() if isinstance(values, array) else list(values)
+        if self._backend == "list" or not values:
+            return values
+        kinds = set(map(type, values))
+        if len(kinds) != 1 or (elem := kinds.pop()) not in (int, float):
+            return values
+        try:
+            if self._backend == "numpy":
+                return numpy.array(values, dtype=numpy.int64 if elem is int else numpy.float64)
+            return array("q" if elem is int else "d", values)
+        except OverflowError:
+            return values
+
+    def _store(self, key: str, row: int, val):
+        """Internal function to write one cell, demoting the column to a list if `val` does not fit it. No return."""
+        col = self._columns.get(key)
+        if col is None:
+            self._columns[key] = col = [None] * len(self)
+            self._meta._put(key, None)
+        if type(val) is _cell_type(col):
+            try:
+                col[row] = val
+                return
+            except OverflowError:
+                pass
+        if not isinstance(col, list):
+            self._columns[key] = col = col.tolist()
+        col[row] = val
+
+    def _report(self, key: str, value):
+        """Internal function to send a type violation to the sink. No return."""
+        sink = self._sink
+        (sink if sink is not None else violations._default_sink)(key, self._meta._types.get(key), value)
+
+    def set_violation_sink(self, sink=None):
+        """Send type violations to `sink` (see `protdict.violations`); None restores the default. No return."""
+        if sink is not None and not callable(sink):
+            raise ValueError(sink)
+        self._sink = sink
+
+    # columns
+
+    def __len__(self) -> int:
+        """Return number of rows."""
+        return self._len or 0
+
+    @property
+    def columns(self) -> list[str]:
+        """Return the column names in order."""
+        return list(self._columns)
+
+    def __contains__(self, key) -> bool:
+        """Return True if `key` is a column."""
+        return key in self._columns
+
+    def column(self, key: str):
+        """Return the storage of column `key` (list, array or NumPy array). Treat it as read-only."""
+        return self._columns[key]
+
+    def _failures(self, key: str, col) -> list[int]:
+        """Internal function returning the rows of `col` that fail the type lock of `key`."""
+        meta = self._meta
+        check = meta._checks.get(key)
+        if check is None:
+            return []
+        elem, lock = _cell_type(col), meta._types[key]
+        if elem is not None and isinstance(lock, type) and issubclass(elem, lock):
+            # every cell of an array column has exactly type `elem`
+            return []
+        values = _as_list(col)
+        return list(compress(range(len(values)), [not ok for ok in map(check, values)]))
+
+    def set_column(self, key: str, values, override: bool = False) -> bool:
+        """
+        Replace (or add) column `key` with `values` in one batch.
+          - `override`: ignore protection (banned names are still refused)
+        Refused if protected, or if any value fails the column's type lock (reported to the sink).
+        Raises ValueError if the length differs from the table's. Returns True if set, False otherwise.
+        """
+        if not isinstance(key, str):
+            raise TypeError(f"attribute name must be string, not '{type(key).__name__}'")
+        meta = self._meta
+        if meta._procheck(key) if not override else _fold(key) in Data._banned_attr:
+            return False
+        col = self._column(values)
+        if self._len is not None and len(col) != self._len:
+            raise ValueError(f"Column {key} has {len(col)} rows, table has {self._len}.")
+        bad = self._failures(key, col)
+        if bad:
+            self._report(key, _as_list(col)[bad[0]])
+            return False
+        if key not in self._columns:
+            meta._put(key, None)
+        self._columns[key] = col
+        self._len = len(col)
+        return True
+
+    def set_columns(self, columns: dict, override: bool = False) -> dict:
+        """Apply `set_column` to each item. Returns a report dict: `applied`, `protected` and `type_error` lists of keys."""
+        report: dict = {"applied": [], "protected": [], "type_error": []}
+        for key, values in columns.items():
+            if self._meta._procheck(key) if not override else _fold(key) in Data._banned_attr:
+                report["protected"].append(key)
+            elif self.set_column(key, values, override):
+                report["applied"].append(key)
+            else:
+                report["type_error"].append(key)
+        return report
+
+    def drop_column(self, key: str, override: bool = False) -> bool:
+        """Remove column `key` unless protected (`override` ignores protection). Returns True if removed."""
+        meta = self._meta
+        if key not in self._columns or (not override and meta._procheck(key)):
+            return False
+        del self._columns[key]
+        meta._drop_protection(_fold(key))
+        if key in meta._types:
+            meta._unlock(key)
+        meta._flag_off(key, KWARG)
+        meta._og_protects.pop(key, None)
+        meta._pop(key)
+        return True
+
+    def validate(self, key: str = None) -> dict[str, list[int]]:
+        """Return { column: [failing row indices] } for every typed column (or only `key`), omitting columns that pass."""
+        keys = [key] if key is not None else list(self._meta._types)
+        out: dict = {}
+        for k in keys:
+            if k in self._columns:
+                bad = self._failures(k, self._columns[k])
+                if bad:
+                    out[k] = bad
+        return out
+
+    # tags
+
+    def protect(self, key: str) -> bool:
+        """Protect column `key`. Returns True if newly protected, False otherwise."""
+        return self._meta.protect(key)
+
+    def unprotect(self, key: str) -> bool:
+        """Unprotect column `key` if it is not a kwarg column. Returns True if unprotected, False otherwise."""
+        return self._meta.unprotect(key)
+
+    def add_typing(self, key: str, type_lock=None, elements: str = "sample") -> bool:
+        """
+        Lock column `key` to `type_lock` (any lock `Data.add_typing` accepts; if None, the one type all values share).
+        Returns True if applied; False if the column is missing, has mixed types, or has values failing the lock.
+        """
+        col = self._columns.get(key)
+        if col is None:
+            return False
+        if type_lock is None:
+            elem = _cell_type(col)
+            kinds = {elem} if elem is not None else set(map(type, col))
+            if len(kinds) != 1:
+                return False
+            type_lock = kinds.pop()
+        meta = self._meta
+        meta._lock(key, type_lock, compile_type_lock(type_lock, elements))
+        if self._failures(key, col):
+            meta._unlock(key)
+            return False
+        return True
+
+    def remove_typing(self, key: str) -> bool:
+        """Remove the type lock of column `key`. Returns True if removed, False otherwise."""
+        return self._meta.remove_typing(key)
+
+    def tags(self, key: str, default=None) -> list[str]:
+        """Returns list of tags (`protected`, `typed`, `kwarg`, `none`) for column `key`, or `default` if missing."""
+        return self._meta.tags(key, default)
+
+    def protected_keys(self) -> list[str]:
+        """Return the protected columns."""
+        return self._meta.protected_keys(include_kwargs=True)
+
+    def typed_keys(self) -> list[str]:
+        """Return the typed columns."""
+        return self._meta.typed_keys()
+
+    # rows
+
+    def row(self, i: int) -> DataRow:
+        """Return row `i` as a DataRow view."""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        meta = self._meta
+        view = DataRow.__new__(DataRow)
+        view._values = _RowValues(self, i)
+        view._og_list = None
+        for table in _ROW_SHARED:
+            object.__setattr__(view, table, getattr(meta, table))
+        view._shared = _ROW_SHARED
+        view._readonly = False
+        view._sink = self._sink
+        view._hooks = ()
+        return view
+
+    def __getitem__(self, i: int) -> DataRow:
+        """Return row `i` (same as `row`)."""
+        return self.row(i)
+
+    def __iter__(self):
+        """Iterate over rows as DataRow views."""
+        return (self.row(i) for i in range(len(self)))
+
+    def where(self, key: str, predicate) -> list[int]:
+        """Return the indices of rows whose `key` cell satisfies `predicate`."""
+        return list(compress(range(len(self)), map(predicate, _as_list(self._columns[key]))))
+
+    def take(self, rows) -> "DataTable":
+        """Return a new table with only `rows` (indices, in the given order) and the same tags."""
+        rows = list(rows)
+        out = DataTable(backend=self._backend)
+        for key, col in self._columns.items():
+            if isinstance(col, list):
+                out._columns[key] = [col[i] for i in rows]
+            elif isinstance(col, array):
+                out._columns[key] = array(col.typecode, [col[i] for i in rows])
+            else:
+                out._columns[key] = col[numpy.asarray(rows, dtype=numpy.intp)]
+        out._len = len(rows)
+        meta = self._meta
+        out._meta = Data._from_tables(dict.fromkeys(self._columns), meta._tag_entries(self._columns))
+        out._sink = self._sink
+        return out
+
+    def filter(self, key: str, predicate) -> "DataTable":
+        """Return a new table with the rows whose `key` cell satisfies `predicate`."""
+        return self.take(self.where(key, predicate))
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<DataTable: {len(self)} rows x {self.columns}>"
@@ -0,0 +1,102 @@
+"""
+Transactions for Data.
+
+`with d.transaction():` attaches an `UndoLog` change hook (see `Data._hooks`). Before each write
+is applied, the log records the op that would undo it, read from the current state. If the block
+raises, the log replays those ops newest first and the object is back where the block started.
+Otherwise the writes simply stay. Nested `transaction()` blocks are savepoints on the same log:
+an inner block rolls back only its own writes, and its writes are undone with the outer block if
+that one fails later. The cost is one undo entry per write, whatever the size of the object.
+"""
+from .functional_utils.types import element_mode
+
+
+class UndoLog:
+    """Change hook recording `(kind, key[, arg])` undo ops for one Data."""
+
+    __slots__ = ("_data", "entries", "_replaying")
+
+    def __init__(self, data):
+        self._data = data
+        self.entries = []
+        self._replaying = False
+
+    def __call__(self, op: tuple):
+        if self._replaying:
+            return
+        kind, key = op[0], op[1]
+        data = self._data
+        if kind == "set":
+            values = data._values
+            undo = ("set", key, values[key]) if key in values else ("erase", key)
+        elif kind == "erase":
+            undo = ("set", key, data._values[key])
+        elif kind == "protect":
+            undo = ("unprotect", key)
+        elif kind == "unprotect":
+            undo = ("protect", key)
+        elif kind == "type":
+            types = data._types
+            undo = ("type", key, types[key], element_mode(data._checks[key])) if key in types else ("untype", key)
+        elif kind == "untype":
+            undo = ("type", key, data._types[key], element_mode(data._checks[key]))
+        elif kind == "kwarg":
+            if key in data._og_protects:
+                return
+            undo = ("unkwarg", key)
+        elif kind == "unkwarg":
+            undo = ("kwarg", key)
+        else:
+            return
+        self.entries.append(undo)
+
+    def rollback(self, mark: int = 0):
+        """Undo every write recorded after entry `mark`, newest first. No return."""
+        entries = self.entries
+        undo = entries[mark:]
+        del entries[mark:]
+        undo.reverse()
+        self._replaying = True
+        try:
+            self._data._replay(undo)
+        finally:
+            self._replaying = False
+
+
+class Transaction:
+    """
+    Context manager returned by `Data.transaction()`. Rolls back on exception; `rollback()`
+    undoes the block's writes so far without leaving it.
+    """
+
+    __slots__ = ("_data", "_log", "_mark", "_outer")
+
+    def __init__(self, data):
+        self._data = data
+        self._log = None
+        self._mark = 0
+        self._outer = False
+
+    def __enter__(self) -> "Transaction":
+        data = self._data
+        log = next((hook for hook in data._hooks if type(hook) is UndoLog), None)
+        self._outer = log is None
+        if log is None:
+            log = UndoLog(data)
+            data._hooks = data._hooks + (log,)
+        self._log, self._mark = log, len(log.entries)
+        return self
+
+    def rollback(self):
+        """Undo the writes made since this block (or savepoint) started. No return."""
+        self._log.rollback(self._mark)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None:
+                self.rollback()
+        finally:
+            if self._outer:
+                data = self._data
+                data._hooks = tuple(hook for hook in data._hooks if hook is not self._log)
+        return False
@@ -0,0 +1,418 @@
+"""
+Versioned Data with structural sharing.
+
+`PersistentMap` is an immutable hash array mapped trie: `set` and `delete` return a new map that
+shares every node except the O(log32 n) nodes on the path to the changed key. `VersionedData`
+keeps all six of its tables (values, tags, type locks...) in persistent maps, so each change
+becomes a new version by keeping the previous roots, and `at(version)` returns a read-only Data
+over the roots of that version. A public method call, or a whole `transaction()` block, is one
+change however many internal writes it makes. The newest `max_versions` versions are kept.
+
+Keys of persistent maps iterate in hash order, not insertion order.
+"""
+import contextlib
+import functools
+from collections import deque
+from collections.abc import Mapping, MutableMapping
+
+from .data_class import _TABLES, Data
+
+_SHIFT = 5
+_MASK = (1 << _SHIFT) - 1
+_HASH_BITS = 64
+_popcount = getattr(int, "bit_count", lambda n: bin(n).count("1"))
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "val")
+
+    def __init__(self, h: int, key, val):
+        self.hash = h
+        self.key = key
+        self.val = val
+
+
+class _Collision:
+    """Leaves whose keys share the full hash."""
+
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, h: int, leaves: tuple):
+        self.hash = h
+        self.leaves = leaves
+
+
+class _Node:
+    """One trie level: `bitmap` has a bit per occupied slot, `entries` holds them in slot order."""
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: tuple):
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+_EMPTY = _Node(0, ())
+
+
+def _hash(key) -> int:
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+def _find(node, h: int, key):
+    """Return the leaf holding `key`, or None."""
+    shift = 0
+    while True:
+        if type(node) is _Collision:
+            for leaf in node.leaves:
+                if leaf.key is key or leaf.key == key:
+                    return leaf
+            return None
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return None
+        node = node.entries[_popcount(node.bitmap & (bit - 1))]
+        if type(node) is _Leaf:
+            return node if node.key is key or (node.hash == h and node.key == key) else None
+        shift += _SHIFT
+
+
+def _merge(old, leaf: _Leaf, shift: int):
+    """Return a subtree holding `old` (a leaf or collision) and `leaf`, which hash differently below `shift`."""
+    if old.hash == leaf.hash:
+        leaves = old.leaves if type(old) is _Collision else (old,)
+        return _Collision(leaf.hash, leaves + (leaf,))
+    a, b = (old.hash >> shift) & _MASK, (leaf.hash >> shift) & _MASK
+    if a == b:
+        return _Node(1 << a, (_merge(old, leaf, shift + _SHIFT),))
+    return _Node((1 << a) | (1 << b), (old, leaf) if a < b else (leaf, old))
+
+
+def _assoc(node, shift: int, leaf: _Leaf):
+    """Return (node with `leaf` set, True if the key is new). Returns `node` itself if nothing changed."""
+    if type(node) is _Collision:
+        if node.hash != leaf.hash:
+            return _merge(node, leaf, shift), True
+        for i, old in enumerate(node.leaves):
+            if old.key is leaf.key or old.key == leaf.key:
+                if old.val is leaf.val:
+                    return node, False
+                return _Collision(node.hash, node.leaves[:i] + (leaf,) + node.leaves[i + 1:]), False
+        return _Collision(node.hash, node.leaves + (leaf,)), True
+    bit = 1 << ((leaf.hash >> shift) & _MASK)
+    i = _popcount(node.bitmap & (bit - 1))
+    entries = node.entries
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, entries[:i] + (leaf,) + entries[i:]), True
+    entry = entries[i]
+    if type(entry) is _Leaf:
+        if entry.key is leaf.key or (entry.hash == leaf.hash and entry.key == leaf.key):
+            if entry.val is leaf.val:
+                return node, False
+            sub, added = leaf, False
+        else:
+            sub, added = _merge(entry, leaf, shift + _SHIFT), True
+    else:
+        sub, added = _assoc(entry, shift + _SHIFT, leaf)
+        if sub is entry:
+            return node, added
+    return _Node(node.bitmap, entries[:i] + (sub,) + entries[i + 1:]), added
+
+
+def _dissoc(node, shift: int, h: int, key):
+    """Return `node` without `key`: the same node if absent, None if it became empty,
+    or a lone leaf/collision for the parent to inline."""
+    if type(node) is _Collision:
+        leaves = tuple(leaf for leaf in node.leaves if not (leaf.key is key or leaf.key == key))
+        if len(leaves) == len(node.leaves):
+            return node
+        return leaves[0] if len(leaves) == 1 else _Collision(node.hash, leaves)
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    i = _popcount(node.bitmap & (bit - 1))
+    entries = node.entries
+    entry = entries[i]
+    if type(entry) is _Leaf:
+        if not (entry.key is key or (entry.hash == h and entry.key == key)):
+            return node
+        sub = None
+    else:
+        sub = _dissoc(entry, shift + _SHIFT, h, key)
+        if sub is entry:
+            return node
+    if sub is None:
+        bitmap, entries = node.bitmap & ~bit, entries[:i] + entries[i + 1:]
+        if not bitmap:
+            return None
+    else:
+        bitmap, entries = node.bitmap, entries[:i] + (sub,) + entries[i + 1:]
+    if shift and len(entries) == 1 and type(entries[0]) is not _Node:
+        return entries[0]
+    return _Node(bitmap, entries)
+
+
+def _leaves(node):
+    if type(node) is _Leaf:
+        yield node
+    elif type(node) is _Collision:
+        yield from node.leaves
+    else:
+        for entry in node.entries:
+            yield from _leaves(entry)
+
+
+class PersistentMap(Mapping):
+    """Immutable mapping; `set`/`delete`/`update` return new maps sharing structure with this one."""
+
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, items=None):
+        self._root, self._len = _EMPTY, 0
+        if items:
+            built = self.update(items)
+            self._root, self._len = built._root, built._len
+
+    @classmethod
+    def _of(cls, root, length: int) -> "PersistentMap":
+        made = cls.__new__(cls)
+        made._root, made._len = root, length
+        return made
+
+    def __getitem__(self, key):
+        leaf = _find(self._root, _hash(key), key)
+        if leaf is None:
+            raise KeyError(key)
+        return leaf.val
+
+    def get(self, key, default=None):
+        leaf = _find(self._root, _hash(key), key)
+        return default if leaf is None else leaf.val
+
+    def __contains__(self, key) -> bool:
+        return _find(self._root, _hash(key), key) is not None
+
+    def __iter__(self):
+        return (leaf.key for leaf in _leaves(self._root))
+
+    def items(self):
+        return [(leaf.key, leaf.val) for leaf in _leaves(self._root)]
+
+    def values(self):
+        return [leaf.val for leaf in _leaves(self._root)]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PersistentMap) and other._root is self._root:
+            return True
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def set(self, key, val) -> "PersistentMap":
+        """Return a map with `key` set to `val`. O(log n)."""
+        root, added = _assoc(self._root, 0, _Leaf(_hash(key), key, val))
+        return self if root is self._root else self._of(root, self._len + added)
+
+    def delete(self, key) -> "PersistentMap":
+        """Return a map without `key`. Raises KeyError if absent. O(log n)."""
+        root = _dissoc(self._root, 0, _hash(key), key)
+        if root is self._root:
+            raise KeyError(key)
+        return self._of(_EMPTY if root is None else root, self._len - 1)
+
+    def update(self, items) -> "PersistentMap":
+        """Return a map with every pair of `items` (a mapping or pairs) set."""
+        root, length = self._root, self._len
+        for key, val in (items.items() if isinstance(items, Mapping) else items):
+            root, added = _assoc(root, 0, _Leaf(_hash(key), key, val))
+            length += added
+        return self._of(root, length)
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"PersistentMap({dict(self.items())})"
+
+
+class _Table(MutableMapping):
+    """Mutable handle on a PersistentMap, so Data's write primitives work unchanged. `map` is the current version."""
+
+    __slots__ = ("map",)
+
+    def __init__(self, pmap: PersistentMap):
+        self.map = pmap
+
+    def __getitem__(self, key):
+        return self.map[key]
+
+    def get(self, key, default=None):
+        return self.map.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self.map
+
+    def __setitem__(self, key, val):
+        self.map = self.map.set(key, val)
+
+    def __delitem__(self, key):
+        self.map = self.map.delete(key)
+
+    def __iter__(self):
+        return iter(self.map)
+
+    def items(self):
+        return self.map.items()
+
+    def values(self):
+        return self.map.values()
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+    def copy(self) -> "_Table":
+        """Return a handle on the same map. O(1)."""
+        return _Table(self.map)
+
+    def __repr__(self) -> str:
+        return repr(self.map)
+
+
+_ORDER = tuple(sorted(_TABLES))
+
+
+class _History:
+    """
+    Change hook saving the tables' roots before a write, making the write a new version.
+    Inside a `group()` only the first write saves roots, so the whole group is one version.
+    """
+
+    __slots__ = ("_data", "versions", "current", "_depth", "_cut")
+
+    def __init__(self, data, max_versions: int):
+        self._data = data
+        # (version, roots in _ORDER, hidden count), oldest first
+        self.versions = deque(maxlen=max_versions)
+        self.current = 0
+        self._depth = 0
+        # True once the open group has saved its roots
+        self._cut = False
+
+    def __call__(self, op: tuple):
+        if self._cut:
+            return
+        data = self._data
+        self.versions.append((self.current, tuple(getattr(data, name).map for name in _ORDER), data._hidden))
+        self.current += 1
+        if self._depth:
+            self._cut = True
+
+    @contextlib.contextmanager
+    def group(self):
+        """Context manager making every write until the outermost block ends part of one version."""
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._cut = False
+
+
+# public methods that may make several internal writes; each call is one version
+_GROUPED = (
+    "set", "oset", "sets", "osets", "set_many", "erase", "oerase", "protect", "unprotect", "ounprotect",
+    "add_typing", "remove_typing", "set_all_typings", "rem_all_typings", "merge_dict", "swap", "grab", "ograb",
+    "compare_and_set", "clear", "update", "absorb", "apply_delta", "patch", "__setitem__", "__delitem__",
+    "__delattr__",
+)
+
+
+def _grouped(method):
+    @functools.wraps(method)
+    def grouped(self, *args, **kwargs):
+        with self._history.group():
+            return method(self, *args, **kwargs)
+    return grouped
+
+
+class VersionedData(Data):
+    """
+    Data keeping its recent history. Every change (set, erase, protect, type lock...) makes a new
+    version, one per public call or `transaction()` block; `at(version)` returns that version as a
+    read-only Data. Each version costs O(log n) new nodes per changed table. Keys iterate in hash order.
+    """
+
+    __slots__ = ("_history",)
+    _banned_attr = Data._banned_attr | {"_history"}
+
+    def __init__(self, data_dictionary: dict, initial_typing: bool = False, max_versions: int = 64, **kwargs):
+        """
+        Initialize like `Data`, plus:
+          - `max_versions`: number of past versions kept besides the current one
+        The constructed state is version 0.
+        """
+        super().__init__(data_dictionary, initial_typing, **kwargs)
+        self._start(max_versions)
+
+    def _start(self, max_versions: int):
+        """Internal function moving every table into a persistent map and starting the history. No return."""
+        if not isinstance(max_versions, int) or max_versions < 0:
+            raise ValueError(max_versions)
+        for name in _ORDER:
+            object.__setattr__(self, name, _Table(PersistentMap(getattr(self, name))))
+        self._history = _History(self, max_versions)
+        self._hooks = self._hooks + (self._history,)
+
+    @classmethod
+    def _from_tables(cls, values: dict, tags) -> "VersionedData":
+        """Internal constructor (see `Data._from_tables`), starting a fresh history."""
+        plain = Data._from_tables(values, tags)
+        data = cls.__new__(cls)
+        for name in Data.__slots__:
+            if name != "__weakref__":
+                object.__setattr__(data, name, getattr(plain, name))
+        data._start(64)
+        return data
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Same as `Data.transaction`; the block's writes make one version (also when it rolls back)."""
+        with self._history.group(), Data.transaction(self) as tx:
+            yield tx
+
+    def versions(self) -> range:
+        """Return the range of versions `at` can still return, oldest to current."""
+        history = self._history
+        oldest = history.versions[0][0] if history.versions else history.current
+        return range(oldest, history.current + 1)
+
+    def at(self, version: int) -> Data:
+        """Return `version` as a read-only Data. O(1). Raises ValueError if it is unknown or no longer kept."""
+        history = self._history
+        if version == history.current:
+            roots, hidden = tuple(getattr(self, name).map for name in _ORDER), self._hidden
+        elif version in self.versions():
+            _, roots, hidden = history.versions[version - history.versions[0][0]]
+        else:
+            raise ValueError(f"Version {version!r} is not available; kept: {self.versions()}")
+        view = Data.__new__(Data)
+        for name, root in zip(_ORDER, roots):
+            object.__setattr__(view, name, _Table(root))
+        view._og_list = None
+        view._hidden = hidden
+        view._shared = _TABLES
+        view._readonly = True
+        view._sink = None
+        view._hooks = ()
+        return view
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"<VersionedData v{self._history.current}: {self.as_dict()}>"
+
+
+for _name in _GROUPED:
+    setattr(VersionedData, _name, _grouped(getattr(Data, _name)))
+del _name
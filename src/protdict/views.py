@@ -0,0 +1,71 @@
+from collections.abc import ItemsView, KeysView, ValuesView
+
+
+class _DataView:
+    """Shared plumbing for the live views. Nothing is copied; every call reads the Data store."""
+
+    __slots__ = ()
+
+    def __init__(self, data, include_protected: bool = True):
+        self._mapping = data
+        self._include_protected = include_protected
+
+    def __len__(self) -> int:
+        """Return count of visible keys. O(1)."""
+        return self._mapping._count(self._include_protected)
+
+    def __repr__(self) -> str:
+        """Return repr string."""
+        return f"{type(self).__name__}({list(self)})"
+
+
+class DataKeysView(_DataView, KeysView):
+    """Live view over the keys of a Data object."""
+
+    __slots__ = ("_include_protected",)
+
+    def __iter__(self):
+        """Iterate over visible keys."""
+        return self._mapping._iter_keys(self._include_protected)
+
+    def __contains__(self, key) -> bool:
+        """Return True if `key` is visible through this view."""
+        return self._mapping.hasprop(key, self._include_protected)
+
+
+class DataValuesView(_DataView, ValuesView):
+    """Live view over the values of a Data object."""
+
+    __slots__ = ("_include_protected",)
+
+    def __iter__(self):
+        """Iterate over visible values."""
+        values = self._mapping._values
+        if self._include_protected:
+            return iter(values.values())
+        return (values[k] for k in self._mapping._iter_keys(False))
+
+    def __contains__(self, value) -> bool:
+        """Return True if `value` is one of the visible values."""
+        return any(v is value or v == value for v in self)
+
+
+class DataItemsView(_DataView, ItemsView):
+    """Live view over the (key, value) pairs of a Data object."""
+
+    __slots__ = ("_include_protected",)
+
+    def __iter__(self):
+        """Iterate over visible (key, value) pairs."""
+        values = self._mapping._values
+        if self._include_protected:
+            return iter(values.items())
+        return ((k, values[k]) for k in self._mapping._iter_keys(False))
+
+    def __contains__(self, item) -> bool:
+        """Return True if the (key, value) pair is visible through this view."""
+        key, value = item
+        if not self._mapping.hasprop(key, self._include_protected):
+            return False
+        v = self._mapping._values[key]
+        return v is value or v == value
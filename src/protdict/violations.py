@@ -0,0 +1,94 @@
+"""
+Pluggable sinks for type-lock violations.
+
+A sink is any callable taking `(key, type_lock, value)`. `Data` hands every rejected write
+to its own sink if one was set with `Data.set_violation_sink`, otherwise to the process-wide
+default (a `CounterSink` unless changed with `set_default_sink`). None of the sinks here
+write anything unless asked to.
+"""
+import logging
+from collections import Counter, deque
+
+
+class NullSink:
+    """Discard every violation."""
+
+    __slots__ = ()
+
+    def __call__(self, key: str, type_lock, value):
+        pass
+
+
+class CounterSink:
+    """Count violations per key. `counts` is a `collections.Counter` of key -> number of rejected writes."""
+
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, key: str, type_lock, value):
+        self.counts[key] += 1
+
+    @property
+    def total(self) -> int:
+        """Return the number of violations seen across all keys."""
+        return sum(self.counts.values())
+
+    def reset(self):
+        """Forget every count. No return."""
+        self.counts.clear()
+
+
+class RingBufferSink:
+    """Keep the last `maxlen` violations as (key, type_lock, value type) tuples in `events`."""
+
+    __slots__ = ("events",)
+
+    def __init__(self, maxlen: int = 1000):
+        self.events = deque(maxlen=maxlen)
+
+    def __call__(self, key: str, type_lock, value):
+        self.events.append((key, type_lock, type(value)))
+
+
+class LoggingSink:
+    """Send violations to a `logging` logger. The message is only formatted if the logger is enabled for `level`."""
+
+    __slots__ = ("logger", "level")
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.WARNING):
+        self.logger = logger if logger is not None else logging.getLogger("protdict")
+        self.level = level
+
+    def __call__(self, key: str, type_lock, value):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level, "%s has locked type as: %s but new value has type: %s.", key, type_lock, type(value)
+            )
+
+
+class RaiseSink:
+    """Raise ValueError for every violation."""
+
+    __slots__ = ()
+
+    def __call__(self, key: str, type_lock, value):
+        raise ValueError(f"{key} has locked type as: {type_lock} but new value has type: {type(value)}.")
+
+
+_default_sink = CounterSink()
+
+
+def get_default_sink():
+    """Return the process-wide violation sink."""
+    return _default_sink
+
+
+def set_default_sink(sink):
+    """Set the process-wide violation sink. Returns the previous one."""
+    global _default_sink
+    if not callable(sink):
+        raise ValueError(sink)
+    previous, _default_sink = _default_sink, sink
+    return previous
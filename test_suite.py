@@ -28,6 +28,22 @@ def test_basic():
     print("as_dict():", d.as_dict())
 
 
+def test_value_store():
+    separator("Value Store & Attribute Routing")
+    d = Data({"x": 1, "keys": "shadow?"}, y=2)
+    d.z = 3
+    print("attribute read/write through store:", d.x, d.z)
+    print("'keys' stored as data, method intact:", d.get("keys"), callable(d.keys))
+    print("internals hidden from as_dict():", d.as_dict())
+    print("unprotected_keys():", d.unprotected_keys())
+    print("has __dict__ (should be False):", hasattr(d, "__dict__"))
+    assert d.as_dict() == {"y": 2, "x": 1, "keys": "shadow?", "z": 3}
+    assert d.unprotected_keys() == ["x", "keys", "z"]
+    assert not d.set("_types", {}) and isinstance(d._types, dict)
+    del d.z
+    assert "z" not in d
+
+
 def test_tags_and_kwargs():
     separator("Tags and Kwargs")
     d = Data(
@@ -54,6 +70,58 @@ def test_typing():
     print("d.num after oset:", d.num)
 
 
+def test_generic_type_locks():
+    separator("Generic type locks")
+    from typing import Optional
+    d = Data({"port": 80, "hosts": ["a", "b"], "weights": {"a": 1.0}, "big": list(range(1000))})
+    d.add_typing("port", Optional[int])
+    d.add_typing("hosts", list[str])
+    d.add_typing("weights", dict[str, float])
+    d.add_typing("big", list[int], elements="full")
+    print("port=None under Optional[int] (should be True):", d.set("port", None))
+    print("hosts=[1] under list[str] (should be False):", d._check_for_type("hosts", [1]))
+    print("weights={'a': 'x'} under dict[str, float] (should be False):", d._check_for_type("weights", {"a": "x"}))
+    assert d._check_for_type("big", list(range(500))) and not d._check_for_type("big", list(range(500)) + ["x"])
+    assert d.set("hosts", ["c"]) and d._check_for_type("port", 3)
+    try:
+        d.add_typing("port", "not a type")
+    except ValueError:
+        print("Caught expected ValueError for invalid lock")
+    from typing import NewType
+    from src.protdict.functional_utils.types import _each, compile_type_lock
+    UserId = NewType("UserId", int)
+    assert compile_type_lock(UserId)(3) and not compile_type_lock(UserId)("3")
+    seen = []
+    assert _each(list(range(15)), lambda v: seen.append(v) is None, "sample", 8) and len(seen) == 8 and seen[-1] == 14
+
+
+def test_violation_sinks():
+    separator("Type violation sinks")
+    from src.protdict.violations import CounterSink, RingBufferSink, RaiseSink
+    d = Data({"n": 1})
+    d.add_typing("n")
+    counter = CounterSink()
+    d.set_violation_sink(counter)
+    for _ in range(3):
+        d.set("n", "bad")
+    d.merge_dict({"n": "worse"}, overwrite_current=True)
+    d.update({"n": "bad"})
+    d.sets(n="bad")
+    print("violation_counts():", d.violation_counts())
+    ring = RingBufferSink(maxlen=2)
+    d.set_violation_sink(ring)
+    d.oset("n", 1.5)
+    d.swap("n", None)
+    d.set("n", [])
+    print("ring buffer events:", list(ring.events))
+    d.set_violation_sink(RaiseSink())
+    try:
+        d.set("n", "x")
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+    assert counter.counts["n"] == 6 and len(ring.events) == 2 and d.n == 1
+
+
 def test_protect_unprotect():
     separator("Protect / Unprotect")
     d = Data({"x": 1, "y": 2})
@@ -67,6 +135,27 @@ def test_protect_unprotect():
     print("x in d after erase:", hasattr(d, "x"))
 
 
+def test_protection_index():
+    separator("Protection Index (case-insensitive)")
+    d = Data({"Name": "x", "other": 1}, Token="abc")
+    d.protect("Name")
+    print("set('name') on protected 'Name' (should be False):", d.set("name", "y"))
+    print("protect('NAME') again (should be False):", d.protect("NAME"))
+    print("unprotect kwarg 'token' (should be False):", d.unprotect("token"))
+    print("ounprotect kwarg 'TOKEN' (should be True):", d.ounprotect("TOKEN"))
+    print("unprotect('name') (should be True):", d.unprotect("name"), "protected_keys():", d.protected_keys())
+    assert d.set("Name", "z") and d.Name == "z"
+    assert d.protected_keys() == []
+    # construction skips only the exact protected spelling; case variants still load
+    assert Data({"Name": 1}, name=2).as_dict() == {"name": 2, "Name": 1}
+    assert Data({"A": {"value": 1, "tags": ["protected"]}, "a": 2}).as_dict() == {"A": 1, "a": 2}
+    # writes are refused case-insensitively, but only the protected spelling is hidden
+    d = Data({"A": 1, "a": 2})
+    d.protect("A")
+    assert not d.set("a", 3) and d.as_dict(include_protected=False) == {"a": 2}
+    assert d.hasprop("a", False) and not d.hasprop("A", False) and len(d.keys(False)) == 1
+
+
 def test_erase():
     separator("Erase / OErase")
     d = Data({"p": 100, "q": 200}, q=200)
@@ -95,6 +184,245 @@ def test_merge_and_absorb():
     print("After absorb with overwrite:", d1.as_dict())
 
 
+def test_retain_input():
+    separator("retain_input")
+    import gc
+    import weakref
+    from src.protdict.sharded import ShardedData
+    src = {"a": 1, "p": {"value": 2, "tags": ["protected"]}}
+    print("Default keeps nothing:", Data(src).original_input())
+    assert Data(src).original_input() is None and Data(src, retain_input="keep").original_input() is src
+    frozen = Data(src, retain_input="frozen")
+    print("Frozen copy:", frozen.original_input())
+    assert frozen.original_input() == src and frozen.original_input() is not src
+    assert Data(src, retain_input="weakref").original_input() == src  # plain dicts fall back to frozen
+
+    class Input(dict):
+        pass
+
+    held = Input(src)
+    d = Data(held, retain_input="weakref")
+    assert d.original_input() is held
+    ref = weakref.ref(held)
+    del held
+    gc.collect()
+    print("Weakly held input after release:", d.original_input(), ref())
+    assert d.original_input() is None and d.p == 2
+    assert ShardedData(src, retain_input="keep", shards=2).original_input() is src
+    try:
+        Data(src, retain_input="sometimes")
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_journal_delta():
+    separator("journal & delta")
+    d = Data({"a": 1, "p": {"value": 2, "tags": ["protected"]}}, k=3)
+    replica = Data(d.export())
+    since = d.enable_journal(capacity=16)
+    d.set("a", 5)
+    d.set("b", 6)
+    d.erase("b")
+    d.protect("a")
+    d.add_typing("a")
+    d.unprotect("p")
+    d.merge_dict({"m": 1})
+    ops = d.export_delta(since)
+    print("Delta ops:", ops)
+    assert [op[0] for op in ops] == list(range(1, 8)) and d.journal_version() == 7
+    print("Applied to replica:", replica.apply_delta(ops), replica.export())
+    assert replica.export() == d.export() and replica.tags_by_key() == d.tags_by_key()
+    assert d.export_delta(7) == [] and d.clone().set("c", 1) and d.journal_version() == 7
+    for i in range(20):
+        d.set("a", i)
+    try:
+        d.export_delta(since)
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+    d.disable_journal()
+    try:
+        d.journal_version()
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_diff_patch():
+    separator("diff & patch")
+    from src.protdict.fingerprint import fingerprint
+    assert fingerprint(1) == fingerprint(1.0) == fingerprint(True) and fingerprint(-1) != fingerprint(-2)
+    assert fingerprint({"a": [1]}) == fingerprint({"a": [1]}) and fingerprint([1]) != fingerprint((1,))
+    from fractions import Fraction
+    from decimal import Decimal
+    for x, y in ((0.5, Fraction(1, 2)), (1, Decimal(1)), (1, complex(1, 0)), (b"abc", memoryview(b"abc"))):
+        left, right = Data({"k": x}), Data({"k": y})
+        left.fingerprint(), right.fingerprint()
+        assert fingerprint(x) == fingerprint(y) and left == right and not left.diff(right)["changed"]
+    assert fingerprint("1") != fingerprint(1) and fingerprint(b"a") != fingerprint("a")
+    big = Data({"n": 10 ** 5000})
+    assert big.fingerprint() == Data({"n": 10 ** 5000}).fingerprint() and big.diff(Data({"n": 1}))["changed"] == {"n": 1}
+    # in-place changes never reach the hook, so mutable values are rehashed on every comparison
+    left, right = Data({"x": [], "s": set()}), Data({"x": [1], "s": {2}})
+    left.fingerprint(), right.fingerprint()
+    left.x.append(1)
+    left.s.add(2)
+    assert left == right and left.fingerprint() == right.fingerprint() and left.diff(right)["changed"] == {}
+    from collections import UserList
+    left, right = Data({"u": UserList([1])}), Data({"u": UserList([2])})
+    assert left.diff(right)["changed"] == {"u": UserList([2])} and left != right
+    a = Data({"k1": [1], "k2": 2, "k3": 3, "p": {"value": 1, "tags": ["protected"]}})
+    b = a.clone()
+    b.set("k1", [0])
+    b.erase("k2")
+    b.set("new", {"x": 1})
+    b.add_typing("k3")
+    b.unprotect("p")
+    d = a.diff(b)
+    print("Diff:", d)
+    assert d["added"] == {"new": {"x": 1}} and d["removed"] == ["k2"] and d["changed"] == {"k1": [0]}
+    assert d["tags"] == {"k3": ["typed"], "p": []} and d["types"] == {"k3": int}
+    c = a.clone()
+    print("Patched keys:", c.patch(d), "equal to b:", c == b)
+    assert c.export() == b.export() and c._types == b._types and c.fingerprint() == b.fingerprint()
+    assert a.fingerprint() != b.fingerprint() and a != b
+    # tag removal round-trips too (kwarg and protection dropped), and a no-op patch counts nothing
+    ka, kb = Data({"x": 1}, k=2), Data({"x": 1, "k": 2})
+    patched = ka.clone()
+    assert patched.patch(ka.diff(kb)) == 1 and patched.export() == kb.export() and list(patched.keys(False)) == ["k", "x"]
+    assert patched.patch(ka.diff(kb)) == 0
+    a.set("k2", 2)
+    assert a.diff(a.clone()) == {"added": {}, "removed": [], "changed": {}, "tags": {}, "types": {}}
+    try:
+        a.diff({"k1": 1})
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_transactions():
+    separator("transactions")
+    # element modes survive rollback and journal replay
+    full = Data({"xs": [1, 2]})
+    full.add_typing("xs", list[int], elements="full")
+    full.enable_journal()
+    long_bad = list(range(100)) + ["x"] + list(range(100))
+    try:
+        with full.transaction():
+            full.remove_typing("xs")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    replica = Data({"xs": [1, 2]})
+    replica.apply_delta(full.export_delta(0))
+    assert not full._check_for_type("xs", long_bad) and not replica._check_for_type("xs", long_bad)
+    d = Data({"a": 1, "b": 2, "p": {"value": 0, "tags": ["protected"]}}, k=1)
+    before = (d.export(), d.tags_by_key(), list(d.keys(False)))
+    try:
+        with d.transaction():
+            d.set("a", 10)
+            d.erase("b")
+            d.set("c", 3)
+            d.protect("a")
+            d.add_typing("c")
+            d.unprotect("p")
+            with d.transaction() as savepoint:
+                d.set("c", 4)
+                savepoint.rollback()
+            print("Inside the transaction:", d.as_dict())
+            assert d.c == 3
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    print("After rollback:", d.export())
+    assert (d.export(), d.tags_by_key(), list(d.keys(False))) == before and not d._types and d._hooks == ()
+    with d.transaction():
+        d.set("a", 5)
+    assert d.a == 5
+    try:
+        d.merge_dict({"x": 1, 5: 2})
+    except TypeError as e:
+        print("Caught expected TypeError:", e, "- 'x' merged:", "x" in d)
+    assert "x" not in d
+
+
+def test_versioned_data():
+    separator("VersionedData")
+    from src.protdict.versioned import PersistentMap, VersionedData
+    from src.protdict.data_class import ReadOnlyError
+    base = PersistentMap({"a": 1, "b": 2})
+    grown = base.set("c", 3).delete("a")
+    print("PersistentMap before/after:", dict(base.items()), dict(grown.items()))
+    assert dict(base.items()) == {"a": 1, "b": 2} and dict(grown.items()) == {"b": 2, "c": 3} and len(grown) == 2
+    d = VersionedData({"a": 1, "p": {"value": 2, "tags": ["protected"]}}, max_versions=3)
+    d.set("a", 2)
+    d.set("b", 3)
+    d.protect("b")
+    print("Versions:", list(d.versions()), "at 0:", d.at(0).export(), "at 2:", d.at(2).as_dict())
+    assert d.at(0).as_dict() == {"a": 1, "p": 2} and d.at(2).tags_by_key()["b"] == ["none"]
+    assert d.at(3).protected_keys() == d.protected_keys() and list(d.at(3).keys(False)) == ["a"]
+    try:
+        d.at(1).set("a", 5)
+    except ReadOnlyError as e:
+        print("Caught expected ReadOnlyError:", e)
+    d.erase("a")
+    assert list(d.versions()) == [1, 2, 3, 4] and d.at(1).a == 2 and "a" not in d
+    try:
+        d.at(0)
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+    # one public call, or one transaction block, is one version however many internal writes it makes
+    d = VersionedData({"t": 1}, max_versions=8)
+    d.add_typing("t")
+    d.erase("t")
+    d.merge_dict({f"m{i}": i for i in range(20)}, protect_new_added_keys=True)
+    with d.transaction():
+        d.set("x", 1)
+        d.set("y", 2)
+    print("Versions after 4 calls:", list(d.versions()))
+    assert list(d.versions()) == [0, 1, 2, 3, 4] and d.at(2).as_dict() == {} and d.at(1).typed_keys() == ["t"]
+    assert "x" not in d.at(3) and d.at(4).as_dict()["y"] == 2
+
+
+def test_sqlite_data():
+    separator("SQLiteData")
+    import os
+    import tempfile
+    from src.protdict.sqlite import SQLiteData
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "d.db")
+        with SQLiteData(path, {"a": 1, "p": {"value": [1, 2], "tags": ["protected", "typed"]}}, k=2, flush_size=2) as d:
+            d.set("b", "x")
+            d.erase("b")
+            d.set("c", 3)
+            d.add_typing("c")
+            d.merge_dict({"m0": 0, "m1": 1})
+            print("SQLite keys_by_tag:", d.keys_by_tag(), "len:", len(d), "pending after merge:", d.flush())
+            assert d.keys_with("typed", exclude="protected") == ["c"] and d.bundle_keys(False, False, False, True) == ["a", "m0", "m1"]
+            exported = d.export()
+        with SQLiteData(path, cache_size=0) as d:
+            print("Reopened export:", d.export())
+            assert d.export() == exported and list(d.keys(False)) == ["a", "c", "m0", "m1"]
+            assert not d.set("p", 5) and not d.set("c", "three") and d.clone() == d
+            try:
+                with d.transaction():
+                    d.set("z", 1)
+                    raise RuntimeError
+            except RuntimeError:
+                print("Rolled back transaction, 'z' in d:", "z" in d)
+        with SQLiteData(path) as d:
+            assert "z" not in d and len(d) == 6
+            d.set("xs", [1])
+            d.add_typing("xs", list[int], elements="full")
+        bad = list(range(50)) + ["x"] + list(range(50))
+        source = {"q": 1}
+        with SQLiteData(path, source, retain_input="keep") as d:
+            assert not d.set("xs", bad) and d.original_input() is source and "retain_input" not in d
+        for name in ("from_iter", "load", "load_binary"):
+            try:
+                getattr(SQLiteData, name)(path)
+                raise AssertionError(name)
+            except TypeError as e:
+                print("Caught expected TypeError:", e)
+
+
 def test_export_clone():
     separator("Export and Clone")
     d = Data({"x": 5}, y={"value": 6, "tags": ["protected"]}, z=7)
@@ -105,6 +433,361 @@ def test_export_clone():
     print("Reconstructed (include_protected=True):", d2.as_dict(include_protected=True))
 
 
+def test_clone_cow_and_snapshot():
+    separator("Copy-on-write clone & snapshot")
+    from src.protdict.data_class import ReadOnlyError
+    base = Data({"x": 1, "t": {"value": 2, "tags": ["typed"]}}, k=3)
+    c = base.clone()
+    print("clone shares storage until a write:", c._values is base._values)
+    c.set("x", 10)
+    c.protect("t")
+    print("after writes -> base.x:", base.x, "clone.x:", c.x, "base tags t:", base.tags("t", None), "clone tags t:", c.tags("t", None))
+    snap = base.snapshot()
+    base.set("x", 99)
+    print("snapshot keeps old value:", snap.x, "base now:", base.x)
+    try:
+        snap.set("x", 5)
+    except ReadOnlyError as e:
+        print("Caught expected ReadOnlyError:", e)
+    assert base.x == 99 and snap.x == 1 and c.x == 10
+    assert c.tags("t", None) == ["protected", "typed"] and base.tags("t", None) == ["typed"]
+    assert c.export() == {"x": 10, "t": {"value": 2, "tags": ["protected", "typed"]}, "k": {"value": 3, "tags": ["protected", "kwarg"]}}
+    assert not c.set("t", "wrong type")
+
+
+def test_streaming_export():
+    separator("iter_export & export_to")
+    import io, json
+    d = Data({"x": 5, "t": {"value": [1, 2], "tags": ["typed"]}}, y="k")
+    print("iter_export():", list(d.iter_export()))
+    buf = io.StringIO()
+    print("export_to json wrote:", d.export_to(buf, chunk_size=1), "->", buf.getvalue())
+    assert Data(json.loads(buf.getvalue())).export() == d.export()
+    buf = io.StringIO()
+    d.export_to(buf, format="ndjson")
+    print("export_to ndjson ->", buf.getvalue().splitlines())
+    merged = {}
+    for line in buf.getvalue().splitlines():
+        merged.update(json.loads(line))
+    assert merged == d.export()
+
+
+def test_streaming_load():
+    separator("from_iter & load")
+    import io
+    d = Data({"n": 12345, "s": "héllo", "t": {"value": [1, {"a": None}], "tags": ["typed", "protected"]}}, k=1.5)
+    buf = io.StringIO()
+    d.export_to(buf)
+    for chunk in (1, 3, 7, 1 << 16):
+        buf.seek(0)
+        loaded = Data.load(buf, chunk_size=chunk)
+        assert loaded.export() == d.export(), chunk
+    raw = io.BytesIO(buf.getvalue().encode())
+    assert Data.load(raw, chunk_size=2).export() == d.export()
+    buf = io.StringIO()
+    d.export_to(buf, format="ndjson")
+    buf.seek(0)
+    loaded = Data.load(buf, format="ndjson")
+    print("ndjson round trip:", loaded.export())
+    gen = Data.from_iter(((f"k{i}", i) for i in range(5)), z=0)
+    print("from_iter generator:", gen.as_dict(), "protected:", gen.protected_keys(include_kwargs=True))
+    assert loaded.export() == d.export() and len(gen) == 6
+    try:
+        Data.load(io.StringIO('{"a": 1'))
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_binary_snapshot():
+    separator("binary snapshot")
+    import os
+    import tempfile
+    from array import array
+    from typing import Optional
+    from src.protdict import binary
+    d = Data({"i": -7, "big": 2**70, "f": 0.5, "s": "héllo", "b": b"raw", "arr": array("h", [1, -2]),
+              "o": [1, {"x": None}], "p": {"value": True, "tags": ["protected"]}}, k=1)
+    d.add_typing("i", Optional[int])
+    loaded = binary.load(binary.dumps(d))
+    print("binary round trip:", loaded.export())
+    assert loaded.export() == d.export() and loaded._types["i"] == Optional[int]
+    print("Typed lock survives (set 'i' to 'x'):", loaded.set("i", "x"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "d.pdat")
+        d.save_binary(path, index=True)
+        reader = binary.SnapshotReader(open(path, "rb").read())
+        at = reader.find("arr")
+        print("Random access 'arr':", reader.value(at), "flags of 'p':", reader.flags(reader.find("p")))
+        assert reader.find("missing") == -1 and reader.value(at).tolist() == [1, -2]
+        view = Data.load_binary(path, zero_copy=True)
+        assert isinstance(view.b, memoryview) and bytes(view.b) == b"raw"
+        # element modes are saved per lock, for full loads and for mapped reads alike
+        from src.protdict.mapped import MappedData
+        full = Data({"xs": [1], "ys": [1]})
+        full.add_typing("xs", list[int], elements="full")
+        full.add_typing("ys", list[int])
+        full.save_binary(path, index=True)
+        bad = list(range(50)) + ["x"] + list(range(50))
+        with MappedData(path) as m:
+            assert not m._check_for_type("xs", bad) and m._check_for_type("ys", bad)
+        loaded = Data.load_binary(path)
+        assert not loaded.set("xs", bad) and loaded.set("ys", bad)
+    try:
+        binary.load(b"nope")
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_pickling():
+    separator("pickling")
+    import copy
+    import pickle
+    from array import array
+    d = Data({"a": 1, "blob": b"x" * 8192, "arr": array("d", range(1024)), "mv": memoryview(b"abc"),
+              "p": {"value": [1], "tags": ["protected", "typed"]}}, k=2)
+    d.protect("ghost")
+    buffers = []
+    raw = pickle.dumps(d, protocol=5, buffer_callback=buffers.append)
+    loaded = pickle.loads(raw, buffers=buffers)
+    print("Pickle size:", len(raw), "out-of-band buffers:", len(buffers), "tags:", loaded.tags_by_key())
+    assert len(buffers) == 3 and loaded.blob == d.blob and loaded.arr == d.arr and bytes(loaded.mv) == b"abc"
+    assert loaded.tags_by_key() == d.tags_by_key() and loaded._og_list is None and "ghost" in loaded._protected_attr
+    print("Typed lock survives (set 'p' to 'x'):", loaded.set("p", "x"))
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        assert pickle.loads(pickle.dumps(d, protocol)) == d
+    try:
+        pickle.loads(pickle.dumps(d.snapshot())).set("a", 2)
+    except ValueError as e:
+        print("Caught expected ReadOnlyError:", e)
+    shallow = copy.copy(d)
+    shallow.set("a", 5)
+    print("copy.copy is a clone; original 'a':", d.a, "copy 'a':", shallow.a)
+    # a full element check stays full after a round trip
+    full = Data({"xs": [1]})
+    full.add_typing("xs", list[int], elements="full")
+    assert not pickle.loads(pickle.dumps(full)).set("xs", list(range(50)) + ["x"] + list(range(50)))
+
+
+def test_mapped_data():
+    separator("MappedData")
+    import os
+    import tempfile
+    from src.protdict.mapped import MappedData
+    from src.protdict.data_class import ReadOnlyError
+    d = Data({"a": 1, "s": "héllo", "p": {"value": [1, 2], "tags": ["protected", "typed"]}}, k=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "d.pdat")
+        d.save_binary(path, index=True)
+        with MappedData(path) as m:
+            print("Mapped get 's':", m.get("s"), "get protected 'p':", m.get("p"), "['p']:", m["p"])
+            print("Mapped tags 'k':", m.tags("k", None), "len:", len(m), "visible:", list(m.keys(False)))
+            assert m.export() == d.export() and m == d and "missing" not in m
+            try:
+                m.set("a", 2)
+            except ReadOnlyError as e:
+                print("Caught expected ReadOnlyError:", e)
+            copy = m.to_data()
+        copy.set("a", 3)
+        print("Writable copy after set 'a':", copy.a)
+        with MappedData.load_binary(path) as m:
+            assert isinstance(m, MappedData) and m == d
+        for build in (lambda: MappedData.from_iter([("a", 1)]), lambda: MappedData.load(None)):
+            try:
+                build()
+                raise AssertionError("built a MappedData")
+            except TypeError as e:
+                print("Caught expected TypeError:", e)
+        d.save_binary(path)
+        try:
+            MappedData(path)
+        except ValueError as e:
+            print("Caught expected ValueError:", e)
+
+
+def test_shared_data():
+    separator("SharedData")
+    from src.protdict.shared import SharedData, SharedDataView
+    from src.protdict.data_class import ReadOnlyError
+    d = Data({"a": 1, "p": {"value": [1, 2], "tags": ["protected", "typed"]}}, k=2)
+    with SharedData(d) as pub:
+        view = SharedDataView(pub.name)
+        print("View version:", view.version, "get 'a':", view.get("a"), "tags 'p':", view.tags("p", None))
+        assert view == d and not view.stale
+        try:
+            view.set("a", 2)
+        except ReadOnlyError as e:
+            print("Caught expected ReadOnlyError:", e)
+        d.set("a", 2)
+        pub.update(d)
+        print("After update, stale:", view.stale, "old value still readable:", view.a)
+        assert view.stale and view.a == 1
+        assert view.refresh() and view.a == 2 and view.version == pub.version == 2
+        writer = SharedData.connect(pub.name)
+        writer.update({"a": 3})
+        writer.close()
+        view.refresh()
+        print("After connected writer update:", view.as_dict(), "version:", view.version)
+        assert view.as_dict() == {"a": 3}
+        view.close()
+
+
+def test_data_schema():
+    separator("DataSchema")
+    from src.protdict.schema import DataSchema
+    template = Data({"id": {"value": 0, "tags": ["protected", "typed"]}, "name": "", "score": 0.0}, kind="rec")
+    schema = DataSchema.from_export(template.export())
+    print("Schema:", schema)
+    rec = schema.new({"id": 7, "name": "ann", "extra": True})
+    print("Record:", rec.as_dict(), "tags of 'id':", rec.tags("id", None), "visible:", list(rec.keys(False)))
+    assert rec.export()["id"] == {"value": 7, "tags": ["protected", "typed"]} and rec.extra is True
+    print("Set protected 'id':", rec.set("id", 8), "oset 'score' to str:", rec.oset("score", "x"))
+    other = schema.new(["rec", 1, "bob", 2.5])
+    rec.protect("name")
+    print("Diverged record protects:", rec.protected_keys(), "other still:", other.protected_keys())
+    assert other.protected_keys() == ["id"] and "name" in rec.protected_keys()
+    other.erase("score")
+    print("After erase 'score':", other.as_dict(), "len:", len(other))
+    from_tags = DataSchema.from_tags(template.tags_by_key(), {"id": int})
+    assert from_tags.new().tags_by_key() == template.tags_by_key()
+    try:
+        schema.new([1, 2])
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_data_table():
+    separator("DataTable")
+    from src.protdict.table import DataTable
+    table = DataTable({"id": {"value": [1, 2, 3], "tags": ["protected", "typed"]}, "name": ["a", "b", "c"], "score": [0.5, 1.5, 2.5]})
+    print("Table:", table, "column types:", {k: type(table.column(k)).__name__ for k in table.columns})
+    print("set_column protected 'id':", table.set_column("id", [7, 8, 9]), "add_typing 'score':", table.add_typing("score"))
+    print("set_column 'score' with a str:", table.set_column("score", [1.0, "x", 2.0]), "score:", table.column("score").tolist())
+    row = table[1]
+    print("Row 1:", row.as_dict(), "tags of 'id':", row.tags("id", None), "visible:", list(row.keys(False)))
+    print("Row set 'name':", row.set("name", "bee"), "row set 'id':", row.set("id", 5), "column:", table.column("name"))
+    assert table.column("name")[1] == "bee" and table.validate() == {}
+    high = table.filter("score", lambda v: v > 1)
+    print("Filtered:", high.export())
+    records = table.to_records()
+    assert [r.export() for r in records] == [r.export() for r in table] and len(high) == 2
+    back = DataTable.from_records(records)
+    assert back.export() == table.export()
+    print("Round trip through list[Data]:", back.export() == table.export())
+    try:
+        table.set_column("short", [1])
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+
+
+def test_concurrent_data():
+    separator("ConcurrentData")
+    import threading
+    from src.protdict.concurrency import ConcurrentData, RWLock
+    d = ConcurrentData({"n": 0, "p": {"value": 1, "tags": ["protected"]}})
+
+    def bump():
+        for _ in range(500):
+            while not d.compare_and_set("n", d.get("n"), d.get("n") + 1):
+                pass
+
+    workers = [threading.Thread(target=bump) for _ in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    print("Counter after 4 threads x 500 compare_and_set:", d.n)
+    assert d.n == 2000 and not d.compare_and_set("p", 1, 2)
+    d.add_typing("n")
+    print("Atomic merge with a bad type:", d.merge_dict({"a": 1, "n": "x"}, overwrite_current=True, atomic=True), d.as_dict())
+    assert "a" not in d
+    print("Swap 'n':", d.swap("n", 5), "grab 'n':", d.grab("n"), "now:", d.n)
+    # opposite-direction diffs take both locks in the same order, so they cannot deadlock
+    a, b = ConcurrentData({"x": 1}), ConcurrentData({"x": 2})
+
+    def diff_loop(left, right):
+        for i in range(200):
+            left.set("x", i)
+            left.diff(right)
+            left.absorb(right)
+
+    workers = [threading.Thread(target=diff_loop, args=pair) for pair in ((a, b), (b, a))]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join(timeout=10)
+    assert not any(t.is_alive() for t in workers)
+    lock = RWLock()
+    with lock.write, lock.read:
+        print("Read inside write is allowed")
+    try:
+        with lock.read, lock.write:
+            pass
+    except RuntimeError as e:
+        print("Caught expected RuntimeError:", e)
+
+
+def test_sharded_data():
+    separator("ShardedData")
+    import tempfile
+    import threading
+    from src.protdict.sharded import ShardedData
+    source = {f"k{i}": i for i in range(20)}
+    source["p"] = {"value": 1, "tags": ["protected", "typed"]}
+    s = ShardedData(source, shards=4, kw=9)
+    plain = Data(source, kw=9)
+    print("Shards:", s.shards, "len:", len(s), "get 'k3':", s.get("k3"), "get protected 'p':", s.get("p"))
+    print("Set 'P' (case-insensitive protection):", s.set("P", 3), "tags of 'kw':", s.tags("kw", None))
+    assert s.export() == plain.export() and sorted(s.keys_by_tag()["none"]) == sorted(plain.keys_by_tag()["none"])
+
+    def fill(offset):
+        for i in range(200):
+            s.set(f"t{offset}_{i}", i)
+
+    workers = [threading.Thread(target=fill, args=(t,)) for t in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    print("After 4 writer threads:", len(s))
+    assert len(s) == 22 + 800
+    s.add_typing("k1")
+    print("Atomic cross-shard merge with a bad type:", s.merge_dict({"new": 1, "k1": "x"}, True, atomic=True), "new" in s)
+    clone = s.clone()
+    clone.set("k2", -1)
+    print("Clone is independent:", s.k2, clone.k2)
+
+    # whole-object Data methods must see every shard, never just the one `__getattr__` would pick
+    s = ShardedData({f"k{i}": i for i in range(20)}, shards=4)
+    plain = Data({f"k{i}": i for i in range(20)})
+    print("Fingerprint matches plain Data:", s.fingerprint() == plain.fingerprint())
+    assert s.fingerprint() == plain.fingerprint()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sharded.pdb")
+        s.save_binary(path)
+        assert Data.load_binary(path).as_dict() == plain.as_dict()
+    try:
+        with s.transaction():
+            for i in range(20):
+                s.set(f"k{i}", -1)
+            raise RuntimeError("roll back")
+    except RuntimeError:
+        pass
+    print("After rolled-back transaction:", sorted(s.values()) == list(range(20)))
+    assert s.as_dict() == plain.as_dict()
+    other = s.clone()
+    other.set("k3", 30)
+    other.erase("k4")
+    other.set("new", 1)
+    for theirs in (other, Data(other.export()), ShardedData(other.export(), shards=3)):
+        delta = s.diff(theirs)
+        assert delta["added"] == {"new": 1} and delta["removed"] == ["k4"] and delta["changed"] == {"k3": 30}
+    print("Patched keys:", s.patch(s.diff(other)), s == other)
+    assert s == other and s.fingerprint() == other.fingerprint()
+    for name in ("enable_journal", "disable_journal", "journal_version", "export_delta", "apply_delta",
+                 "from_iter", "load", "load_binary", "_values"):
+        assert not hasattr(s, name), name
+
+
 def test_dunders_and_basic_ops():
     separator("Dunders & Basic Ops")
     d = Data({"a": 1}, b=2)
@@ -134,6 +817,25 @@ def test_get_keys_values_items():
     print("items():", d.items())
 
 
+def test_live_views():
+    separator("Live keys/values/items views")
+    d = Data({"a": 1, "b": 2}, c=3)
+    ks = d.keys()
+    vis = d.keys(include_protected=False)
+    print("keys():", ks, "len:", len(ks))
+    print("keys(include_protected=False):", vis, "len:", len(vis))
+    d.set("e", 5)
+    d.protect("a")
+    print("after set e / protect a ->", ks, vis)
+    print("'c' in visible keys (should be False):", "c" in vis)
+    print("values(False):", list(d.values(False)), "items(False):", list(d.items(False)))
+    assert len(ks) == 4 and len(vis) == 2 and list(vis) == ["b", "e"]
+    assert ("e", 5) in d.items() and ("c", 3) not in d.items(False)
+    assert ks & {"a", "zz"} == {"a"}
+    d.unprotect("a")
+    assert len(vis) == 3
+
+
 def test_clear_update():
     separator("clear & update")
     d = Data({"x":1, "y":2}, y=2)
@@ -143,6 +845,22 @@ def test_clear_update():
     print("After update, a:", d.get("a"), "y (unchanged protected):", getattr(d, 'y', None))
 
 
+def test_set_many():
+    separator("set_many batch report")
+    d = Data({"n": {"value": 1, "tags": ["typed"]}, "free": 0}, locked="x")
+    report = d.set_many({"n": 2, "free": 5, "locked": "y", "new": [1]})
+    print("report:", report)
+    report = d.set_many({"n": "bad", "free": 6}, on_type_error="collect")
+    print("collect report:", report)
+    try:
+        d.set_many({"n": "bad", "free": 7}, on_type_error="raise")
+    except ValueError as e:
+        print("Caught expected ValueError:", e)
+    print("override report:", d.set_many({"locked": "z"}, override=True), "locked:", d.locked)
+    assert d.free == 6 and d.n == 2 and d.new == [1] and d.locked == "z"
+    assert report == {"applied": ["free"], "protected": [], "type_error": ["n"], "rejected": {"n": "bad"}}
+
+
 def test_keys_by_tag_and_bundle():
     separator("keys_by_tag & bundle_keys")
     d = Data({"p":1, "q":{"value":2,"tags":["protected","typed"]}}, r=3)
@@ -151,6 +869,24 @@ def test_keys_by_tag_and_bundle():
     print("bundle_keys (untagged only):", b)
 
 
+def test_keys_with_masks():
+    separator("keys_with tag masks")
+    from src.protdict.data_class import PROTECTED, TYPED, KWARG
+    d = Data({"p": 1, "t": {"value": 2, "tags": ["typed"]}, "pt": {"value": 3, "tags": ["protected", "typed"]}},
+             k=4, initial_typing=True)
+    print("typed but not kwarg:", d.keys_with(TYPED, exclude=KWARG))
+    print("protected & typed:", d.keys_with(["protected", "typed"]))
+    print("untagged:", d.keys_with(0, exclude=PROTECTED | TYPED | KWARG))
+    assert d.keys_with(TYPED, exclude=KWARG) == ["t", "pt"]
+    assert d.keys_with(PROTECTED | TYPED) == ["k", "pt"]
+    assert d.keys_with("kwarg") == ["k"]
+    assert d.keys_with(0, exclude=PROTECTED | TYPED | KWARG) == ["p"]
+    d.remove_typing("t")
+    d.ounprotect("pt")
+    assert d.tags("t", None) == ["none"] and d.tags("pt", None) == ["typed"]
+    assert d.bundle_keys(protected_tag=False, typed_tag=True, kwarg_tag=False, no_tags=False) == ["pt", "k"]
+
+
 def test_set_all_and_rem_all_typings():
     separator("set_all_typings & rem_all_typings")
     d = Data({"x":1, "y":2, "z":3}, initial_typing=False)
@@ -182,16 +918,40 @@ def main():
     ver:str = "0.0.2"
     start_time = time.perf_counter()
     test_basic()
+    test_value_store()
     test_tags_and_kwargs()
     test_typing()
+    test_generic_type_locks()
+    test_violation_sinks()
     test_protect_unprotect()
+    test_protection_index()
     test_erase()
     test_merge_and_absorb()
+    test_retain_input()
     test_export_clone()
+    test_journal_delta()
+    test_diff_patch()
+    test_transactions()
+    test_versioned_data()
+    test_sqlite_data()
+    test_clone_cow_and_snapshot()
+    test_streaming_export()
+    test_streaming_load()
+    test_binary_snapshot()
+    test_pickling()
+    test_mapped_data()
+    test_shared_data()
+    test_data_schema()
+    test_data_table()
+    test_concurrent_data()
+    test_sharded_data()
     test_dunders_and_basic_ops()
     test_get_keys_values_items()
+    test_live_views()
     test_clear_update()
+    test_set_many()
     test_keys_by_tag_and_bundle()
+    test_keys_with_masks()
     test_set_all_and_rem_all_typings()
     test_functional_utils()
     end_time = time.perf_counter()